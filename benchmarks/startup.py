@@ -0,0 +1,114 @@
+"""
+Startup benchmark for the dbuddy command.
+
+Runs a few cheap invocations in fresh interpreters under
+`python -X importtime` and fails (exit status 1) if DevBuddy's own import
+time goes over a fixed budget, or if startup imports a module that only
+some commands need. click's import time is reported but not counted, since
+it does not depend on DevBuddy.
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py --budget-ms 30 --max-wall-ms 150 --runs 10
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Milliseconds of import time DevBuddy may add on top of click.
+DEFAULT_BUDGET_MS = 25
+# Invocations measured: argv after 'dbuddy'.
+INVOCATIONS = [['hello'], ['--help']]
+# Modules only the commands that use them should import.
+FORBIDDEN_MODULES = (
+    'devbuddy.formatter', 'devbuddy.analyzer', 'devbuddy.scaffolder', 'devbuddy.animations',
+    'devbuddy.testrunner', 'devbuddy.symbols', 'devbuddy.cache', 'devbuddy.plugins.installer',
+    'sqlite3', 'subprocess', 'multiprocessing', 'concurrent.futures',
+)
+
+RUN_CLI = "import sys; sys.argv[0] = 'dbuddy'; from devbuddy.cli import cli; cli()"
+
+
+def _run(argv, importtime=False):
+    """Run dbuddy with argv in a fresh interpreter; return (wall seconds, {module: (self us, cumulative us)})."""
+    command = [sys.executable]
+    if importtime:
+        command += ['-X', 'importtime']
+    command += ['-c', RUN_CLI] + argv
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')])))
+    start = time.perf_counter()
+    result = subprocess.run(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                            universal_newlines=True)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        sys.exit(f"dbuddy {' '.join(argv)} failed:\n{result.stderr}")
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return elapsed, modules
+
+
+def _devbuddy_ms(modules):
+    """Import time spent in DevBuddy's modules and what only they import, leaving out click."""
+    total = modules.get('devbuddy.cli', (0, 0))[1] + modules.get('devbuddy', (0, 0))[1]
+    return (total - modules.get('click', (0, 0))[1]) / 1000
+
+
+def measure(argv, runs):
+    """Return (best DevBuddy import ms, best wall ms, modules imported) for dbuddy argv over runs runs."""
+    _run(argv)  # warm up the OS file cache and write .pyc files
+    import_ms = min(_devbuddy_ms(_run(argv, importtime=True)[1]) for _ in range(runs))
+    wall_ms = min(_run(argv)[0] for _ in range(runs)) * 1000
+    return import_ms, wall_ms, set(_run(argv, importtime=True)[1])
+
+
+def baseline_ms(runs):
+    """Best wall time of an interpreter that only imports click."""
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'import click'], check=True)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                        help=f"DevBuddy import time allowed on top of click (default {DEFAULT_BUDGET_MS})")
+    parser.add_argument('--max-wall-ms', type=float,
+                        help="Also fail if a whole invocation takes longer than this")
+    parser.add_argument('--runs', type=int, default=5, help="Runs per invocation; the best one counts")
+    args = parser.parse_args()
+
+    print(f"python -c 'import click': {baseline_ms(args.runs):.1f} ms")
+    failures = []
+    for argv in INVOCATIONS:
+        label = 'dbuddy ' + ' '.join(argv)
+        import_ms, wall_ms, imported = measure(argv, args.runs)
+        print(f"{label}: {wall_ms:.1f} ms, of which DevBuddy imports {import_ms:.1f} ms "
+              f"(budget {args.budget_ms:g} ms)")
+        if import_ms > args.budget_ms:
+            failures.append(f"{label}: DevBuddy imports took {import_ms:.1f} ms, over the "
+                            f"{args.budget_ms:g} ms budget")
+        if args.max_wall_ms is not None and wall_ms > args.max_wall_ms:
+            failures.append(f"{label}: took {wall_ms:.1f} ms, over {args.max_wall_ms:g} ms")
+        loaded = sorted(name for name in FORBIDDEN_MODULES if name in imported)
+        if loaded:
+            failures.append(f"{label}: imported {', '.join(loaded)} at startup")
+
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
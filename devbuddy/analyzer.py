@@ -0,0 +1,326 @@
+"""
+Code analysis for DevBuddy.
+Files are linted with pylint in size-balanced shards across worker
+processes, and each file's messages are cached by content hash, pylint
+version and configuration, so only changed files are linted again.
+pylint's cross-file checks (duplicate-code and cyclic-import) are disabled,
+since a shard only sees some of the files; `analyze --duplicates` and
+`analyze --imports` cover them for the whole project.
+"""
+
+import importlib.util
+import json
+import os
+import shutil
+import subprocess
+import sys
+from collections import deque, namedtuple
+
+from . import __version__
+from .cache import ConfigHasher, ResultCache
+from .parallel import CHUNKS_PER_JOB, default_jobs, iter_balanced_chunks, map_chunks
+from .plugins.hooks import POST_ANALYZE, PRE_ANALYZE, call_hook
+from .walker import iter_files
+
+# Files pylint reads its configuration from, in any parent directory.
+PYLINT_CONFIG_FILES = ('pylintrc', '.pylintrc', 'pyproject.toml', 'setup.cfg', 'tox.ini')
+# Checks that compare files with each other; their results depend on the
+# whole shard rather than on one file, so they cannot be cached per file.
+CROSS_FILE_CHECKS = ('duplicate-code', 'cyclic-import')
+# pylint starts slowly, so shards are larger than for in-process work.
+PYLINT_CHUNKS_PER_JOB = 2
+
+# One finding. `code` is the message id (e.g. C0114), `symbol` its name
+# (e.g. missing-module-docstring) and `severity` pylint's message type.
+Message = namedtuple('Message', ['path', 'line', 'column', 'code', 'symbol', 'text', 'severity'])
+
+# Outcome of analyzing a single file. `cached` is set when the messages
+# came from the cache instead of a fresh run.
+AnalysisResult = namedtuple('AnalysisResult', ['path', 'messages', 'error', 'cached'], defaults=[False])
+
+
+class AnalysisCache:
+    """Remember the messages an analyzer reported for each file's content.
+
+    Entries are keyed by analyzer name and version, a hash of the
+    analyzer's config files, the file's path and its content hash.
+    Findings that depend on other files (e.g. unresolved imports) are only
+    refreshed once the file itself or the configuration changes.
+    """
+
+    def __init__(self, analyzer, version, config_files=(), cache_dir=None):
+        self.analyzer = analyzer
+        self.version = version
+        self.store = ResultCache('analyze', cache_dir)
+        self.config = ConfigHasher(config_files)
+
+    @property
+    def hits(self):
+        return self.store.hits
+
+    @property
+    def misses(self):
+        return self.store.misses
+
+    def _key(self, path):
+        path = os.path.abspath(path)
+        config_digest = self.config.digest(os.path.dirname(path))
+        return f"{self.analyzer}|{self.version}|{config_digest}|{path}|{self.store.file_digest(path)}"
+
+    def get(self, path):
+        """Return the cached messages for path's current content, or None."""
+        value = self.store.get(self._key(path))
+        if value is None:
+            return None
+        return [Message(path, *fields) for fields in json.loads(value)]
+
+    def set(self, path, messages):
+        self.store.set(self._key(path), json.dumps([list(m[1:]) for m in messages]))
+
+    def commit(self):
+        self.store.commit()
+
+    def close(self):
+        self.store.close()
+
+
+def pylint_command():
+    """Return the command that runs pylint, preferring the one in this environment."""
+    if importlib.util.find_spec('pylint') is not None:
+        return [sys.executable, '-m', 'pylint']
+    return [shutil.which('pylint') or 'pylint']
+
+
+def has_pylint():
+    """Return True if pylint_command() finds a pylint to run."""
+    return importlib.util.find_spec('pylint') is not None or shutil.which('pylint') is not None
+
+
+def pylint_version(command):
+    """Return the version of the pylint run by command."""
+    output = subprocess.run(command + ['--version'], capture_output=True, text=True, check=True).stdout
+    for line in output.splitlines():
+        if line.startswith('pylint'):
+            return line.split()[-1]
+    return output.strip()
+
+
+def _lint_chunk(paths, command):
+    """Run pylint once over a chunk of files and split its messages per file."""
+    args = ['--output-format=json', '--persistent=n', f"--disable={','.join(CROSS_FILE_CHECKS)}"]
+    result = subprocess.run(command + args + list(paths), capture_output=True, text=True)
+    # pylint's exit status is a bit mask of the message types it emitted;
+    # 32 means it could not run at all.
+    if result.returncode & 32:
+        raise RuntimeError(result.stderr.strip() or f"pylint exited with status {result.returncode}")
+    try:
+        records = json.loads(result.stdout or '[]')
+    except ValueError:
+        raise RuntimeError(result.stderr.strip() or "pylint produced no readable output")
+
+    by_path = {os.path.abspath(p): [] for p in paths}
+    for record in records:
+        messages = by_path.get(os.path.abspath(record.get('path', '')))
+        if messages is not None:
+            messages.append((record['line'], record['column'], record['message-id'], record['symbol'],
+                             record['message'], record['type']))
+    return [AnalysisResult(p, [Message(p, *m) for m in by_path[os.path.abspath(p)]], None) for p in paths]
+
+
+def iter_cached(paths, cache, analyze):
+    """Yield an AnalysisResult for every path, analyzing only cache misses.
+
+    analyze is called with a lazy iterable of the paths missing from the
+    cache and must yield lists of AnalysisResults as it gets through them.
+    Fresh results are stored in the cache as they arrive.
+    """
+    def misses():
+        for p in paths:
+            if cache is not None:
+                try:
+                    messages = cache.get(p)
+                except OSError as e:
+                    pending.append(AnalysisResult(p, [], str(e)))
+                    continue
+                if messages is not None:
+                    pending.append(AnalysisResult(p, messages, None, True))
+                    continue
+            yield p
+
+    pending = deque()
+    for chunk_results in analyze(misses()):
+        while pending:
+            yield pending.popleft()
+        for result in chunk_results:
+            if cache is not None and result.error is None:
+                cache.set(result.path, result.messages)
+            yield result
+        if cache is not None:
+            cache.commit()
+    while pending:
+        yield pending.popleft()
+
+
+def map_analysis(func, paths, jobs, *args, threads=False, chunks_per_job=CHUNKS_PER_JOB):
+    """Run func(chunk, *args) over size-balanced chunks of paths, yielding result lists.
+
+    A chunk whose analysis raised yields an error result for each of its files.
+    """
+    chunks = iter_balanced_chunks(paths, jobs, chunks_per_job=chunks_per_job)
+    for chunk, chunk_results, error in map_chunks(func, chunks, jobs, *args, threads=threads):
+        if error is not None:
+            chunk_results = [AnalysisResult(p, [], str(error)) for p in chunk]
+        yield chunk_results
+
+
+def iter_pylint(paths, jobs=None, cache=None, command=None):
+    """Lint paths with pylint across `jobs` processes, yielding AnalysisResults.
+
+    Files with cached messages are not linted again; results for the others
+    are stored in the cache as their shards finish.
+    """
+    jobs = jobs or default_jobs()
+    command = command or pylint_command()
+    # Each shard is a pylint subprocess, so threads are enough to drive them.
+    return iter_cached(paths, cache, lambda misses: map_analysis(
+        _lint_chunk, misses, jobs, command, threads=True, chunks_per_job=PYLINT_CHUNKS_PER_JOB))
+
+
+def _report_result(result):
+    """Print a file's messages in pylint's text format."""
+    if result.error:
+        print(f"Error: Could not analyze {result.path}: {result.error}")
+        return
+    if not result.messages:
+        return
+    print(f"************* {result.path}")
+    for m in sorted(result.messages, key=lambda m: (m.line or 0, m.column or 0)):
+        print(f"{m.path}:{m.line}:{m.column}: {m.code}: {m.text} ({m.symbol})")
+
+
+ENGINES = ('pylint', 'builtin')
+
+
+def analyze_code(path, jobs=None, use_cache=True, engine='pylint', reporter=None):
+    """Analyze the Python files under path and print the messages.
+
+    engine is 'pylint', or 'builtin' for DevBuddy's own AST rules, which
+    need no pylint process. Files are split into size-balanced shards
+    analyzed by `jobs` parallel workers (default: CPU count); files whose
+    content, analyzer version and configuration are unchanged since the
+    last run are reported from the cache unless use_cache is False.
+    With a reporter (see devbuddy.reporters), findings are streamed to it
+    instead of being printed. Returns the number of messages.
+    """
+    jobs = jobs or default_jobs()
+    if engine == 'builtin':
+        from .astlint import iter_builtin, ruleset_version, select_rules
+        codes = select_rules()
+        label = 'the built-in analyzer'
+        tool, version = 'devbuddy', __version__
+        cache = AnalysisCache('builtin', ruleset_version(codes)) if use_cache else None
+        results = iter_builtin(iter_files(path), jobs, cache, codes)
+    else:
+        command = pylint_command()
+        try:
+            version = pylint_version(command)
+        except (OSError, subprocess.CalledProcessError) as e:
+            print(f"Error: Could not run pylint: {e}")
+            return 0
+        label = f"pylint {version}"
+        tool = 'pylint'
+        cache = AnalysisCache('pylint', version, PYLINT_CONFIG_FILES) if use_cache else None
+        results = iter_pylint(iter_files(path), jobs, cache, command)
+
+    return report_analysis(path, label, results, reporter, tool, version, cache)
+
+
+def report_analysis(path, label, results, reporter=None, tool='devbuddy', version=None, cache=None,
+                    files_label='Python files'):
+    """Print (or pass to the reporter) a stream of AnalysisResults, then a summary.
+
+    files_label names the kind of files analyzed in progress messages. The
+    cache, if given, is closed once the results are exhausted. Returns the
+    number of messages.
+    """
+    print(f"Analyzing {files_label} in {path} with {label}...")
+    call_hook(PRE_ANALYZE, path=path, label=label)
+    if reporter is not None:
+        reporter.start(tool, version)
+    files = messages = failed = 0
+    try:
+        for result in results:
+            if reporter is not None:
+                reporter.analysis_result(result, tool)
+            else:
+                _report_result(result)
+            files += 1
+            messages += len(result.messages)
+            failed += 1 if result.error else 0
+    finally:
+        if cache is not None:
+            cache.close()
+
+    call_hook(POST_ANALYZE, path=path, label=label, messages=messages)
+    if not files:
+        print(f"No {files_label} found in {path}.")
+        return 0
+    print(f"Analyzed {files} files: {messages} messages.")
+    if failed:
+        print(f"{failed} files could not be analyzed.")
+    if cache is not None:
+        print(f"Cache: {cache.hits} hits, {cache.misses} misses.")
+    return messages
+
+
+def analyze_duplicates(path, jobs=None, min_tokens=None, reporter=None):
+    """Report blocks of at least min_tokens tokens that are duplicated across the Python files under path.
+
+    Returns the number of duplicated blocks found.
+    """
+    from .duplicates import MIN_TOKENS, iter_duplicates
+    min_tokens = min_tokens or MIN_TOKENS
+    results = iter_duplicates(iter_files(path), jobs, min_tokens)
+    return report_analysis(path, f"the duplicate-code detector (at least {min_tokens} tokens)", results, reporter,
+                           'devbuddy', __version__)
+
+
+def analyze_secrets(path, jobs=None, reporter=None):
+    """Report credentials (API keys, tokens, private keys) committed to any file under path.
+
+    Returns the number of possible secrets found.
+    """
+    from .secretscan import iter_secrets
+    results = iter_secrets(iter_files(path, extensions=None), jobs)
+    return report_analysis(path, "the secret scanner", results, reporter, 'devbuddy', __version__,
+                           files_label='files')
+
+
+def analyze_imports(path, jobs=None, use_cache=True, reporter=None, export_path=None, top=None):
+    """Report import cycles among the Python modules under path and the modules with the highest fan-in.
+
+    Each file's imports are cached by content unless use_cache is False.
+    With export_path the import graph is also written there, as JSON for a
+    .json file and Graphviz DOT otherwise. Returns the number of imports
+    that close a cycle.
+    """
+    from .importgraph import TOP_FAN_IN, ImportCache, ImportGraph
+    graph = ImportGraph()
+    cache = ImportCache() if use_cache else None
+    results = graph.analyze(iter_files(path), jobs, cache)
+    count = report_analysis(path, "the import graph", results, reporter, 'devbuddy', __version__)
+    if cache is not None:
+        cache.close()
+    if not graph.modules:
+        return count
+    cycles = graph.cycles()
+    print(f"{len(graph.modules)} modules, {len(graph.edges)} imports, {len(cycles)} import cycles.")
+    fan_in = graph.fan_in(top or TOP_FAN_IN)
+    if fan_in:
+        print("Most imported modules (number of importing modules):")
+        for module, importers in fan_in:
+            print(f"  {importers:6d}  {module}")
+    if export_path:
+        graph.write(export_path)
+        print(f"Import graph written to {export_path}")
+    return count
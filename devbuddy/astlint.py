@@ -0,0 +1,576 @@
+"""
+DevBuddy's built-in Python analyzer.
+Each file is parsed once with the standard library's ast module and walked
+once; every enabled rule receives the node types it asks for during that
+single traversal, so adding rules does not add passes over the tree. Files
+are checked across a process pool without starting pylint.
+"""
+
+import ast
+import builtins
+import hashlib
+import re
+
+from .analyzer import AnalysisResult, Message, iter_cached, map_analysis
+from .parallel import default_jobs
+
+# Names that exist in every module without being bound.
+IMPLICIT_NAMES = frozenset(dir(builtins)) | frozenset([
+    '__file__', '__name__', '__doc__', '__spec__', '__loader__', '__package__', '__path__', '__builtins__',
+    '__annotations__', '__cached__', '__dict__', '__module__', '__qualname__', '__class__',
+])
+# Builtins that site.py adds for the interactive prompt; rebinding them is harmless.
+_SITE_BUILTINS = frozenset(['copyright', 'credits', 'license', 'exit', 'quit', 'help'])
+SHADOWABLE_BUILTINS = frozenset(n for n in dir(builtins) if not n.startswith('_')) - _SITE_BUILTINS
+
+MAX_FUNCTION_LINES = 80
+
+_NOQA_RE = re.compile(r'#\s*noqa(?::\s*([A-Z]+\d+(?:\s*,\s*[A-Z]+\d+)*))?', re.IGNORECASE)
+_COMPREHENSIONS = ('ListComp', 'SetComp', 'GeneratorExp', 'DictComp')
+
+# Rule classes by code. Add rules with @register_rule; they are picked up by
+# every later run, including ones in worker processes started by fork.
+RULES = {}
+
+
+def register_rule(cls):
+    """Class decorator that adds a Rule subclass to the registry."""
+    RULES[cls.code] = cls
+    return cls
+
+
+class Rule:
+    """Base class for built-in analyzer rules.
+
+    Subclasses set code, symbol and severity and define any of:
+
+    - visit_<NodeType>(node, ctx), called for every node of that type
+    - bind(binding, ctx), called for every name binding
+    - end_module(ctx), called once the whole module has been walked and
+      names have been resolved
+
+    Findings are reported with ctx.report(self, node, text). A new rule
+    instance is created for each file.
+    """
+
+    code = None
+    symbol = None
+    severity = 'warning'
+    description = ''
+
+
+class Binding:
+    """A name bound in a scope by an assignment, definition, import or argument."""
+
+    __slots__ = ('name', 'node', 'kind', 'scope', 'used', 'full_name', 'reexport')
+
+    def __init__(self, name, node, kind, scope, full_name=None, reexport=False):
+        self.name = name
+        self.node = node
+        self.kind = kind
+        self.scope = scope
+        self.used = False
+        self.full_name = full_name or name
+        self.reexport = reexport
+
+
+class Scope:
+    """A module, class, function or comprehension namespace."""
+
+    __slots__ = ('kind', 'node', 'parent', 'bindings', 'declared_global', 'declared_nonlocal', 'star_import')
+
+    def __init__(self, kind, node, parent):
+        self.kind = kind
+        self.node = node
+        self.parent = parent
+        self.bindings = {}
+        self.declared_global = set()
+        self.declared_nonlocal = set()
+        self.star_import = False
+
+    def module(self):
+        scope = self
+        while scope.parent is not None:
+            scope = scope.parent
+        return scope
+
+
+class ModuleContext:
+    """Per-file state shared by the walker and the rules."""
+
+    def __init__(self, path, source, tree):
+        self.path = path
+        self.source = source
+        self.tree = tree
+        self.messages = []
+        self.scope = None
+        self.scopes = []
+        self.uses = []
+        # (name, node) pairs that resolved to no binding; filled in before end_module.
+        self.unresolved = []
+
+    def report(self, rule, node, text):
+        self.messages.append(Message(self.path, getattr(node, 'lineno', 1), getattr(node, 'col_offset', 0),
+                                     rule.code, rule.symbol, text, rule.severity))
+
+
+class _Walker:
+    """Walk a module once, tracking scopes and dispatching nodes to rules."""
+
+    def __init__(self, ctx, rules):
+        self.ctx = ctx
+        self.table = {}
+        self.dispatch = {}
+        self.bind_handlers = []
+        self.end_handlers = []
+        for rule in rules:
+            for attr in dir(rule):
+                if attr.startswith('visit_'):
+                    self.dispatch.setdefault(attr[6:], []).append(getattr(rule, attr))
+            if hasattr(rule, 'bind'):
+                self.bind_handlers.append(rule.bind)
+            if hasattr(rule, 'end_module'):
+                self.end_handlers.append(rule.end_module)
+
+    def run(self):
+        self.push('module', self.ctx.tree)
+        self.walk_children(self.ctx.tree)
+        self.pop()
+        self.resolve_uses()
+        for handler in self.end_handlers:
+            handler(self.ctx)
+
+    # Scope handling
+
+    def push(self, kind, node):
+        scope = Scope(kind, node, self.ctx.scope)
+        self.ctx.scopes.append(scope)
+        self.ctx.scope = scope
+
+    def pop(self):
+        self.ctx.scope = self.ctx.scope.parent
+
+    def bind(self, name, node, kind, scope=None, **kwargs):
+        scope = scope or self.ctx.scope
+        if name in scope.declared_global:
+            scope = scope.module()
+        elif name in scope.declared_nonlocal:
+            return
+        binding = Binding(name, node, kind, scope, **kwargs)
+        scope.bindings.setdefault(name, []).append(binding)
+        for handler in self.bind_handlers:
+            handler(binding, self.ctx)
+
+    def use(self, name, node):
+        self.ctx.uses.append((self.ctx.scope, name, node))
+
+    def resolve_uses(self):
+        """Mark the bindings every name refers to as used, or record it as unresolved.
+
+        Names are resolved after the whole module was walked, so functions
+        may refer to globals defined further down. Class scopes are only
+        visible to code directly inside them.
+        """
+        for scope, name, node in self.ctx.uses:
+            current = scope.module() if name in scope.declared_global else scope
+            found = star = False
+            first = True
+            while current is not None:
+                star = star or current.star_import
+                if (first or current.kind != 'class') and name in current.bindings:
+                    for binding in current.bindings[name]:
+                        binding.used = True
+                    found = True
+                    break
+                first = False
+                current = current.parent
+            if not found and not star and name not in IMPLICIT_NAMES:
+                self.ctx.unresolved.append((name, node))
+
+    # Traversal
+
+    def walk(self, node):
+        cls = node.__class__
+        entry = self.table.get(cls)
+        if entry is None:
+            entry = self.table[cls] = self.lookup(cls.__name__)
+        handlers, method = entry
+        for handler in handlers:
+            handler(node, self.ctx)
+        method(node)
+
+    def lookup(self, name):
+        """Return the rule handlers and the walk method for a node type."""
+        method = getattr(self, 'walk_' + name, None)
+        if method is None:
+            method = self.walk_comprehension if name in _COMPREHENSIONS else self.walk_children
+        return tuple(self.dispatch.get(name, ())), method
+
+    def walk_children(self, node):
+        # Like ast.iter_child_nodes, but skipping the Load/Store context markers.
+        for field in node._fields:
+            if field == 'ctx':
+                continue
+            value = getattr(node, field, None)
+            if isinstance(value, list):
+                for item in value:
+                    if isinstance(item, ast.AST):
+                        self.walk(item)
+            elif isinstance(value, ast.AST):
+                self.walk(value)
+
+    def walk_annotation(self, node):
+        if node is None:
+            return
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            # A string annotation refers to names just like an expression would.
+            try:
+                parsed = ast.parse(node.value, mode='eval')
+            except SyntaxError:
+                return
+            for child in ast.walk(parsed):
+                ast.copy_location(child, node)
+            self.walk(parsed.body)
+        else:
+            self.walk(node)
+
+    @staticmethod
+    def all_args(args):
+        result = args.posonlyargs + args.args + args.kwonlyargs
+        for arg in (args.vararg, args.kwarg):
+            if arg is not None:
+                result.append(arg)
+        return result
+
+    def push_type_params(self, node):
+        """Open the scope holding a generic definition's type parameters, if it has any."""
+        params = getattr(node, 'type_params', None)
+        if not params:
+            return False
+        self.push('type-parameters', node)
+        for param in params:
+            self.bind(param.name, param, 'type-parameter')
+            for child in ast.iter_child_nodes(param):
+                self.walk(child)
+        return True
+
+    def walk_FunctionDef(self, node):
+        for child in node.decorator_list + node.args.defaults + [d for d in node.args.kw_defaults if d is not None]:
+            self.walk(child)
+        self.bind(node.name, node, 'function')
+        generic = self.push_type_params(node)
+        for arg in self.all_args(node.args):
+            self.walk_annotation(arg.annotation)
+        self.walk_annotation(node.returns)
+        self.push('function', node)
+        for arg in self.all_args(node.args):
+            self.bind(arg.arg, arg, 'argument')
+        for statement in node.body:
+            self.walk(statement)
+        self.pop()
+        if generic:
+            self.pop()
+
+    walk_AsyncFunctionDef = walk_FunctionDef
+
+    def walk_Lambda(self, node):
+        for default in node.args.defaults + [d for d in node.args.kw_defaults if d is not None]:
+            self.walk(default)
+        self.push('function', node)
+        for arg in self.all_args(node.args):
+            self.bind(arg.arg, arg, 'argument')
+        self.walk(node.body)
+        self.pop()
+
+    def walk_ClassDef(self, node):
+        for decorator in node.decorator_list:
+            self.walk(decorator)
+        self.bind(node.name, node, 'class')
+        generic = self.push_type_params(node)
+        for child in node.bases + node.keywords:
+            self.walk(child)
+        self.push('class', node)
+        for statement in node.body:
+            self.walk(statement)
+        self.pop()
+        if generic:
+            self.pop()
+
+    def walk_comprehension(self, node):
+        # The first iterable is evaluated in the enclosing scope.
+        self.walk(node.generators[0].iter)
+        self.push('comprehension', node)
+        for i, generator in enumerate(node.generators):
+            if i:
+                self.walk(generator.iter)
+            self.walk(generator.target)
+            for condition in generator.ifs:
+                self.walk(condition)
+        if isinstance(node, ast.DictComp):
+            self.walk(node.key)
+            self.walk(node.value)
+        else:
+            self.walk(node.elt)
+        self.pop()
+
+    def walk_Name(self, node):
+        if isinstance(node.ctx, ast.Store):
+            self.bind(node.id, node, 'assignment')
+        else:
+            self.use(node.id, node)
+
+    def walk_NamedExpr(self, node):
+        self.walk(node.value)
+        # Assignment expressions bind in the nearest enclosing non-comprehension scope.
+        scope = self.ctx.scope
+        while scope.kind == 'comprehension':
+            scope = scope.parent
+        self.bind(node.target.id, node.target, 'assignment', scope=scope)
+
+    def walk_AnnAssign(self, node):
+        self.walk_annotation(node.annotation)
+        if node.value is not None:
+            self.walk(node.value)
+        self.walk(node.target)
+
+    def walk_Global(self, node):
+        self.ctx.scope.declared_global.update(node.names)
+        module = self.ctx.scope.module()
+        for name in node.names:
+            module.bindings.setdefault(name, [])
+
+    def walk_Nonlocal(self, node):
+        self.ctx.scope.declared_nonlocal.update(node.names)
+
+    def walk_Import(self, node):
+        for alias in node.names:
+            name = alias.asname or alias.name.split('.')[0]
+            full_name = f"{alias.name} as {alias.asname}" if alias.asname else alias.name
+            self.bind(name, node, 'import', full_name=full_name, reexport=alias.asname == alias.name)
+
+    def walk_ImportFrom(self, node):
+        if node.module == '__future__':
+            return
+        module = '.' * node.level + (node.module or '')
+        for alias in node.names:
+            if alias.name == '*':
+                self.ctx.scope.star_import = True
+                continue
+            full_name = f"{module}.{alias.name}" if node.module else module + alias.name
+            if alias.asname:
+                full_name += f" as {alias.asname}"
+            self.bind(alias.asname or alias.name, node, 'import', full_name=full_name,
+                      reexport=alias.asname == alias.name)
+
+    def walk_ExceptHandler(self, node):
+        if node.type is not None:
+            self.walk(node.type)
+        if node.name:
+            self.bind(node.name, node, 'exception')
+        for statement in node.body:
+            self.walk(statement)
+
+    def walk_MatchAs(self, node):
+        if node.pattern is not None:
+            self.walk(node.pattern)
+        if node.name:
+            self.bind(node.name, node, 'assignment')
+
+    def walk_MatchStar(self, node):
+        if node.name:
+            self.bind(node.name, node, 'assignment')
+
+    def walk_MatchMapping(self, node):
+        self.walk_children(node)
+        if node.rest:
+            self.bind(node.rest, node, 'assignment')
+
+
+@register_rule
+class UnusedImport(Rule):
+    code = 'DB001'
+    symbol = 'unused-import'
+    description = 'An imported name is never used.'
+
+    def __init__(self):
+        self.exported = set()
+
+    def visit_Assign(self, node, ctx):
+        if ctx.scope.kind == 'module' and any(isinstance(t, ast.Name) and t.id == '__all__' for t in node.targets):
+            self._export(node.value)
+
+    def visit_AugAssign(self, node, ctx):
+        if ctx.scope.kind == 'module' and isinstance(node.target, ast.Name) and node.target.id == '__all__':
+            self._export(node.value)
+
+    def _export(self, value):
+        if isinstance(value, (ast.List, ast.Tuple)):
+            self.exported.update(e.value for e in value.elts if isinstance(e, ast.Constant))
+
+    def end_module(self, ctx):
+        # Imports in a package's __init__ are usually there to be re-exported.
+        if ctx.path.replace('\\', '/').endswith('/__init__.py') or ctx.path == '__init__.py':
+            return
+        for scope in ctx.scopes:
+            for name, bindings in scope.bindings.items():
+                if scope.kind == 'module' and name in self.exported:
+                    continue
+                for binding in bindings:
+                    if binding.kind == 'import' and not binding.used and not binding.reexport:
+                        ctx.report(self, binding.node, f"'{binding.full_name}' imported but unused")
+
+
+@register_rule
+class UndefinedName(Rule):
+    code = 'DB002'
+    symbol = 'undefined-name'
+    severity = 'error'
+    description = 'A name is used but never defined.'
+
+    def end_module(self, ctx):
+        for name, node in ctx.unresolved:
+            ctx.report(self, node, f"Undefined name '{name}'")
+
+
+@register_rule
+class BareExcept(Rule):
+    code = 'DB003'
+    symbol = 'bare-except'
+    description = 'An except clause catches everything, including KeyboardInterrupt and SystemExit.'
+
+    def visit_ExceptHandler(self, node, ctx):
+        if node.type is None:
+            ctx.report(self, node, "No exception type specified; catch Exception or something narrower")
+
+
+@register_rule
+class MutableDefault(Rule):
+    code = 'DB004'
+    symbol = 'mutable-default'
+    description = 'A default argument value is mutable and shared between calls.'
+
+    MUTABLE_NODES = (ast.List, ast.Dict, ast.Set, ast.ListComp, ast.DictComp, ast.SetComp)
+    MUTABLE_CALLS = frozenset(['list', 'dict', 'set', 'bytearray', 'defaultdict', 'OrderedDict', 'Counter', 'deque'])
+
+    def is_mutable(self, node):
+        if isinstance(node, self.MUTABLE_NODES):
+            return True
+        if isinstance(node, ast.Call):
+            func = node.func
+            name = func.id if isinstance(func, ast.Name) else func.attr if isinstance(func, ast.Attribute) else None
+            return name in self.MUTABLE_CALLS
+        return False
+
+    def visit_FunctionDef(self, node, ctx):
+        args = node.args
+        positional = args.posonlyargs + args.args
+        pairs = list(zip(positional[len(positional) - len(args.defaults):], args.defaults))
+        pairs += [(arg, default) for arg, default in zip(args.kwonlyargs, args.kw_defaults) if default is not None]
+        for arg, default in pairs:
+            if self.is_mutable(default):
+                ctx.report(self, default, f"Mutable default value for argument '{arg.arg}'")
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+    visit_Lambda = visit_FunctionDef
+
+
+@register_rule
+class ShadowedBuiltin(Rule):
+    code = 'DB005'
+    symbol = 'redefined-builtin'
+    description = 'A name shadows a Python builtin.'
+
+    def __init__(self):
+        self.seen = set()
+
+    def bind(self, binding, ctx):
+        # Class attributes (e.g. an ORM field called `id`) do not shadow anything.
+        if binding.name not in SHADOWABLE_BUILTINS or binding.scope.kind == 'class':
+            return
+        key = (id(binding.scope), binding.name)
+        if key not in self.seen:
+            self.seen.add(key)
+            ctx.report(self, binding.node, f"Redefining built-in '{binding.name}'")
+
+
+@register_rule
+class LongFunction(Rule):
+    code = 'DB006'
+    symbol = 'function-too-long'
+    severity = 'convention'
+    description = f'A function is longer than {MAX_FUNCTION_LINES} lines.'
+
+    max_lines = MAX_FUNCTION_LINES
+
+    def visit_FunctionDef(self, node, ctx):
+        length = (node.end_lineno or node.lineno) - node.lineno + 1
+        if length > self.max_lines:
+            ctx.report(self, node, f"Function '{node.name}' is {length} lines long (max {self.max_lines})")
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+
+def select_rules(select=None, ignore=None):
+    """Return the codes of the enabled rules, optionally filtered."""
+    codes = [code for code in RULES if (not select or code in select) and code not in (ignore or ())]
+    return sorted(codes)
+
+
+def ruleset_version(codes):
+    """Return a string that changes whenever the rules or their implementation change."""
+    digest = hashlib.blake2b(digest_size=8)
+    for code in codes:
+        cls = RULES[code]
+        digest.update(f"{code}:{cls.__module__}.{cls.__qualname__}".encode())
+    with open(__file__, 'rb') as f:
+        digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _suppressed(message, lines):
+    """Return True if the message's line carries a matching `# noqa` comment."""
+    if not 0 < message.line <= len(lines):
+        return False
+    match = _NOQA_RE.search(lines[message.line - 1])
+    if match is None:
+        return False
+    codes = match.group(1)
+    return codes is None or message.code in {c.strip().upper() for c in codes.split(',')}
+
+
+def check_source(source, path='<string>', codes=None):
+    """Run the built-in rules over source and return a list of Messages."""
+    try:
+        tree = ast.parse(source, filename=path)
+    except SyntaxError as e:
+        return [Message(path, e.lineno or 1, (e.offset or 1) - 1, 'DB000', 'syntax-error', e.msg, 'error')]
+    ctx = ModuleContext(path, source, tree)
+    rules = [RULES[code]() for code in (codes if codes is not None else select_rules())]
+    _Walker(ctx, rules).run()
+    messages = ctx.messages
+    if messages and 'noqa' in source.lower():
+        lines = source.splitlines()
+        messages = [m for m in messages if not _suppressed(m, lines)]
+    return sorted(messages, key=lambda m: (m.line, m.column, m.code))
+
+
+def check_file(path, codes=None):
+    """Check a single file, returning an AnalysisResult."""
+    try:
+        with open(path, 'rb') as f:
+            source = f.read()
+        return AnalysisResult(path, check_source(source.decode('utf-8'), path, codes), None)
+    except (OSError, UnicodeDecodeError, ValueError, RecursionError) as e:
+        return AnalysisResult(path, [], str(e) or e.__class__.__name__)
+
+
+def _check_chunk(paths, codes):
+    """Check a chunk of files. Runs inside pool workers."""
+    return [check_file(p, codes) for p in paths]
+
+
+def iter_builtin(paths, jobs=None, cache=None, codes=None):
+    """Check paths with the built-in rules across `jobs` processes, yielding AnalysisResults."""
+    jobs = jobs or default_jobs()
+    codes = codes if codes is not None else select_rules()
+    return iter_cached(paths, cache, lambda misses: map_analysis(_check_chunk, misses, jobs, codes))
@@ -0,0 +1,153 @@
+"""
+Persistent on-disk caches for DevBuddy.
+Results are stored in SQLite databases under the user cache directory and
+keyed by file content hashes, so unchanged files can be skipped between runs.
+"""
+
+import hashlib
+import os
+import platform
+import sqlite3
+
+CACHE_DIR_ENV = 'DEVBUDDY_CACHE_DIR'
+
+
+def user_cache_dir():
+    """Return the directory DevBuddy stores its caches in."""
+    if os.environ.get(CACHE_DIR_ENV):
+        return os.environ[CACHE_DIR_ENV]
+    system = platform.system()
+    if system == 'Windows':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser(os.path.join('~', 'AppData', 'Local'))
+        return os.path.join(base, 'devbuddy', 'Cache')
+    if system == 'Darwin':
+        return os.path.expanduser(os.path.join('~', 'Library', 'Caches', 'devbuddy'))
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser(os.path.join('~', '.cache'))
+    return os.path.join(base, 'devbuddy')
+
+
+def hash_bytes(data):
+    """Return a short hex digest of data."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def hash_file(path):
+    """Return the content digest of the file at path."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ConfigHasher:
+    """Hash the configuration files that apply to a directory.
+
+    The digest of a directory covers every matching config file in it and in
+    all of its parents, so editing e.g. a pyproject.toml anywhere above a
+    file changes that file's digest.
+    """
+
+    def __init__(self, filenames):
+        self.filenames = tuple(filenames)
+        self._digests = {}
+
+    def digest(self, directory):
+        directory = os.path.abspath(directory)
+        if directory in self._digests:
+            return self._digests[directory]
+        parent = os.path.dirname(directory)
+        digest = hashlib.blake2b(digest_size=16)
+        if parent != directory:
+            digest.update(self.digest(parent).encode())
+        for name in self.filenames:
+            config_path = os.path.join(directory, name)
+            try:
+                with open(config_path, 'rb') as f:
+                    content = f.read()
+            except OSError:
+                continue
+            digest.update(name.encode() + b'\0' + content)
+        self._digests[directory] = digest.hexdigest()
+        return self._digests[directory]
+
+
+class ResultCache:
+    """A persistent key/value cache with a stat-based file digest index.
+
+    File digests are remembered by (mtime, size), so files that did not change
+    since the last run are not read again just to be hashed.
+    """
+
+    def __init__(self, namespace, cache_dir=None):
+        cache_dir = cache_dir or user_cache_dir()
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, f"{namespace}.sqlite")
+        self.hits = 0
+        self.misses = 0
+        self._conn = sqlite3.connect(self.path, timeout=30)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS files "
+                           "(path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, digest TEXT)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value TEXT)")
+
+    def file_digest(self, path):
+        """Return the content digest of path, hashing it only if it changed on disk."""
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        row = self._conn.execute("SELECT mtime_ns, size, digest FROM files WHERE path = ?", (path,)).fetchone()
+        if row and row[0] == st.st_mtime_ns and row[1] == st.st_size:
+            return row[2]
+        digest = hash_file(path)
+        self._remember_digest(path, st, digest)
+        return digest
+
+    def update_file(self, path, digest=None):
+        """Record the current on-disk state of path, e.g. after rewriting it."""
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        self._remember_digest(path, st, digest or hash_file(path))
+
+    def _remember_digest(self, path, st, digest):
+        self._conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                           (path, st.st_mtime_ns, st.st_size, digest))
+
+    def get(self, key):
+        """Return the value stored for key, or None. Counts hits and misses."""
+        row = self._conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+
+    def set(self, key, value):
+        self._conn.execute("INSERT OR REPLACE INTO entries VALUES (?, ?)", (key, value))
+
+    def delete(self, key):
+        self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def items(self, prefix=''):
+        """Return [(key, value)] for the entries whose key starts with prefix, in key order."""
+        return self._conn.execute("SELECT key, value FROM entries WHERE substr(key, 1, ?) = ? ORDER BY key",
+                                  (len(prefix), prefix)).fetchall()
+
+    def clear(self):
+        self._conn.execute("DELETE FROM files")
+        self._conn.execute("DELETE FROM entries")
+
+    def commit(self):
+        """Write pending changes to disk."""
+        self._conn.commit()
+
+    def close(self):
+        """Write pending changes to disk and close the database."""
+        try:
+            self._conn.commit()
+        finally:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,84 @@
+"""
+DevBuddy's subcommands, one module per group of related commands.
+The CLI registers them with a LazyGroup by name and short help only, so a
+command's module (and everything it imports) is loaded only when that
+command runs; `dbuddy --help` and quick commands load none of them.
+"""
+
+import importlib
+
+import click
+
+
+def import_command(target):
+    """Return a lazy command loader for target, a 'module:attribute' naming a click command."""
+    module, _, attribute = target.partition(':')
+
+    def load(group, name):
+        group.add_command(getattr(importlib.import_module(module), attribute), name)
+    return load
+
+
+def short_help(text, limit=45):
+    """Shorten a help text to its first sentence, cut at a word boundary to fit in limit characters.
+
+    Follows click's rule for the short help of commands.
+    """
+    words = []
+    for word in text.split('\n\n', 1)[0].split():
+        words.append(word)
+        if word.endswith('.'):
+            break
+    if len(' '.join(words)) <= limit:
+        return ' '.join(words)
+    while words and len(' '.join(words)) + 3 > limit:
+        words.pop()
+    return ' '.join(words) + '...'
+
+
+class LazyGroup(click.Group):
+    """A click group whose commands can be registered before they are imported.
+
+    A lazy command is a name, a short help and a loader: a function called
+    with (group, name) the first time the command is looked up, which must
+    register it on the group (it may register others too, as plugins do).
+    lazy_commands maps names to ('module:attribute', short help).
+    """
+
+    def __init__(self, *args, lazy_commands=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_commands = {}
+        for name, (target, short_help) in (lazy_commands or {}).items():
+            self.add_lazy_command(name, import_command(target), short_help)
+
+    def add_lazy_command(self, name, loader, short_help=''):
+        self.lazy_commands[name] = (loader, short_help)
+
+    def list_commands(self, ctx):
+        return sorted(set(self.commands) | set(self.lazy_commands))
+
+    def get_command(self, ctx, cmd_name):
+        if cmd_name not in self.commands and cmd_name in self.lazy_commands:
+            loader, _ = self.lazy_commands[cmd_name]
+            loader(self, cmd_name)
+            for name in [n for n in self.lazy_commands if n in self.commands]:
+                del self.lazy_commands[name]
+            if cmd_name not in self.commands:
+                raise click.ClickException(f"Could not load the {cmd_name} command.")
+        return super().get_command(ctx, cmd_name)
+
+    def format_commands(self, ctx, formatter):
+        """List commands without loading them: lazy ones show their registered short help."""
+        commands = []
+        for name in self.list_commands(ctx):
+            command = self.commands.get(name)
+            if command is None or not command.hidden:
+                commands.append((name, command))
+        if not commands:
+            return
+        limit = formatter.width - 6 - max(len(name) for name, _ in commands)
+        rows = [(name, command.get_short_help_str(limit) if command is not None
+                 else short_help(self.lazy_commands[name][1], limit))
+                for name, command in commands]
+        with formatter.section('Commands'):
+            formatter.write_dl(rows)
@@ -0,0 +1,92 @@
+"""
+The analyze and metrics commands.
+"""
+
+import click
+import importlib
+import json
+import os
+import sys
+import subprocess
+
+from ..analyzer import ENGINES, analyze_code, analyze_duplicates, analyze_imports, analyze_secrets, has_pylint
+from ..duplicates import MIN_TOKENS
+from ..metrics import TOP_FUNCTIONS, collect_metrics, format_table
+from ..reporters import OUTPUT_FORMATS, reporting
+from ..walker import iter_files
+
+@click.command()
+@click.argument('path', default='.', type=click.Path(exists=True))
+@click.option('--jobs', '-j', type=click.IntRange(min=1), help='Number of parallel pylint processes (default: CPU count)')
+@click.option('--no-cache', is_flag=True, help='Analyze every file, even those with cached results')
+@click.option('--engine', type=click.Choice(ENGINES), default='pylint', show_default=True,
+              help="Analyzer to use; 'builtin' runs DevBuddy's own AST checks without pylint")
+@click.option('--output-format', type=click.Choice(OUTPUT_FORMATS), default='text', show_default=True,
+              help='Stream one JSON record per finding (jsonl) or a SARIF log to stdout; other output goes to stderr')
+@click.option('--duplicates', is_flag=True, help='Report duplicated code blocks across all files instead of linting')
+@click.option('--min-tokens', default=MIN_TOKENS, type=click.IntRange(min=2), show_default=True,
+              help='With --duplicates, the smallest duplicated block to report, in tokens')
+@click.option('--secrets', is_flag=True,
+              help='Scan every file for committed credentials instead of linting; exits with status 1 if any are found')
+@click.option('--imports', is_flag=True,
+              help='Build the import graph instead of linting; report import cycles and the most imported modules')
+@click.option('--export-graph', type=click.Path(dir_okay=False, writable=True),
+              help='With --imports, write the import graph to this file (.json for JSON, otherwise Graphviz DOT)')
+def analyze(path, jobs, no_cache, engine, output_format, duplicates, min_tokens, secrets, imports, export_graph):
+    """Analyze code quality and suggest improvements.
+
+    pylint runs in shards with per-file caching, so its cross-file checks
+    duplicate-code (R0801) and cyclic-import (R0401) are disabled; use
+    --duplicates and --imports to find duplicated code and import cycles.
+    """
+    if not os.path.exists(path):
+        click.echo(f"Error: Path {path} does not exist.")
+        return
+    if secrets + duplicates + imports > 1:
+        raise click.UsageError("--secrets, --duplicates and --imports cannot be combined; run them one at a time")
+
+    if secrets:
+        with reporting(output_format) as reporter:
+            found = analyze_secrets(path, jobs=jobs, reporter=reporter)
+        sys.exit(1 if found else 0)
+
+    # Check for Python files, skipping ignored and vendored directories
+    if next(iter_files(path), None) is not None:
+        if duplicates:
+            with reporting(output_format) as reporter:
+                analyze_duplicates(path, jobs=jobs, min_tokens=min_tokens, reporter=reporter)
+            return
+        if imports:
+            with reporting(output_format) as reporter:
+                analyze_imports(path, jobs=jobs, use_cache=not no_cache, reporter=reporter, export_path=export_graph)
+            return
+        if engine == 'pylint' and not has_pylint():
+            click.echo("Installing pylint for code analysis...", err=output_format != 'text')
+            subprocess.run([sys.executable, "-m", "pip", "install", "pylint"], check=True,
+                           stdout=sys.stderr if output_format != 'text' else None)
+            importlib.invalidate_caches()
+            
+        with reporting(output_format) as reporter:
+            analyze_code(path, jobs=jobs, use_cache=not no_cache, engine=engine, reporter=reporter)
+    else:
+        with reporting(output_format):
+            click.echo(f"No Python files found in {path}. Only Python analysis is currently supported.")
+
+@click.command()
+@click.argument('path', default='.', type=click.Path(exists=True))
+@click.option('--jobs', '-j', type=click.IntRange(min=1), help='Number of worker processes (default: CPU count)')
+@click.option('--depth', default=1, type=click.IntRange(min=0), show_default=True,
+              help='Directory levels below PATH to break the counts down by')
+@click.option('--top', default=TOP_FUNCTIONS, type=click.IntRange(min=0), show_default=True,
+              help='Number of most complex Python functions to list')
+@click.option('--output-format', type=click.Choice(['table', 'json']), default='table', show_default=True,
+              help='Print tables or a JSON document')
+def metrics(path, jobs, depth, top, output_format):
+    """Count code, comment and blank lines per language and directory, with Python complexity."""
+    result = collect_metrics(path, jobs=jobs, top=top)
+    if output_format == 'json':
+        click.echo(json.dumps(result.to_dict(depth), indent=2))
+    elif not result.counters:
+        click.echo(f"No source files found in {path}.")
+    else:
+        click.echo(format_table(result, depth))
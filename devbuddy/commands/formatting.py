@@ -0,0 +1,108 @@
+"""
+The format and serve commands.
+"""
+
+import click
+import os
+import sys
+
+from .. import server
+from ..engines import SUPPORTED_TOOLS, parse_tools
+from ..languages import LANGUAGES, PYTHON, parse_languages
+from ..reporters import OUTPUT_FORMATS, reporting
+
+def validate_tools(ctx, param, value):
+    """Check every tool in a comma-separated --tool value."""
+    tools = parse_tools(value)
+    unknown = [t for t in tools if t not in SUPPORTED_TOOLS]
+    if not tools or unknown:
+        raise click.BadParameter(f"Unsupported tool(s): {', '.join(unknown) or value}. "
+                                 f"Choose from: {', '.join(SUPPORTED_TOOLS)}")
+    return ','.join(tools)
+
+def validate_languages(ctx, param, value):
+    """Check every language in a comma-separated --languages value."""
+    languages = parse_languages(value)
+    unknown = [l for l in languages if l not in LANGUAGES]
+    if not languages or unknown:
+        raise click.BadParameter(f"Unsupported language(s): {', '.join(unknown) or value}. "
+                                 f"Choose from: {', '.join(LANGUAGES)} or all")
+    return languages
+
+@click.command()
+@click.argument('path', default='.', type=click.Path(exists=True))
+@click.option('--tool', default='black', callback=validate_tools,
+              help='Formatting tool to use: black, autopep8, yapf or isort. Chain tools with commas, e.g. isort,black')
+@click.option('--languages', default=PYTHON, callback=validate_languages,
+              help=f"Comma-separated languages to format: {', '.join(LANGUAGES)} or all (default: python)")
+@click.option('--git', is_flag=True, help='Format only git-modified files')
+@click.option('--changed-lines', is_flag=True, help='With --git, format only the changed line ranges')
+@click.option('--base', default='HEAD', help='Git revision to compare against with --git (default: HEAD)')
+@click.option('--recursive', is_flag=True, help='Format files in subdirectories')
+@click.option('--subprocess', 'use_subprocess', is_flag=True, help='Run the tool as a subprocess instead of in-process')
+@click.option('--no-cache', is_flag=True, help='Format every file, even those cached as already formatted')
+@click.option('--jobs', '-j', type=click.IntRange(min=1), help='Number of worker processes (default: CPU count)')
+@click.option('--check', is_flag=True, help="Don't write files; exit with status 1 if any file would be reformatted")
+@click.option('--diff', is_flag=True, help='Print a diff for each file that would change (implies --check)')
+@click.option('--watch', is_flag=True, help='Keep running and reformat files as they are saved')
+@click.option('--debounce', default=50, type=click.IntRange(min=0), show_default=True,
+              help='With --watch, milliseconds to wait for a burst of changes to settle')
+@click.option('--no-server', is_flag=True, help="Format in this process even if a 'dbuddy serve' server is running")
+@click.option('--output-format', type=click.Choice(OUTPUT_FORMATS), default='text', show_default=True,
+              help='Stream one JSON record per file (jsonl) or a SARIF log to stdout; other output goes to stderr')
+def format(path, tool, languages, git, changed_lines, base, recursive, use_subprocess, no_cache, jobs, check, diff,
+           watch, debounce, no_server, output_format):
+    """Format code in the given path."""
+    if changed_lines and not git:
+        raise click.UsageError("--changed-lines can only be used together with --git")
+    check = check or diff
+    if watch:
+        if git or check or use_subprocess or languages != [PYTHON] or output_format != 'text':
+            raise click.UsageError("--watch cannot be combined with --git, --check, --diff, --subprocess, "
+                                   "--output-format or languages other than python")
+        from ..formatter import watch_code
+        watch_code(path, tool=tool, recursive=recursive, use_cache=not no_cache, jobs=jobs, debounce=debounce / 1000)
+        return
+    if not check and output_format == 'text':
+        if PYTHON in languages:
+            click.echo(f"Formatting code in: {path} with {tool}")
+        else:
+            click.echo(f"Formatting {', '.join(languages)} code in: {path}")
+    if not (use_subprocess or no_server):
+        status = server.request_format(dict(path=os.path.abspath(path), tool=tool, use_git=git, recursive=recursive,
+                                     use_cache=not no_cache, jobs=jobs, changed_lines=changed_lines, base=base,
+                                     check=check, diff=diff, languages=languages, output_format=output_format))
+        if status is not None:
+            if status:
+                sys.exit(status)
+            return
+    # Imported here so runs answered by a 'dbuddy serve' server never load the formatters.
+    from ..formatter import format_code
+    with reporting(output_format) as reporter:
+        results = format_code(path, tool=tool, use_git=git, recursive=recursive, use_subprocess=use_subprocess,
+                              use_cache=not no_cache, jobs=jobs, changed_lines=changed_lines, base=base,
+                              check=check, diff=diff, languages=languages, reporter=reporter)
+    if check and any(r.changed or r.error for r in results):
+        sys.exit(1)
+
+@click.command()
+@click.option('--background', is_flag=True, help='Start the server as a detached background process')
+@click.option('--stop', is_flag=True, help='Stop a running server')
+@click.option('--idle-timeout', default=server.DEFAULT_IDLE_TIMEOUT, type=click.IntRange(min=0), show_default=True,
+              help='Shut down after this many seconds without requests (0 to never time out)')
+def serve(background, stop, idle_timeout):
+    """Keep formatters loaded in a server that 'dbuddy format' uses automatically."""
+    if stop:
+        if server.stop():
+            click.echo("DevBuddy server stopped.")
+        else:
+            click.echo("No DevBuddy server is running.")
+        return
+    if background:
+        if server.start_background(idle_timeout):
+            click.echo(f"DevBuddy server running on {server.socket_path()}")
+        else:
+            click.echo("Error: The DevBuddy server did not start.")
+            sys.exit(1)
+        return
+    server.serve(idle_timeout)
@@ -0,0 +1,53 @@
+"""
+The hooks command group: DevBuddy's git pre-commit hook.
+"""
+
+import click
+import subprocess
+import sys
+
+from ..githooks import format_staged, install_hook, scan_staged_secrets, uninstall_hook
+from .formatting import validate_tools
+
+@click.group()
+def hooks():
+    """Manage DevBuddy's git hooks."""
+    pass
+
+@hooks.command('install')
+@click.option('--tool', default='black', callback=validate_tools,
+              help='Formatting tool(s) the hook runs, e.g. black or isort,black')
+@click.option('--check', is_flag=True, help='Reject commits with unformatted files instead of formatting them')
+@click.option('--secrets', is_flag=True, help='Also reject commits whose staged files contain credentials')
+@click.option('--force', is_flag=True, help='Replace an existing pre-commit hook (it is kept as pre-commit.bak)')
+def hooks_install(tool, check, secrets, force):
+    """Install a pre-commit hook that formats staged Python files."""
+    try:
+        path = install_hook(tool=tool, check=check, secrets=secrets, force=force)
+    except subprocess.CalledProcessError:
+        click.echo("Error: Not inside a git repository.")
+        sys.exit(1)
+    except FileExistsError as e:
+        click.echo(f"Error: {e}. Use --force to replace it.")
+        sys.exit(1)
+    click.echo(f"Installed pre-commit hook at {path}")
+
+@hooks.command('uninstall')
+def hooks_uninstall():
+    """Remove the pre-commit hook installed by DevBuddy."""
+    try:
+        removed = uninstall_hook()
+    except subprocess.CalledProcessError:
+        click.echo("Error: Not inside a git repository.")
+        sys.exit(1)
+    click.echo("Removed the DevBuddy pre-commit hook." if removed else "No DevBuddy pre-commit hook is installed.")
+
+@hooks.command('run', hidden=True)
+@click.option('--tool', default='black', callback=validate_tools)
+@click.option('--check', is_flag=True)
+@click.option('--secrets', is_flag=True)
+def hooks_run(tool, check, secrets):
+    """Run the pre-commit hook (called by git)."""
+    if secrets and scan_staged_secrets():
+        sys.exit(1)
+    sys.exit(format_staged(tool=tool, check=check))
@@ -0,0 +1,127 @@
+"""
+The plugin command group: installing plugins and inspecting their hooks.
+"""
+
+import click
+import os
+import sys
+import shutil
+import subprocess
+
+from ..plugins import PLUGIN_DIR, discover_plugins
+from ..plugins.hooks import BUDGET_ACTIONS, HOOKS, PROBE_EVERY, read_stats, reset_stats, set_budget
+from ..plugins.installer import STORE_ENV, PluginInstallError, find_source, install_plugins, is_package
+
+@click.group()
+def plugin():
+    """Manage DevBuddy plugins."""
+    pass
+
+@plugin.command('list')
+def plugin_list():
+    """List all installed plugins."""
+    plugins = sorted(discover_plugins())
+    
+    if not plugins:
+        click.echo("No plugins installed.")
+        return
+        
+    click.echo("Installed plugins:")
+    for name in plugins:
+        click.echo(f"  - {name}")
+
+@plugin.command('install')
+@click.argument('plugin_names', nargs=-1, required=True)
+@click.option('--url', help='Git repository URL, local directory or archive to install a single plugin from')
+@click.option('--store', envvar=STORE_ENV, type=click.Path(exists=True, file_okay=False),
+              help=f'Directory mirroring plugins (and wheels of their dependencies) to install from first '
+                   f'[env: {STORE_ENV}]')
+@click.option('--offline', is_flag=True, help='Never use the network: install only from --store or a local --url')
+@click.option('--upgrade', '-U', is_flag=True, help='Update plugins that are already installed without asking')
+@click.option('--jobs', '-j', type=click.IntRange(min=1), help='Number of plugins fetched at once')
+def plugin_install(plugin_names, url, store, offline, upgrade, jobs):
+    """Install plugins from their Git repositories or a local plugin store."""
+    if url and len(plugin_names) > 1:
+        raise click.UsageError("--url can only be used when installing a single plugin.")
+    sources = []
+    for plugin_name in dict.fromkeys(plugin_names):
+        if os.sep in plugin_name or plugin_name.startswith(('.', '__')):
+            click.echo(f"Error: Invalid plugin name {plugin_name}.")
+            continue
+        if os.path.exists(os.path.join(PLUGIN_DIR, plugin_name)) and not upgrade \
+                and not click.confirm(f"Plugin {plugin_name} already exists. Update it?"):
+            continue
+        try:
+            sources.append(find_source(plugin_name, url, store, offline))
+        except PluginInstallError as e:
+            click.echo(f"Error: {e}")
+    if not sources:
+        return
+
+    click.echo(f"Installing {', '.join(s.name for s in sources)}...")
+    failed = 0
+    for plugin_name, error in install_plugins(sources, store, offline, jobs):
+        if error is None:
+            click.echo(f"Plugin {plugin_name} installed successfully!")
+        else:
+            failed += 1
+            click.echo(f"Error installing plugin {plugin_name}: {error}")
+    if failed:
+        sys.exit(1)
+
+@plugin.command('remove')
+@click.argument('plugin_name')
+def plugin_remove(plugin_name):
+    """Remove an installed plugin."""
+    target_dir = os.path.join(PLUGIN_DIR, plugin_name)
+    
+    if not plugin_name or plugin_name.startswith(('.', '__')) or os.sep in plugin_name \
+            or not os.path.isdir(target_dir):
+        click.echo(f"Plugin {plugin_name} is not installed.")
+        return
+    
+    try:
+        # Uninstall if it was installed as a package
+        if is_package(target_dir):
+            subprocess.run([sys.executable, '-m', 'pip', 'uninstall', '-y', plugin_name], check=True)
+            
+        # Remove the directory
+        shutil.rmtree(target_dir)
+        click.echo(f"Plugin {plugin_name} removed successfully!")
+    except Exception as e:
+        click.echo(f"Error: {e}")
+
+@plugin.command('stats')
+@click.option('--reset', is_flag=True, help='Forget the recorded timings')
+def plugin_stats(reset):
+    """Show how much time each plugin's hooks added to each command."""
+    if reset:
+        reset_stats()
+        click.echo("Plugin timings cleared.")
+        return
+    rows, budgets = read_stats()
+    if not rows:
+        click.echo("No plugin hooks have run yet.")
+    else:
+        click.echo(f"{'Command':<12} {'Plugin':<16} {'Hook':<18} {'Calls':>7} {'Total ms':>10} {'Mean ms':>9} "
+                   f"{'Max ms':>9}")
+        for command, plugin_name, hook, calls, total, longest in sorted(rows, key=lambda r: -r[4]):
+            click.echo(f"{command or '-':<12} {plugin_name:<16} {hook:<18} {calls:>7} {total * 1000:>10.1f} "
+                       f"{total / calls * 1000:>9.2f} {longest * 1000:>9.2f}")
+    for hook, (milliseconds, action) in sorted(budgets.items()):
+        click.echo(f"Budget: {hook} {milliseconds:g} ms per call ({action})")
+
+@plugin.command('budget')
+@click.argument('hook', type=click.Choice(list(HOOKS)))
+@click.argument('milliseconds', type=click.FloatRange(min=0), required=False)
+@click.option('--action', type=click.Choice(BUDGET_ACTIONS), default='warn', show_default=True,
+              help="Warn about plugins over budget, or skip them: for the rest of the run, and from the start "
+                   "of later runs while they were over budget when last timed (they are timed again every "
+                   f"{PROBE_EVERY} runs)")
+def plugin_budget(hook, milliseconds, action):
+    """Set the time budget of each call to HOOK, or remove it when MILLISECONDS is left out."""
+    set_budget(hook, milliseconds, action)
+    if milliseconds is None:
+        click.echo(f"Removed the budget of {hook}.")
+    else:
+        click.echo(f"Budget of {hook}: {milliseconds:g} ms per call ({action}).")
@@ -0,0 +1,73 @@
+"""
+Symbol index commands: index, find-symbol and refs.
+"""
+
+import click
+import linecache
+import os
+import sys
+
+from ..symbols import SYMBOL_KINDS, SymbolIndex, project_root
+
+def _open_symbol_index(path, update=True, jobs=None, rebuild=False, verbose=False):
+    """Open the symbol index of the project containing path, updating it unless told not to and it is not empty.
+
+    Updates only parse files whose mtime or size changed, so queries stay
+    cheap while answering from the current files.
+    """
+    index = SymbolIndex(project_root(path))
+    if rebuild:
+        index.clear()
+    if update or index.is_empty():
+        stats = index.update(jobs)
+        for error_path, error in stats.errors:
+            click.echo(f"Warning: Could not index {error_path}: {error}", err=True)
+        if verbose:
+            click.echo(f"Indexed {stats.files} files in {index.root}: {stats.parsed} parsed, "
+                       f"{stats.removed} removed.", err=True)
+    return index
+
+@click.command('index')
+@click.argument('path', default='.', type=click.Path(exists=True))
+@click.option('--jobs', '-j', type=click.IntRange(min=1), help='Number of worker processes (default: CPU count)')
+@click.option('--rebuild', is_flag=True, help='Discard the existing index and parse every file again')
+def index_symbols(path, jobs, rebuild):
+    """Build or update the symbol index used by find-symbol and refs."""
+    with _open_symbol_index(path, True, jobs, rebuild, verbose=True):
+        pass
+
+@click.command('find-symbol')
+@click.argument('name')
+@click.option('--path', default='.', type=click.Path(exists=True), help='Project path')
+@click.option('--kind', type=click.Choice(SYMBOL_KINDS), help='Only list definitions of this kind')
+@click.option('--update/--no-update', default=True, show_default=True,
+              help='Update the index for changed files before searching; --no-update searches the index as it is')
+def find_symbol(name, path, kind, update):
+    """Find where NAME is defined.
+
+    NAME may be a plain name (format_code), a qualified one (FormatCache.get)
+    or a pattern with shell-style wildcards (devbuddy.cli.*).
+    """
+    with _open_symbol_index(path, update) as index:
+        definitions = index.find_symbol(name, kind)
+    for d in definitions:
+        click.echo(f"{os.path.relpath(d.path)}:{d.line}: {d.kind} {d.module}.{d.qualname}")
+    if not definitions:
+        click.echo(f"No definitions of {name} found.")
+        sys.exit(1)
+
+@click.command()
+@click.argument('name')
+@click.option('--path', default='.', type=click.Path(exists=True), help='Project path')
+@click.option('--update/--no-update', default=True, show_default=True,
+              help='Update the index for changed files before searching; --no-update searches the index as it is')
+def refs(name, path, update):
+    """List the references to NAME, including imports of it."""
+    with _open_symbol_index(path, update) as index:
+        references = index.find_references(name)
+    for r in references:
+        line = linecache.getline(r.path, r.line).strip()
+        click.echo(f"{os.path.relpath(r.path)}:{r.line}:{r.col + 1}: {line}")
+    if not references:
+        click.echo(f"No references to {name} found.")
+        sys.exit(1)
@@ -0,0 +1,75 @@
+"""
+The test command.
+"""
+
+import click
+import subprocess
+import sys
+
+from ..plugins.hooks import POST_TEST, PRE_TEST, call_hook
+from ..testrunner import (TimingCache, affected_tests, is_test_file, parse_shard, pytest_available, run_test_suite,
+                          select_shard)
+from ..walker import iter_files
+
+def _validate_shard(ctx, param, value):
+    """Parse a --shard value such as 2/4."""
+    if value is None:
+        return None
+    try:
+        return parse_shard(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+@click.command('test', context_settings={'ignore_unknown_options': True})
+@click.option('--path', default='.', type=click.Path(exists=True, file_okay=False), show_default=True,
+              help='Project directory to run tests in')
+@click.option('--affected', is_flag=True,
+              help='Only run the test modules that import, directly or indirectly, a file changed since --base')
+@click.option('--base', default='HEAD', show_default=True,
+              help='With --affected, the git revision or branch to compare against (e.g. main)')
+@click.option('--jobs', '-j', type=click.IntRange(min=1), help='Number of processes parsing imports (default: CPU count)')
+@click.option('--no-cache', is_flag=True, help='Re-parse the imports of every file')
+@click.option('--list', 'list_only', is_flag=True, help='Print the selected test files instead of running them')
+@click.option('--workers', '-n', default=1, show_default=True, type=click.IntRange(min=1),
+              help='Number of parallel pytest processes, each running a share of the test files')
+@click.option('--shard', callback=_validate_shard, metavar='INDEX/COUNT',
+              help='Only run this share of the test files (e.g. 2/4), to split the suite across CI nodes')
+@click.option('--durations-file', type=click.Path(dir_okay=False),
+              help='Split by the test durations in this JSON file, and record new durations in it, '
+                   'instead of the DevBuddy cache')
+@click.option('--junitxml', type=click.Path(dir_okay=False), help='Write one JUnit XML report for all shards')
+@click.argument('pytest_args', nargs=-1, type=click.UNPROCESSED)
+def run_tests(path, affected, base, jobs, no_cache, list_only, workers, shard, durations_file, junitxml, pytest_args):
+    """Run the project's tests with pytest; extra arguments are passed on to pytest."""
+    tests = []
+    if affected:
+        try:
+            tests, reason = affected_tests(path, base, jobs=jobs, use_cache=not no_cache)
+        except subprocess.CalledProcessError:
+            click.echo(f"Error: Could not compare with {base}; is {path} inside a git repository?")
+            sys.exit(1)
+        if reason:
+            click.echo(f"Running the whole test suite: {reason}.")
+            tests = []
+        elif not tests:
+            click.echo(f"No tests are affected by the changes since {base}.")
+            return
+        else:
+            click.echo(f"{len(tests)} test files are affected by the changes since {base}.")
+    if list_only:
+        tests = tests or [p for p in iter_files(path) if is_test_file(p)]
+        if shard is not None:
+            timings = TimingCache(path, durations_file)
+            tests = select_shard(tests, timings, shard)
+            timings.close()
+        for test in tests:
+            click.echo(test)
+        return
+    if not pytest_available():
+        click.echo("Installing pytest to run the tests...")
+        subprocess.run([sys.executable, "-m", "pip", "install", "pytest"], check=True)
+    call_hook(PRE_TEST, path=path, tests=tests)
+    status = run_test_suite(path, tests, pytest_args, workers=workers, shard=shard, durations_file=durations_file,
+                            junitxml=junitxml)
+    call_hook(POST_TEST, path=path, status=status)
+    sys.exit(status)
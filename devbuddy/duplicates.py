@@ -0,0 +1,347 @@
+"""
+Copy-paste detection for DevBuddy.
+Python files are split into tokens (ignoring layout, comments and import
+statements), every run of k tokens is hashed with a rolling hash, and
+winnowing keeps a small, position-independent sample of those hashes as
+fingerprints. Any duplicate of at least `min_tokens` tokens is guaranteed
+to share a fingerprint, so one pass over a compact inverted index finds
+every candidate pair of files; candidates are then verified and extended
+token by token. The work grows close to linearly with the size of the tree,
+unlike pairwise comparison.
+"""
+
+import functools
+import re
+import zlib
+from array import array
+from collections import deque
+
+from .analyzer import AnalysisResult, Message
+from .parallel import default_jobs, iter_balanced_chunks, map_chunks
+
+MIN_TOKENS = 50
+# Fingerprints occurring in more places than this are boilerplate, not copies.
+MAX_OCCURRENCES = 64
+# Candidate file pairs verified per worker task.
+PAIRS_PER_CHUNK = 32
+
+_HASH_BASE = 1000003
+_HASH_MODULUS = (1 << 61) - 1
+_POSITION_BITS = 32
+_POSITION_MASK = (1 << _POSITION_BITS) - 1
+# One scanner for Python source. It only has to split code into the same
+# tokens wherever it is copied, not to be a full tokenizer, so it is much
+# faster than the tokenize module and never fails on broken code.
+_TOKEN_RE = re.compile(r"""
+    [ \t\f]*(?:(?:\\\r?\n|\#[^\r\n]*)[ \t\f]*)*     # blanks, line continuations and comments
+    (?:
+        (?P<newline>\r?\n)
+      | (?P<string>[rRbBuUfF]{0,2}(?:'''(?:\\.|[^\\])*?'''|\"\"\"(?:\\.|[^\\])*?\"\"\"
+                                  |'(?:\\.|[^'\\\r\n])*'|"(?:\\.|[^"\\\r\n])*"))
+      | (?P<name>\w+)
+      | (?P<op>\*\*=?|//=?|>>=?|<<=?|->|:=|[-+*/%&|^@=<>!]=|\.\.\.|\S)
+    )
+""", re.VERBOSE | re.DOTALL)
+_OPENING = frozenset('([{')
+_CLOSING = frozenset(')]}')
+
+
+def tokenize_source(data, with_lines=False):
+    """Return (token hashes, token lines) for Python source bytes.
+
+    Whitespace, comments and whole import statements are left out, so
+    reformatted copies still match and shared import blocks do not. Token
+    lines are only worked out (otherwise None is returned) with with_lines.
+    """
+    text = data.decode('utf-8', 'replace')
+    hashes = array('I')
+    lines = array('I') if with_lines else None
+    cache = {}
+    line, offset = 1, 0
+    depth = 0
+    in_import = False
+    at_statement_start = True
+    for match in _TOKEN_RE.finditer(text):
+        kind = match.lastgroup
+        if kind == 'newline':
+            if depth == 0:
+                in_import = False
+                at_statement_start = True
+            continue
+        token = match.group(kind)
+        if kind == 'name':
+            if at_statement_start and token in ('import', 'from'):
+                in_import = True
+        elif kind == 'op':
+            if token in _OPENING:
+                depth += 1
+            elif token in _CLOSING:
+                depth = max(0, depth - 1)
+            elif token == ';' and depth == 0:
+                in_import = False
+                at_statement_start = True
+                continue
+        at_statement_start = False
+        if in_import:
+            continue
+        value = cache.get(token)
+        if value is None:
+            value = cache[token] = zlib.crc32(token.encode('utf-8', 'surrogatepass'))
+        hashes.append(value)
+        if with_lines:
+            start = match.start(kind)
+            line += text.count('\n', offset, start)
+            offset = start
+            lines.append(line)
+    return hashes, lines
+
+
+def _read_tokens(path, with_lines=False):
+    with open(path, 'rb') as f:
+        return tokenize_source(f.read(), with_lines)
+
+
+def winnow(tokens, k, window):
+    """Return (hashes, positions) of the winnowed fingerprints of a token hash sequence.
+
+    Each k-gram of tokens is hashed with a rolling polynomial hash; in every
+    run of `window` consecutive k-gram hashes the rightmost minimum is kept.
+    """
+    hashes = array('Q')
+    positions = array('I')
+    count = len(tokens) - k + 1
+    if count <= 0:
+        return hashes, positions
+    high = pow(_HASH_BASE, k - 1, _HASH_MODULUS)
+    value = 0
+    for token in tokens[:k]:
+        value = (value * _HASH_BASE + token) % _HASH_MODULUS
+    candidates = deque()  # (hash, position), hashes increasing
+    last = -1
+    for position in range(count):
+        if position:
+            value = ((value - tokens[position - 1] * high) * _HASH_BASE + tokens[position + k - 1]) % _HASH_MODULUS
+        while candidates and candidates[-1][0] >= value:
+            candidates.pop()
+        candidates.append((value, position))
+        if candidates[0][1] <= position - window:
+            candidates.popleft()
+        if position >= window - 1 or position == count - 1:
+            minimum, where = candidates[0]
+            if where != last:
+                hashes.append(minimum)
+                positions.append(where)
+                last = where
+    return hashes, positions
+
+
+def _fingerprint_chunk(paths, k, window):
+    """Fingerprint a chunk of files. Runs inside pool workers."""
+    results = []
+    for path in paths:
+        try:
+            tokens, _ = _read_tokens(path)
+        except OSError as e:
+            results.append((path, None, None, str(e)))
+            continue
+        hashes, positions = winnow(tokens, k, window)
+        results.append((path, hashes, positions, None))
+    return results
+
+
+class FingerprintIndex:
+    """Inverted index from fingerprint hash to the places it occurs.
+
+    A posting packs a file number and token position into one int. Most
+    fingerprints occur once, so a hash maps straight to its first posting,
+    and only hashes seen again get an array of further postings.
+    """
+
+    def __init__(self):
+        self.first = {}
+        self.more = {}
+
+    def add(self, file_id, hashes, positions):
+        base = file_id << _POSITION_BITS
+        first, more = self.first, self.more
+        for value, position in zip(hashes, positions):
+            posting = base | position
+            if first.setdefault(value, posting) != posting:
+                if value in more:
+                    more[value].append(posting)
+                else:
+                    more[value] = array('Q', [posting])
+
+    def candidate_pairs(self, max_occurrences=MAX_OCCURRENCES):
+        """Return {(file a, file b): [(position a, position b), ...]} for shared fingerprints.
+
+        Each occurrence is paired with the first one only, so a fingerprint
+        shared by n places yields n - 1 pairs rather than n * (n - 1) / 2.
+        """
+        pairs = {}
+        for value, rest in self.more.items():
+            if len(rest) >= max_occurrences:
+                continue
+            first = self.first[value]
+            file_a, position_a = first >> _POSITION_BITS, first & _POSITION_MASK
+            for posting in rest:
+                file_b, position_b = posting >> _POSITION_BITS, posting & _POSITION_MASK
+                if (file_b, position_b) < (file_a, position_a):
+                    key, anchor = (file_b, file_a), (position_b, position_a)
+                else:
+                    key, anchor = (file_a, file_b), (position_a, position_b)
+                pairs.setdefault(key, []).append(anchor)
+        return pairs
+
+
+@functools.lru_cache(maxsize=64)
+def _cached_tokens(path):
+    return _read_tokens(path, with_lines=True)
+
+
+def _extend_matches(tokens_a, tokens_b, anchors, same_file, k, min_tokens):
+    """Grow each anchor (a shared k-gram) into a maximal matching block.
+
+    Returns [(start a, end a, start b, end b)] token ranges of at least
+    min_tokens tokens; anchors inside an already found block are skipped.
+    """
+    blocks = []
+    covered = {}  # diagonal -> end of the last block found on it
+    for a, b in sorted(anchors):
+        diagonal = b - a
+        if a < covered.get(diagonal, -1):
+            continue
+        if same_file and diagonal < k:
+            continue
+        if tokens_a[a:a + k] != tokens_b[b:b + k]:
+            continue  # hash collision
+        # Within one file the two copies must not overlap: start + end <= diagonal.
+        room = diagonal if same_file else len(tokens_a) + len(tokens_b)
+        start = 0
+        while a - start > 0 and start + k < room and tokens_a[a - start - 1] == tokens_b[b - start - 1]:
+            start += 1
+        end = k
+        limit = min(len(tokens_a) - a, len(tokens_b) - b)
+        while end < limit and start + end < room and tokens_a[a + end] == tokens_b[b + end]:
+            end += 1
+        covered[diagonal] = a + end
+        if start + end >= min_tokens:
+            blocks.append((a - start, a + end, b - start, b + end))
+    return blocks
+
+
+def _verify_chunk(tasks, k, min_tokens):
+    """Verify candidate file pairs token by token. Runs inside pool workers."""
+    found = []
+    for path_a, path_b, anchors in tasks:
+        tokens_a, lines_a = _cached_tokens(path_a)
+        tokens_b, lines_b = _cached_tokens(path_b)
+        for start_a, end_a, start_b, end_b in _extend_matches(tokens_a, tokens_b, anchors, path_a == path_b,
+                                                              k, min_tokens):
+            found.append((path_a, lines_a[start_a], lines_a[end_a - 1], path_b, lines_b[start_b],
+                          lines_b[end_b - 1], end_a - start_a))
+    return found
+
+
+def window_sizes(min_tokens):
+    """Return (k, window) so that every duplicate of min_tokens tokens shares a fingerprint."""
+    k = max(1, min_tokens // 2)
+    return k, min_tokens - k + 1
+
+
+def find_duplicates(paths, jobs=None, min_tokens=MIN_TOKENS):
+    """Find duplicated blocks of at least min_tokens tokens among paths.
+
+    Returns (duplicates, errors, files): duplicates are tuples of
+    (path a, first line, last line, path b, first line, last line, tokens)
+    and errors maps files that could not be tokenized to the reason.
+
+    Every copy of a block is paired with one copy only (the first one
+    indexed), not with every other: a block copied to A, B and C yields
+    A-B and A-C (or a similar chain), but no B-C pair. group_duplicates
+    joins such chains back into groups.
+    """
+    jobs = jobs or default_jobs()
+    k, window = window_sizes(min_tokens)
+    index = FingerprintIndex()
+    files = []
+    errors = {}
+    for chunk, results, error in map_chunks(_fingerprint_chunk, iter_balanced_chunks(paths, jobs), jobs, k, window):
+        if error is not None:
+            errors.update((p, str(error)) for p in chunk)
+            continue
+        for path, hashes, positions, file_error in results:
+            if file_error is not None:
+                errors[path] = file_error
+                continue
+            index.add(len(files), hashes, positions)
+            files.append(path)
+
+    pairs = index.candidate_pairs()
+    del index
+    tasks = []
+    for (a, b), anchors in pairs.items():
+        # Report each pair in path order, whatever order the files were indexed in.
+        if files[b] < files[a]:
+            a, b, anchors = b, a, [(position_b, position_a) for position_a, position_b in anchors]
+        tasks.append((files[a], files[b], anchors))
+    tasks.sort()
+    del pairs
+    chunks = (tasks[i:i + PAIRS_PER_CHUNK] for i in range(0, len(tasks), PAIRS_PER_CHUNK))
+    duplicates = []
+    for chunk, found, error in map_chunks(_verify_chunk, chunks, jobs, k, min_tokens):
+        if error is not None:
+            for path_a, _, _ in chunk:
+                errors.setdefault(path_a, str(error))
+            continue
+        duplicates.extend(found)
+    return sorted(duplicates), errors, files
+
+
+def group_duplicates(duplicates):
+    """Merge duplicate pairs that share a copy into groups.
+
+    Returns [(copies, tokens)], where copies is the sorted list of
+    (path, first line, last line) of every copy of one block and tokens the
+    longest match among them.
+    """
+    parent = {}
+
+    def find(copy):
+        parent.setdefault(copy, copy)
+        while parent[copy] != copy:
+            parent[copy] = parent[parent[copy]]
+            copy = parent[copy]
+        return copy
+
+    for path_a, first_a, last_a, path_b, first_b, last_b, _ in duplicates:
+        root_a, root_b = find((path_a, first_a, last_a)), find((path_b, first_b, last_b))
+        if root_a != root_b:
+            parent[max(root_a, root_b)] = min(root_a, root_b)
+    groups = {}
+    for copy in parent:
+        groups.setdefault(find(copy), []).append(copy)
+    tokens = {}
+    for duplicate in duplicates:
+        root = find(duplicate[:3])
+        tokens[root] = max(tokens.get(root, 0), duplicate[6])
+    return [(sorted(copies), tokens[root]) for root, copies in sorted(groups.items())]
+
+
+def iter_duplicates(paths, jobs=None, min_tokens=MIN_TOKENS):
+    """Yield an AnalysisResult for every file, with a DB100 message per duplicated block.
+
+    Each group of copies of a block is reported once, at its first copy in
+    path order, listing all the other copies.
+    """
+    duplicates, errors, files = find_duplicates(paths, jobs, min_tokens)
+    messages = {}
+    for copies, tokens in group_duplicates(duplicates):
+        (path, first, last), others = copies[0], copies[1:]
+        where = ', '.join(f"{other_path}:{other_first}-{other_last}" for other_path, other_first, other_last in others)
+        text = f"Lines {first}-{last} are duplicated at {where} ({tokens} tokens)"
+        messages.setdefault(path, []).append(Message(path, first, 0, 'DB100', 'duplicate-code', text, 'convention'))
+    for path in files:
+        yield AnalysisResult(path, messages.get(path, []), None)
+    for path, error in errors.items():
+        yield AnalysisResult(path, [], error)
@@ -0,0 +1,245 @@
+"""
+In-process formatting engines for DevBuddy.
+Each engine wraps a formatter's Python API so files can be formatted
+without spawning a new process per tool.
+"""
+
+import difflib
+import functools
+import os
+
+SUPPORTED_TOOLS = ['black', 'autopep8', 'yapf', 'isort']
+
+# Configuration files each tool reads. Changing any of them invalidates
+# cached formatting results.
+CONFIG_FILES = {
+    'black': ['pyproject.toml'],
+    'isort': ['pyproject.toml', 'setup.cfg', 'tox.ini', '.isort.cfg', '.editorconfig'],
+    'autopep8': ['pyproject.toml', 'setup.cfg', 'tox.ini', '.pep8', '.flake8'],
+    'yapf': ['pyproject.toml', 'setup.cfg', '.style.yapf'],
+}
+
+# Per-directory configuration lookups memoised by the loaded engines.
+_config_caches = []
+
+# Loaded engines, keyed by tool name. A value of None records a failed import
+# so the tool is only probed once per invocation.
+_engines = {}
+
+
+class FormatterEngine:
+    """A formatting tool loaded into the current process."""
+
+    def __init__(self, name, version, format_func, supports_lines=True, config_files=None):
+        self.name = name
+        self.version = version
+        self.config_files = config_files if config_files is not None else CONFIG_FILES.get(name, [])
+        self.supports_lines = supports_lines
+        self._format_func = format_func
+
+    def format_source(self, source, path=None, lines=None):
+        """Return source formatted by this tool.
+
+        lines is an optional list of 1-based inclusive (start, end) ranges to
+        restrict formatting to. Engines without range support format the
+        whole source.
+        """
+        return self._format_func(source, path, lines)
+
+    def __repr__(self):
+        return f"<FormatterEngine {self.name} {self.version}>"
+
+
+def _config_cache(func):
+    """Memoise a per-directory config lookup so reset_config_caches() can clear it."""
+    cached = functools.lru_cache(maxsize=None)(func)
+    _config_caches.append(cached)
+    return cached
+
+
+def reset_config_caches():
+    """Forget memoised tool configuration, e.g. before serving a new request."""
+    for cached in _config_caches:
+        cached.cache_clear()
+
+
+def _config_dir(path):
+    """Return the directory used to look up tool configuration for a file."""
+    if not path:
+        return os.getcwd()
+    return os.path.dirname(os.path.abspath(path))
+
+
+def _load_black():
+    import inspect
+    import black
+
+    supports_lines = 'lines' in inspect.signature(black.format_file_contents).parameters
+
+    @_config_cache
+    def mode_for(directory, is_pyi):
+        config = {}
+        pyproject = black.find_pyproject_toml((directory,))
+        if pyproject:
+            try:
+                config = black.parse_pyproject_toml(pyproject)
+            except (OSError, ValueError):
+                config = {}
+        target_versions = set()
+        for version in config.get('target_version') or []:
+            try:
+                target_versions.add(black.TargetVersion[version.upper()])
+            except KeyError:
+                pass
+        return black.Mode(
+            target_versions=target_versions,
+            line_length=config.get('line_length', black.DEFAULT_LINE_LENGTH),
+            string_normalization=not config.get('skip_string_normalization', False),
+            magic_trailing_comma=not config.get('skip_magic_trailing_comma', False),
+            preview=config.get('preview', False),
+            is_pyi=is_pyi,
+        )
+
+    def format_func(source, path, lines):
+        is_pyi = bool(path) and path.endswith('.pyi')
+        mode = mode_for(_config_dir(path), is_pyi)
+        kwargs = {'lines': lines} if lines and supports_lines else {}
+        try:
+            return black.format_file_contents(source, fast=False, mode=mode, **kwargs)
+        except black.NothingChanged:
+            return source
+
+    # Line ranges need black 23.11 or newer.
+    return FormatterEngine('black', black.__version__, format_func, supports_lines)
+
+
+def _load_isort():
+    import isort
+
+    @_config_cache
+    def config_for(directory):
+        return isort.Config(settings_path=directory)
+
+    def format_func(source, path, lines):
+        # isort works on whole import blocks, so line ranges are ignored.
+        return isort.code(source, config=config_for(_config_dir(path)))
+
+    return FormatterEngine('isort', isort.__version__, format_func, supports_lines=False)
+
+
+def _load_autopep8():
+    import autopep8
+
+    def format_func(source, path, lines):
+        if not lines:
+            return autopep8.fix_code(source, options={'aggressive': 2})
+        # autopep8 takes one range at a time; go bottom-up so earlier ranges
+        # keep their line numbers.
+        for start, end in sorted(lines, reverse=True):
+            source = autopep8.fix_code(source, options={'aggressive': 2, 'line_range': [start, end]})
+        return source
+
+    return FormatterEngine('autopep8', autopep8.__version__, format_func)
+
+
+def _load_yapf():
+    import yapf
+    from yapf.yapflib import file_resources, yapf_api
+
+    @_config_cache
+    def style_for(directory):
+        return file_resources.GetDefaultStyleForDir(directory)
+
+    def format_func(source, path, lines):
+        formatted, _ = yapf_api.FormatCode(source, filename=path or '<unknown>',
+                                           style_config=style_for(_config_dir(path)), lines=lines or None)
+        return formatted
+
+    return FormatterEngine('yapf', yapf.__version__, format_func)
+
+
+_LOADERS = {
+    'black': _load_black,
+    'isort': _load_isort,
+    'autopep8': _load_autopep8,
+    'yapf': _load_yapf,
+}
+
+
+def parse_tools(spec):
+    """Split a comma-separated tool spec such as 'isort,black' into tool names."""
+    return [t.strip() for t in spec.split(',') if t.strip()]
+
+
+def remap_line_ranges(before, after, ranges):
+    """Map 1-based inclusive line ranges in before onto the matching lines of after."""
+    opcodes = difflib.SequenceMatcher(None, before.splitlines(), after.splitlines(), autojunk=False).get_opcodes()
+
+    # Lines inserted right at either edge of a range are counted as part of it.
+    def map_start(i):
+        for tag, i1, i2, j1, _ in opcodes:
+            if (tag == 'insert' and i1 == i) or i1 <= i < i2:
+                return j1 + (i - i1) if tag == 'equal' else j1
+        return opcodes[-1][4] if opcodes else 0
+
+    def map_end(i):
+        end = 0
+        for tag, i1, i2, j1, j2 in opcodes:
+            if i1 < i <= i2:
+                end = j1 + (i - i1) if tag == 'equal' else j2
+            elif tag == 'insert' and i1 == i:
+                end = j2
+            elif i1 > i:
+                break
+        return end
+
+    remapped = []
+    for start, end in ranges:
+        new_start, new_end = map_start(start - 1), map_end(end)
+        if new_end > new_start:
+            remapped.append((new_start + 1, new_end))
+    return remapped
+
+
+def _build_pipeline(tools):
+    """Chain several engines so each formats the previous one's output."""
+    engines = [get_engine(t) for t in tools]
+    if any(engine is None for engine in engines):
+        return None
+
+    def format_func(source, path, lines):
+        for engine in engines:
+            formatted = engine.format_source(source, path, lines)
+            if lines and formatted != source:
+                # Earlier tools may add or remove lines; keep the ranges on
+                # the same code for the next tool.
+                lines = remap_line_ranges(source, formatted, lines)
+                if not lines:
+                    return formatted
+            source = formatted
+        return source
+
+    config_files = []
+    for engine in engines:
+        config_files.extend(f for f in engine.config_files if f not in config_files)
+    return FormatterEngine('+'.join(e.name for e in engines), '+'.join(e.version for e in engines), format_func,
+                           supports_lines=all(e.supports_lines for e in engines), config_files=config_files)
+
+
+def get_engine(tool):
+    """Return the in-process engine for tool, or None if it cannot be imported.
+
+    tool may be a comma-separated list such as 'isort,black', in which case
+    the engines are chained in that order over the same in-memory source.
+    """
+    if tool not in _engines:
+        tools = parse_tools(tool)
+        if len(tools) > 1:
+            _engines[tool] = _build_pipeline(tools)
+        else:
+            loader = _LOADERS.get(tool)
+            try:
+                _engines[tool] = loader() if loader else None
+            except ImportError:
+                _engines[tool] = None
+    return _engines[tool]
@@ -1,63 +1,598 @@
+import difflib
 import subprocess
 import os
-import glob
+import shutil
 import sys
+import tempfile
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from . import __version__
+from .cache import ConfigHasher, ResultCache
+from .engines import get_engine, parse_tools
+from .gitutils import changed_files, changed_line_ranges
+from .languages import LANGUAGE_FORMATTERS, PYTHON, extension_map, group_by_language, parse_languages
+from .parallel import default_jobs, iter_balanced_chunks, map_chunks
+from .plugins.hooks import POST_FORMAT_FILE, PRE_FORMAT_FILE, call_hook, has_subscribers
+from .walker import iter_files
+from .watcher import InotifyWatcher, create_watcher, watch_changes
 
-def format_code(path, tool='black', use_git=False, recursive=False):
-    """Format Python files in the given path using the specified tool."""
+# Outcome of formatting a single file. `changed` is None when the tool ran
+# out of process and per-file results are not available; in check mode it
+# means the file would change. `cached` is set when the file was skipped
+# because the cache knew it was already formatted, and `diff` holds a
+# unified diff when one was requested.
+FormatResult = namedtuple('FormatResult', ['path', 'changed', 'error', 'cached', 'diff'], defaults=[False, None])
+
+# Exit status each tool uses in check mode to say files would change.
+CHECK_CHANGED_CODES = {'black': 1, 'isort': 1, 'autopep8': 2, 'yapf': 1}
+
+class _Tally:
+    """Running totals of FormatResults.
+
+    Only the results worth returning (files that changed or failed) are
+    kept, without their diffs, so memory does not grow with the number of
+    files that were already formatted.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.changed = 0
+        self.kept = []
+
+    def add(self, result):
+        self.total += 1
+        if result.changed:
+            self.changed += 1
+        if result.changed or result.error:
+            self.kept.append(result._replace(diff=None))
+
+    @property
+    def failed(self):
+        return [r for r in self.kept if r.error]
+
+class FormatCache:
+    """Remember which file contents are already formatted by an engine.
+
+    Entries are keyed by content hash, tool name, tool version and a hash of
+    the tool's config files, so upgrading the tool or editing its
+    configuration invalidates them.
+    """
+
+    def __init__(self, engine, cache_dir=None):
+        self.engine = engine
+        self.store = ResultCache('format', cache_dir)
+        self.config = ConfigHasher(engine.config_files)
+
+    @property
+    def hits(self):
+        return self.store.hits
+
+    @property
+    def misses(self):
+        return self.store.misses
+
+    def _key(self, path):
+        config_digest = self.config.digest(os.path.dirname(os.path.abspath(path)))
+        digest = self.store.file_digest(path)
+        return f"{self.engine.name}|{self.engine.version}|{config_digest}|{digest}"
+
+    def is_formatted(self, path):
+        """Return True if path's current content is known to be formatted."""
+        return self.store.get(self._key(path)) is not None
+
+    def mark_formatted(self, path):
+        """Record path's current content as formatted."""
+        self.store.set(self._key(path), '1')
+
+    def commit(self):
+        self.store.commit()
+
+    def close(self):
+        self.store.close()
+
+def read_source(path):
+    """Read a source file, returning its text with '\\n' newlines and the original newline."""
+    with open(path, 'rb') as f:
+        return decode_source(f.read())
+
+def decode_source(data):
+    """Decode source bytes, returning the text with '\\n' newlines and the original newline."""
+    first_line_end = data.find(b'\n')
+    newline = '\r\n' if first_line_end > 0 and data[first_line_end - 1:first_line_end] == b'\r' else '\n'
+    text = data.decode('utf-8')
+    if newline != '\n':
+        text = text.replace('\r\n', '\n')
+    return text, newline
+
+def write_source(path, text, newline='\n'):
+    """Atomically replace path with text, keeping the file's permissions.
+
+    The text is written to a temporary file next to path and moved over it,
+    so readers never see a half-written file. A symlink is written through
+    to its target, and a file with other hard links is rewritten in place
+    so the links keep sharing it.
+    """
+    path = os.path.realpath(path)
     try:
-        if use_git:
-            result = subprocess.run(['git', 'status', '--porcelain'], capture_output=True, text=True, check=True)
-            files = [line.split()[1] for line in result.stdout.splitlines() if line.strip() and line.split()[1].endswith('.py')]
-            if not files:
-                print("No modified Python files found in git.")
-                return
-            paths_to_format = files
-        else:
-            if recursive and os.path.isdir(path):
-                # Find all .py files recursively in the directory
-                paths_to_format = glob.glob(f"{path}/**/*.py", recursive=True)
-                if not paths_to_format:
-                    print(f"No Python files found in {path}.")
-                    return
-            elif os.path.isdir(path):
-                # Find only .py files in the current directory
-                paths_to_format = glob.glob(f"{path}/*.py")
-                if not paths_to_format:
-                    print(f"No Python files found in {path}.")
-                    return
-            else:
-                # Single file
-                paths_to_format = [path]
-
-        # Check if the tool is installed
+        st = os.stat(path)
+    except OSError:
+        st = None
+    if st is not None and st.st_nlink > 1:
+        with open(path, 'w', encoding='utf-8', newline=newline) as f:
+            f.write(text)
+        return
+    directory, name = os.path.split(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{name}.", suffix='.tmp')
+    try:
+        with open(fd, 'w', encoding='utf-8', newline=newline) as f:
+            f.write(text)
+        if st is not None:
+            os.chmod(tmp_path, st.st_mode & 0o7777)
+        os.replace(tmp_path, path)
+    except BaseException:
         try:
-            subprocess.run([tool, "--version"], capture_output=True, check=True)
-        except (FileNotFoundError, subprocess.CalledProcessError):
-            print(f"Tool {tool} not found. Installing...")
-            subprocess.run([sys.executable, "-m", "pip", "install", tool], check=True)
-    
-        # Apply formatting
-        print(f"Formatting {len(paths_to_format)} files with {tool}...")
-        
-        if tool == 'black':
-            subprocess.run([tool] + paths_to_format, check=True)
-        elif tool == 'autopep8':
-            subprocess.run([tool, '--in-place', '--aggressive', '--aggressive'] + paths_to_format, check=True)
-        elif tool == 'yapf':
-            subprocess.run([tool, '--in-place'] + paths_to_format, check=True)
-        elif tool == 'isort':
-            subprocess.run([tool] + paths_to_format, check=True)
-        
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def make_diff(before, after, path):
+    """Return a unified diff between two versions of a file."""
+    return ''.join(difflib.unified_diff(before.splitlines(True), after.splitlines(True),
+                                        fromfile=f"{path}\t(original)", tofile=f"{path}\t(formatted)"))
+
+def format_file(engine, path, lines=None, check=False, diff=False):
+    """Format a single file in place with an in-process engine.
+
+    The file is read once and rewritten only if the formatted text differs,
+    so untouched files keep their mtime. lines optionally restricts
+    formatting to 1-based inclusive line ranges. With check the file is
+    never written; with diff the result carries a unified diff.
+    """
+    try:
+        source, newline = read_source(path)
+        formatted = engine.format_source(source, path, lines)
+        if formatted == source:
+            return FormatResult(path, False, None)
+        patch = make_diff(source, formatted, path) if diff else None
+        if not check:
+            write_source(path, formatted, newline)
+        return FormatResult(path, True, None, diff=patch)
+    except Exception as e:
+        return FormatResult(path, False, str(e))
+
+def format_hooked(path, format_one, *args):
+    """Return format_one(*args), the FormatResult for path, firing the format hooks around it.
+
+    format_code fires the hooks itself, in this process, for the files its
+    workers format; callers that format files one at a time in this process
+    (the watcher, the pre-commit hook) go through here instead.
+    """
+    call_hook(PRE_FORMAT_FILE, path=path)
+    result = format_one(*args)
+    call_hook(POST_FORMAT_FILE, result=result)
+    return result
+
+def _is_within(path, scope):
+    return path == scope or path.startswith(scope.rstrip(os.sep) + os.sep)
+
+def _git_paths(path, base='HEAD', changed_lines=False, extensions=('.py',)):
+    """Return (paths, line_ranges) for files under path changed in git.
+
+    Only files ending in one of extensions are returned. Renamed files are
+    reported under their new name and deleted files are skipped.
+    line_ranges is None unless changed_lines is set; untracked files have no
+    entry in it and are formatted in full.
+    """
+    scope = os.path.abspath(path)
+    cwd = scope if os.path.isdir(scope) else os.path.dirname(scope)
+    extensions = tuple(extensions)
+    files = [f for f in changed_files(cwd, base)
+             if f.status != 'D' and f.path.endswith(extensions) and _is_within(f.path, scope)
+             and os.path.isfile(f.path)]
+    if not changed_lines:
+        return [f.path for f in files], None
+
+    ranges = changed_line_ranges(cwd, base)
+    paths, line_ranges = [], {}
+    for f in files:
+        if f.status == '?':
+            paths.append(f.path)
+        elif ranges.get(f.path):
+            # Files whose hunks only delete lines have nothing to format.
+            paths.append(f.path)
+            line_ranges[f.path] = ranges[f.path]
+    return paths, line_ranges
+
+def _discover_paths(path, recursive, extensions=('.py',)):
+    """Return an iterable of the files that should be formatted."""
+    # Files are yielded lazily so formatting starts before the walk finishes.
+    return iter_files(path, tuple(extensions), recursive=recursive)
+
+def _tool_command(name, check=False, diff=False):
+    """Return the command line for running a tool, optionally in check mode."""
+    if name == 'black':
+        return [name] + (['--check'] if check else []) + (['--diff'] if diff else [])
+    if name == 'isort':
+        return [name] + (['--check-only'] if check else []) + (['--diff'] if diff else [])
+    if name == 'autopep8':
+        return [name, '--aggressive', '--aggressive'] + (['--diff', '--exit-code'] if check else ['--in-place'])
+    if name == 'yapf':
+        return [name] + (['--diff'] if check else ['--in-place'])
+    return [name]
+
+def _run_captured(command, show_stdout=True):
+    """Run command and pass its output on through sys.stdout and sys.stderr.
+
+    The output is captured rather than inherited, so it follows any
+    redirection of those streams, e.g. back to the client of a 'dbuddy serve'
+    server, whose own output goes nowhere.
+    """
+    result = subprocess.run(command, capture_output=True, text=True, encoding='utf-8', errors='replace')
+    for stream, text in ((sys.stdout, result.stdout if show_stdout else ''), (sys.stderr, result.stderr)):
+        if text:
+            stream.write(text)
+            stream.flush()
+    return result
+
+def _run_tool_cli(paths, tool, check=False, diff=False):
+    """Run each tool's command line interface over a chunk of files, in order.
+
+    In check mode a chunk counts as changed when any tool reports that it
+    would reformat one of its files; the tool's own output names them.
+    """
+    would_change = False
+    for name in parse_tools(tool):
+        command = _tool_command(name, check, diff) + paths
+        # autopep8 and yapf always print diffs in check mode; hide them unless asked.
+        result = _run_captured(command, show_stdout=not (check and not diff and name in ('autopep8', 'yapf')))
+        if check and result.returncode == CHECK_CHANGED_CODES.get(name):
+            would_change = True
+        elif result.returncode != 0:
+            raise subprocess.CalledProcessError(result.returncode, command, result.stdout, result.stderr)
+    changed = True if would_change else (False if check else None)
+    return [FormatResult(p, changed, None) for p in paths]
+
+def _format_with_subprocess(paths_to_format, tool, jobs=1, check=False, diff=False, reporter=None):
+    """Format files by running the tool's command line interface, one run per chunk. Returns a _Tally."""
+    # Check if the tools are installed
+    for name in parse_tools(tool):
+        if not shutil.which(name):
+            print(f"Tool {name} not found. Installing...")
+            command = [sys.executable, "-m", "pip", "install", name]
+            result = _run_captured(command)
+            if result.returncode != 0:
+                raise subprocess.CalledProcessError(result.returncode, command, result.stdout, result.stderr)
+
+    print(f"{'Checking' if check else 'Formatting'} files with {tool}...")
+
+    # Each chunk pays for a tool startup, so use one chunk per worker here.
+    tally = _Tally()
+    chunks = iter_balanced_chunks(paths_to_format, jobs, chunks_per_job=1)
+    for chunk, chunk_results, error in map_chunks(_run_tool_cli, chunks, jobs, tool, check, diff, threads=True):
+        if error is not None:
+            print(f"Error: Something went wrong while formatting with {tool}: {error}")
+            chunk_results = [FormatResult(p, None, str(error)) for p in chunk]
+        for result in chunk_results:
+            if reporter is not None:
+                reporter.format_result(result, tool, check)
+            call_hook(POST_FORMAT_FILE, result=result)
+            tally.add(result)
+
+    if check:
+        if tally.changed:
+            print(f"Some files would be reformatted by {tool}.")
+        elif tally.total and not tally.failed:
+            print(f"All files are formatted according to {tool}.")
+    elif not tally.failed:
         print(f"Code formatted successfully with {tool}!")
+    return tally
+
+def _format_chunk(paths, tool, line_ranges=None, check=False, diff=False):
+    """Format a chunk of files in-process. Runs inside pool workers."""
+    engine = get_engine(tool)
+    line_ranges = line_ranges or {}
+    return [format_file(engine, p, line_ranges.get(p), check, diff) for p in paths]
+
+def _format_in_parallel(paths, tool, jobs, line_ranges=None, check=False, diff=False):
+    """Format files across a process pool, yielding results as chunks finish."""
+    chunks = iter_balanced_chunks(paths, jobs)
+    for chunk, chunk_results, error in map_chunks(_format_chunk, chunks, jobs, tool, line_ranges, check, diff):
+        if error is not None:
+            chunk_results = [FormatResult(p, False, str(error)) for p in chunk]
+        for result in chunk_results:
+            yield result
+
+def _format_with_cache(paths_to_format, tool, jobs, cache, check=False, diff=False):
+    """Format files in-process, skipping those the cache knows are formatted.
+
+    Yields results as they become available.
+    """
+    def misses():
+        for p in paths_to_format:
+            try:
+                if cache.is_formatted(p):
+                    pending.append(FormatResult(p, False, None, True))
+                    continue
+            except OSError as e:
+                pending.append(FormatResult(p, False, str(e)))
+                continue
+            yield p
+
+    pending = deque()
+    for result in _format_in_parallel(misses(), tool, jobs, None, check, diff):
+        # In check mode a file that would change is not formatted yet.
+        if not result.error and not (check and result.changed):
+            cache.mark_formatted(result.path)
+        while pending:
+            yield pending.popleft()
+        yield result
+    while pending:
+        yield pending.popleft()
+
+def _announce(paths):
+    """Fire the pre_format_file hook for each path as it is handed to the formatters."""
+    for p in paths:
+        call_hook(PRE_FORMAT_FILE, path=p)
+        yield p
+
+def _report_result(result, tool, check, reporter=None):
+    """Print per-file output, or pass the result to the reporter, as soon as it arrives."""
+    if reporter is not None:
+        reporter.format_result(result, tool, check)
+    elif result.diff:
+        sys.stdout.write(result.diff)
+        sys.stdout.flush()
+    elif check and result.changed:
+        print(f"would reformat {result.path}")
+
+def _print_summary(tally, tool, cache=None, check=False):
+    """Print a summary of in-process formatting results."""
+    changed = tally.changed
+    failed = tally.failed
+    for r in failed:
+        print(f"Error: Could not format {r.path}: {r.error}")
+    unchanged = tally.total - changed - len(failed)
+    if check:
+        print(f"{changed} files would be reformatted, {unchanged} files would be left unchanged by {tool}.")
+    else:
+        print(f"{changed} files reformatted, {unchanged} files left unchanged with {tool}.")
+    if failed:
+        print(f"{len(failed)} files could not be formatted.")
+    if cache is not None:
+        print(f"Cache: {cache.hits} hits, {cache.misses} misses.")
+
+def _format_python(paths_to_format, path, tool, use_git, line_ranges, use_subprocess, use_cache, jobs, check,
+                   diff, reporter=None):
+    """Format Python files with the in-process engines, or the tools' CLIs if unavailable. Returns a _Tally."""
+    engine = None if use_subprocess else get_engine(tool)
+    if engine is None:
+        if line_ranges is not None:
+            print(f"Warning: {tool} is running as a subprocess; formatting whole files.")
+        tally = _format_with_subprocess(paths_to_format, tool, jobs, check, diff, reporter)
+        if not tally.total and not use_git:
+            print(f"No Python files found in {path}.")
+        return tally
+
+    if line_ranges is not None and not engine.supports_lines:
+        print(f"Warning: {tool} {engine.version} cannot format line ranges; formatting whole files.")
+
+    print(f"{'Checking' if check else 'Formatting'} Python files with {tool} {engine.version}...")
+    tally = _Tally()
+    if use_cache and line_ranges is None:
+        cache = FormatCache(engine)
+        try:
+            for result in _format_with_cache(paths_to_format, tool, jobs, cache, check, diff):
+                _report_result(result, tool, check, reporter)
+                call_hook(POST_FORMAT_FILE, result=result)
+                tally.add(result)
+        finally:
+            cache.close()
+    else:
+        # Partially formatted files must not be recorded as formatted.
+        cache = None
+        for result in _format_in_parallel(paths_to_format, tool, jobs, line_ranges, check, diff):
+            _report_result(result, tool, check, reporter)
+            call_hook(POST_FORMAT_FILE, result=result)
+            tally.add(result)
+    if not tally.total and not use_git:
+        print(f"No Python files found in {path}.")
+        return tally
+    _print_summary(tally, tool, cache, check)
+    return tally
+
+def _format_language(language, paths, check=False, diff=False):
+    """Format the files of one non-Python language. Returns (results, tool output)."""
+    changed, errors, output = LANGUAGE_FORMATTERS[language].run(paths, check, diff)
+    results = [FormatResult(p, False, errors[p]) if p in errors else FormatResult(p, changed.get(p), None)
+               for p in paths]
+    return results, output
+
+def _print_language_summary(language, results, output, check=False, diff=False, reporter=None):
+    """Print the output and a summary for one non-Python language."""
+    tool = LANGUAGE_FORMATTERS[language].tool
+    if reporter is not None:
+        for r in results:
+            reporter.format_result(r, tool, check)
+    if output:
+        sys.stdout.write(output if output.endswith('\n') else output + '\n')
+    if check and not diff and reporter is None:
+        for r in results:
+            if r.changed:
+                print(f"would reformat {r.path}")
+    # Errors usually affect a whole batch (e.g. a missing tool), so report each message once.
+    errors = {}
+    for r in results:
+        if r.error:
+            errors.setdefault(r.error, []).append(r.path)
+    for error, paths in errors.items():
+        target = paths[0] if len(paths) == 1 else f"{len(paths)} {language} files"
+        print(f"Error: Could not format {target}: {error}")
+    done = [r for r in results if not r.error]
+    if not done:
+        return
+    changed = sum(1 for r in done if r.changed)
+    if check:
+        print(f"{changed} {language} files would be reformatted, "
+              f"{len(done) - changed} would be left unchanged by {tool}.")
+    elif any(r.changed is None for r in done):
+        print(f"{len(done)} {language} files formatted with {tool}.")
+    else:
+        print(f"{changed} {language} files reformatted, {len(done) - changed} left unchanged with {tool}.")
+
+def format_code(path, tool='black', use_git=False, recursive=False, use_subprocess=False, use_cache=True,
+                jobs=None, changed_lines=False, base='HEAD', check=False, diff=False, languages=(PYTHON,),
+                reporter=None):
+    """Format source files in the given path.
+
+    Python files are formatted with the specified tool. tool may name
+    several tools separated by commas (e.g. 'isort,black'); they are applied
+    in order to each file's contents in memory, and each file is written at
+    most once. The tools' Python APIs are used in-process when they can be
+    imported; otherwise (or when use_subprocess is set) the command line
+    tools are run instead. In-process runs skip files whose content is
+    already known to be formatted unless use_cache is False. Files are split
+    into size-balanced chunks and formatted across `jobs` worker processes
+    (default: CPU count).
+
+    languages selects which languages to format ('all' for every supported
+    one). Files of other languages are grouped by extension and passed in
+    batches to their own formatter (gofmt, rustfmt, prettier, dotnet
+    format), each language in its own thread alongside the Python run.
+
+    With use_git only files changed relative to `base` are formatted, and
+    changed_lines further restricts formatting of Python files to the
+    changed line ranges. With check no file is written and results report
+    which files would change; diff also streams a unified diff for each of
+    them. With a reporter (see devbuddy.reporters), per-file results are
+    streamed to it instead of being printed.
+
+    Returns a list of FormatResult for the files that were (or would be)
+    reformatted or could not be formatted; files left unchanged are only
+    counted in the summary, so memory stays flat on large trees. If the
+    run fails as a whole (e.g. git or the tool is missing), a single error
+    result for path is returned.
+    """
+    if reporter is not None:
+        reporter.start('devbuddy', __version__)
+    jobs = jobs or default_jobs()
+    check = check or diff
+    languages = parse_languages(languages)
+    python_only = languages == [PYTHON]
+    try:
+        extensions = extension_map(languages)
+        line_ranges = None
+        if use_git:
+            paths_to_format, line_ranges = _git_paths(path, base, changed_lines, extensions)
+            if not paths_to_format:
+                print(f"No modified {'Python ' if python_only else ''}files found in git.")
+                return []
+        else:
+            paths_to_format = _discover_paths(path, recursive, extensions)
+        if has_subscribers(PRE_FORMAT_FILE):
+            paths_to_format = _announce(paths_to_format)
+
+        if python_only:
+            return _format_python(paths_to_format, path, tool, use_git, line_ranges, use_subprocess, use_cache,
+                                  jobs, check, diff, reporter).kept
+
+        groups = group_by_language(paths_to_format, extensions)
+        if not groups:
+            print(f"No files to format found in {path}.")
+            return []
+        others = [language for language in languages if language != PYTHON and language in groups]
+        if line_ranges is not None and others:
+            print("Warning: --changed-lines only applies to Python files; other files are formatted in full.")
+        tally = _Tally()
+        # External formatters mostly wait on their subprocess, so a thread per
+        # language is enough to run them alongside the Python formatting.
+        with ThreadPoolExecutor(max_workers=max(1, len(others))) as executor:
+            futures = [(language, executor.submit(_format_language, language, groups[language], check, diff))
+                       for language in others]
+            if PYTHON in groups:
+                tally = _format_python(groups[PYTHON], path, tool, use_git, line_ranges, use_subprocess,
+                                       use_cache, jobs, check, diff, reporter)
+            for language, future in futures:
+                language_results, output = future.result()
+                _print_language_summary(language, language_results, output, check, diff, reporter)
+                for result in language_results:
+                    call_hook(POST_FORMAT_FILE, result=result)
+                    tally.add(result)
+        return tally.kept
 
     except subprocess.CalledProcessError as e:
-        print(f"Error: Something went wrong while formatting with {tool}: {e}")
+        error = f"Something went wrong while formatting with {tool}: {e}"
+        print(f"Error: {error}")
     except FileNotFoundError:
+        error = f"{tool} is not installed"
         print(f"Error: {tool} is not installed. Run 'pip install {tool}' to install it.")
     except subprocess.SubprocessError as e:
-        print(f"Error: Could not process commands: {e}")
+        error = f"Could not process commands: {e}"
+        print(f"Error: {error}")
         if use_git:
             print("Are you in a git repository?")
     except Exception as e:
-        print(f"Unexpected error: {str(e)}")
\ No newline at end of file
+        error = f"Unexpected error: {str(e)}"
+        print(error)
+    # Report the failure as an error result for path, so --check does not pass when nothing was checked.
+    failure = FormatResult(path, False, error)
+    if reporter is not None:
+        reporter.format_result(failure, tool, check)
+    return [failure]
+
+def watch_code(path, tool='black', recursive=False, use_cache=True, jobs=None, debounce=0.05):
+    """Format path, then keep reformatting files as they change until interrupted.
+
+    Change events come from inotify on Linux and from polling elsewhere.
+    Bursts of events are debounced, and only the files that changed are
+    reformatted, in this process, with the formatter engines kept loaded
+    between runs.
+    """
+    engine = get_engine(tool)
+    if engine is None:
+        print(f"Error: watch mode needs {tool} installed in this Python environment. "
+              f"Run 'pip install {tool}' to install it.")
+        return
+
+    format_code(path, tool=tool, recursive=recursive, use_cache=use_cache, jobs=jobs)
+
+    only = os.path.abspath(path) if os.path.isfile(path) else None
+    root = os.path.dirname(only) if only else path
+    watcher = create_watcher(root, recursive=recursive and only is None)
+    cache = FormatCache(engine) if use_cache else None
+    method = 'inotify' if isinstance(watcher, InotifyWatcher) else 'polling'
+    print(f"Watching {path} for changes ({method}). Press Ctrl+C to stop.")
+    try:
+        for changed in watch_changes(watcher, debounce):
+            if changed is None:
+                print("Too many changes at once; rescanning...")
+                changed = {os.path.abspath(p) for p in _discover_paths(root, recursive)}
+            if only:
+                changed = {p for p in changed if p == only}
+            for changed_path in sorted(changed):
+                if not os.path.isfile(changed_path):
+                    continue
+                started = time.perf_counter()
+                try:
+                    if cache is not None and cache.is_formatted(changed_path):
+                        continue
+                except OSError:
+                    continue
+                result = format_hooked(changed_path, format_file, engine, changed_path)
+                if result.error:
+                    print(f"Error: Could not format {changed_path}: {result.error}")
+                    continue
+                if cache is not None:
+                    cache.mark_formatted(changed_path)
+                if result.changed:
+                    elapsed = (time.perf_counter() - started) * 1000
+                    print(f"reformatted {changed_path} ({elapsed:.0f} ms)")
+            if cache is not None:
+                cache.commit()
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+    finally:
+        watcher.close()
+        if cache is not None:
+            cache.close()
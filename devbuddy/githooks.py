@@ -0,0 +1,175 @@
+"""
+Git hook integration for DevBuddy.
+The pre-commit hook formats the staged version of each Python file straight
+from the index: blobs are read with one `git cat-file --batch`, formatted in
+memory, written back as new blobs and swapped into the index in one batch.
+Unstaged changes in the working tree are never pulled into the commit.
+Optionally the staged blobs are first scanned for committed credentials.
+"""
+
+import os
+import stat
+import sys
+
+from .engines import get_engine
+from .formatter import FormatResult, decode_source, format_hooked, write_source
+from .secretscan import is_binary, scan_bytes
+from .gitutils import (git, index_entries, read_blobs, repo_root, staged_files, unstaged_files, update_index,
+                       write_blobs)
+
+HOOK_MARKER = '# Installed by DevBuddy'
+# Regular files and executables; symlinks (120000) and submodules (160000) are skipped.
+_FILE_MODES = ('100644', '100755')
+
+_HOOK_SCRIPT = """#!/bin/sh
+{marker}: formats staged Python files before each commit.
+# Remove with: dbuddy hooks uninstall
+exec "{python}" -m devbuddy.cli hooks run --tool {tool}{check}{secrets}
+"""
+
+
+def hook_path(cwd=None, name='pre-commit'):
+    """Return the path of a git hook, honouring core.hooksPath."""
+    root = repo_root(cwd)
+    hooks_dir = git(['rev-parse', '--git-path', 'hooks'], cwd=root).strip()
+    return os.path.join(root, hooks_dir, name)
+
+
+def is_devbuddy_hook(path):
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            return HOOK_MARKER in f.read()
+    except OSError:
+        return False
+
+
+def install_hook(cwd=None, tool='black', check=False, secrets=False, force=False):
+    """Install the pre-commit hook and return its path.
+
+    With secrets the hook also rejects commits whose staged files contain
+    credentials. An existing hook that DevBuddy did not install is only replaced with
+    force, and is then kept next to it as pre-commit.bak.
+    """
+    path = hook_path(cwd)
+    if os.path.exists(path) and not is_devbuddy_hook(path):
+        if not force:
+            raise FileExistsError(f"A pre-commit hook already exists at {path}")
+        os.replace(path, path + '.bak')
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8', newline='\n') as f:
+        f.write(_HOOK_SCRIPT.format(marker=HOOK_MARKER, python=sys.executable, tool=tool,
+                                    check=' --check' if check else '', secrets=' --secrets' if secrets else ''))
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return path
+
+
+def uninstall_hook(cwd=None):
+    """Remove the pre-commit hook if DevBuddy installed it. Returns True if removed."""
+    path = hook_path(cwd)
+    if not is_devbuddy_hook(path):
+        return False
+    os.unlink(path)
+    return True
+
+
+def _update_working_tree(abs_path, blob, formatted, newline):
+    """Write the formatted text to a file whose content matches its staged blob."""
+    try:
+        with open(abs_path, 'rb') as f:
+            if f.read() != blob:
+                # Clean/smudge filters or autocrlf made the checkout differ from
+                # the blob; leave it rather than guess at the conversion.
+                return False
+    except OSError:
+        return False
+    write_source(abs_path, formatted, newline)
+    return True
+
+
+def scan_staged_secrets(cwd=None):
+    """Scan the staged version of every file for secrets and return an exit status.
+
+    The status is 1, after each finding has been listed, if any staged file
+    contains a possible secret. Binary files are skipped.
+    """
+    root = repo_root(cwd)
+    staged = set(staged_files(root))
+    if not staged:
+        return 0
+    entries = [e for e in index_entries(root) if e.path in staged and e.mode in _FILE_MODES]
+    found = []
+    for entry, blob in zip(entries, read_blobs([e.sha for e in entries], root)):
+        if not is_binary(blob):
+            found.extend(scan_bytes(blob, entry.path))
+    for m in found:
+        print(f"{m.path}:{m.line}:{m.column}: {m.code}: {m.text} ({m.symbol})")
+    if found:
+        print(f"{len(found)} possible secrets in staged files. Remove them from the index, or mark a false "
+              f"positive with '# noqa: <code>' on its line.")
+    return 1 if found else 0
+
+
+def format_staged(cwd=None, tool='black', check=False):
+    """Format the staged versions of Python files and return an exit status.
+
+    Files whose working tree matches the index are updated on disk too.
+    Partially staged files only get a new index entry, so their unstaged
+    edits stay as they are. With check nothing is written and the status
+    is 1 if any staged file would be reformatted.
+    """
+    root = repo_root(cwd)
+    staged = {p for p in staged_files(root) if p.endswith('.py')}
+    if not staged:
+        return 0
+    engine = get_engine(tool)
+    if engine is None:
+        print(f"Error: the DevBuddy pre-commit hook needs {tool} installed in {sys.executable}. "
+              f"Run 'pip install {tool}' to install it.")
+        return 1
+
+    entries = [e for e in index_entries(root) if e.path in staged and e.mode in _FILE_MODES]
+    blobs = read_blobs([e.sha for e in entries], root)
+    updates, failed = [], []
+
+    def format_entry(entry, blob, path):
+        try:
+            source, newline = decode_source(blob)
+            formatted = engine.format_source(source, path)
+        except Exception as e:
+            return FormatResult(path, False, str(e))
+        if formatted != source:
+            updates.append((entry, blob, formatted, newline))
+        return FormatResult(path, formatted != source, None)
+
+    for entry, blob in zip(entries, blobs):
+        path = os.path.join(root, entry.path)
+        result = format_hooked(path, format_entry, entry, blob, path)
+        if result.error:
+            failed.append((entry.path, result.error))
+
+    for path, error in failed:
+        print(f"Error: Could not format staged {path}: {error}")
+    if check:
+        for entry, _, _, _ in updates:
+            print(f"would reformat {entry.path}")
+        if updates:
+            print(f"{len(updates)} staged files would be reformatted by {tool}. "
+                  f"Run 'dbuddy format' and stage the result.")
+        return 1 if updates or failed else 0
+    if not updates:
+        return 1 if failed else 0
+
+    # Must be read before the index changes, while it still holds the staged content.
+    partially_staged = set(unstaged_files(root))
+    shas = write_blobs([formatted.replace('\n', newline).encode('utf-8')
+                        for _, _, formatted, newline in updates], root)
+    update_index([entry._replace(sha=sha) for (entry, _, _, _), sha in zip(updates, shas)], root)
+
+    for entry, blob, formatted, newline in updates:
+        if entry.path in partially_staged or not _update_working_tree(os.path.join(root, entry.path), blob,
+                                                                      formatted, newline):
+            print(f"reformatted {entry.path} (staged version only; the working tree was left as it is)")
+        else:
+            print(f"reformatted {entry.path}")
+    print(f"{len(updates)} staged files reformatted with {tool}.")
+    return 1 if failed else 0
@@ -0,0 +1,238 @@
+"""
+Helpers for reading changes out of a git repository.
+Output is requested NUL-separated where git supports it, so renames and
+paths containing spaces or newlines are handled correctly.
+"""
+
+import os
+import re
+import subprocess
+import tempfile
+from collections import namedtuple
+
+# A file changed relative to a base revision. `status` is the one-letter
+# git status (A, M, R, C, D, T, or '?' for untracked files) and `old_path`
+# is set for renames and copies. Paths are absolute.
+ChangedFile = namedtuple('ChangedFile', ['path', 'status', 'old_path'])
+
+# A stage-0 index entry: file mode and blob id as strings, and the path
+# relative to the repository root.
+IndexEntry = namedtuple('IndexEntry', ['mode', 'sha', 'path'])
+
+_HUNK_RE = re.compile(r'^@@ -\d+(?:,(\d+))? \+(\d+)(?:,(\d+))? @@')
+_ESCAPES = {'a': '\a', 'b': '\b', 't': '\t', 'n': '\n', 'v': '\v', 'f': '\f', 'r': '\r', '"': '"', '\\': '\\'}
+
+
+def git(args, cwd=None, input=None):
+    """Run a git command and return its stdout as text."""
+    result = subprocess.run(['git'] + list(args), cwd=cwd, input=input, capture_output=True,
+                            text=True, encoding='utf-8', errors='surrogateescape', check=True)
+    return result.stdout
+
+
+def repo_root(cwd=None):
+    """Return the top-level directory of the repository containing cwd."""
+    return git(['rev-parse', '--show-toplevel'], cwd=cwd).strip()
+
+
+def has_commits(cwd=None):
+    """Return True if HEAD points at a commit."""
+    try:
+        git(['rev-parse', '--verify', '--quiet', 'HEAD'], cwd=cwd)
+        return True
+    except subprocess.CalledProcessError:
+        return False
+
+
+def merge_base(base, cwd=None):
+    """Return the commit where HEAD branched off base (for a branch), or base itself if there is none."""
+    try:
+        return git(['merge-base', base, 'HEAD'], cwd=cwd).strip() or base
+    except subprocess.CalledProcessError:
+        return base
+
+
+def _diff_base_args(base, cwd):
+    """Return the revision arguments for comparing the working tree against base."""
+    if base == 'HEAD' and not has_commits(cwd):
+        # Nothing committed yet: everything in the index is new.
+        return ['--cached']
+    return [base]
+
+
+def changed_files(cwd=None, base='HEAD', include_untracked=True):
+    """Return ChangedFile entries for the working tree compared to base.
+
+    Deleted files are included with status 'D' so callers can skip them.
+    """
+    root = repo_root(cwd)
+    output = git(['diff', '-z', '--name-status', '-M', '--no-ext-diff'] + _diff_base_args(base, cwd), cwd=root)
+    fields = output.split('\0')
+    files = []
+    i = 0
+    while i < len(fields) and fields[i]:
+        status = fields[i][0]
+        if status in ('R', 'C'):
+            old_path, new_path = fields[i + 1], fields[i + 2]
+            files.append(ChangedFile(os.path.join(root, new_path), status, os.path.join(root, old_path)))
+            i += 3
+        else:
+            files.append(ChangedFile(os.path.join(root, fields[i + 1]), status, None))
+            i += 2
+
+    if include_untracked:
+        output = git(['ls-files', '-z', '--others', '--exclude-standard'], cwd=root)
+        for path in output.split('\0'):
+            if path:
+                files.append(ChangedFile(os.path.join(root, path), '?', None))
+    return files
+
+
+def _unquote_path(path):
+    """Undo git's C-style quoting of unusual path names."""
+    if not (path.startswith('"') and path.endswith('"')):
+        return path
+    body = path[1:-1]
+    out = bytearray()
+    i = 0
+    while i < len(body):
+        c = body[i]
+        if c == '\\' and i + 1 < len(body):
+            nxt = body[i + 1]
+            if nxt in _ESCAPES:
+                out.extend(_ESCAPES[nxt].encode())
+                i += 2
+                continue
+            if body[i + 1:i + 4].isdigit():
+                out.append(int(body[i + 1:i + 4], 8))
+                i += 4
+                continue
+        out.extend(c.encode('utf-8', 'surrogateescape'))
+        i += 1
+    return out.decode('utf-8', 'surrogateescape')
+
+
+def changed_line_ranges(cwd=None, base='HEAD', paths=None):
+    """Return {path: [(start, end), ...]} of added or modified lines per file.
+
+    Line numbers are 1-based and inclusive and refer to the working-tree
+    version of each file. Files with only deletions map to an empty list.
+    Untracked files are not included. Pass paths to limit the diff; include
+    the old path of renamed files so the rename is detected.
+    """
+    root = repo_root(cwd)
+    args = ['diff', '-U0', '-M', '--no-color', '--no-ext-diff', '--src-prefix=a/', '--dst-prefix=b/']
+    args += _diff_base_args(base, cwd)
+    if paths is not None:
+        args += ['--'] + [os.path.relpath(p, root) for p in paths]
+    output = git(args, cwd=root)
+
+    ranges = {}
+    current = None
+    remaining = 0  # lines of the current hunk still to skip
+    for line in output.split('\n'):
+        if remaining:
+            # Hunk content, even if it looks like a header, e.g. an added line
+            # starting with '++ '. With -U0 a hunk has only removed and added lines.
+            if not line.startswith('\\'):
+                remaining -= 1
+            continue
+        if line.startswith('+++ '):
+            target = line[4:]
+            if target == '/dev/null':
+                current = None
+                continue
+            target = _unquote_path(target.rstrip('\t'))
+            current = os.path.join(root, target[2:]) if target.startswith('b/') else None
+            if current is not None:
+                ranges.setdefault(current, [])
+        elif line.startswith('@@'):
+            match = _HUNK_RE.match(line)
+            if not match:
+                continue
+            removed = int(match.group(1)) if match.group(1) is not None else 1
+            start = int(match.group(2))
+            count = int(match.group(3)) if match.group(3) is not None else 1
+            remaining = removed + count
+            if current is not None and count:
+                ranges[current].append((start, start + count - 1))
+    return ranges
+
+
+def staged_files(cwd=None):
+    """Return the paths, relative to the repository root, of files added,
+    copied, modified or renamed in the index."""
+    root = repo_root(cwd)
+    output = git(['diff', '--cached', '-z', '--name-only', '--diff-filter=ACMR', '--no-ext-diff'], cwd=root)
+    return [p for p in output.split('\0') if p]
+
+
+def unstaged_files(cwd=None):
+    """Return the paths, relative to the repository root, of files whose
+    working-tree content differs from the index."""
+    root = repo_root(cwd)
+    output = git(['diff', '-z', '--name-only', '--no-ext-diff'], cwd=root)
+    return [p for p in output.split('\0') if p]
+
+
+def index_entries(cwd=None):
+    """Return an IndexEntry for every merged (stage 0) file in the index."""
+    root = repo_root(cwd)
+    entries = []
+    for record in git(['ls-files', '-s', '-z'], cwd=root).split('\0'):
+        if not record:
+            continue
+        info, path = record.split('\t', 1)
+        mode, sha, stage = info.split(' ')
+        if stage == '0':
+            entries.append(IndexEntry(mode, sha, path))
+    return entries
+
+
+def read_blobs(shas, cwd=None):
+    """Return the contents of the given blobs as bytes, using one git process."""
+    if not shas:
+        return []
+    request = ''.join(f"{sha}\n" for sha in shas).encode()
+    result = subprocess.run(['git', 'cat-file', '--batch'], cwd=cwd, input=request, capture_output=True, check=True)
+    output = result.stdout
+    blobs = []
+    offset = 0
+    for sha in shas:
+        header_end = output.index(b'\n', offset)
+        header = output[offset:header_end].split()
+        if len(header) != 3:
+            raise ValueError(f"Could not read blob {sha}: {output[offset:header_end].decode(errors='replace')}")
+        size = int(header[2])
+        start = header_end + 1
+        blobs.append(output[start:start + size])
+        offset = start + size + 1  # skip the newline that follows each blob
+    return blobs
+
+
+def write_blobs(contents, cwd=None):
+    """Store each bytes object in contents as a blob and return their ids.
+
+    The contents are written as-is, without clean filters or line-ending
+    conversion, by a single git process.
+    """
+    if not contents:
+        return []
+    with tempfile.TemporaryDirectory(prefix='devbuddy-blobs-') as tmp:
+        paths = []
+        for i, data in enumerate(contents):
+            path = os.path.join(tmp, str(i))
+            with open(path, 'wb') as f:
+                f.write(data)
+            paths.append(path)
+        output = git(['hash-object', '-w', '--no-filters', '--stdin-paths'], cwd=cwd, input='\n'.join(paths) + '\n')
+    return output.split()
+
+
+def update_index(entries, cwd=None):
+    """Point the index at new blobs for the given IndexEntry objects in one batch."""
+    if not entries:
+        return
+    root = repo_root(cwd)
+    git(['update-index', '-z', '--index-info'], cwd=root,
+        input=''.join(f"{e.mode} {e.sha}\t{e.path}\0" for e in entries))
@@ -0,0 +1,427 @@
+"""
+Import graphs for Python projects.
+Each file's import statements are read from its AST, without importing
+anything, and cached by content hash, so only changed files are parsed
+again. Modules are named from the package layout on disk, imports are
+resolved against the project's own modules (`import a.b.c` also depends on
+the packages a and a.b, whose __init__ modules run first), and import
+cycles are found with Tarjan's strongly connected components algorithm in
+a single pass over the graph. The graph can be exported as Graphviz DOT or JSON.
+"""
+
+import ast
+import json
+import os
+from collections import Counter, deque, namedtuple
+
+from .analyzer import AnalysisResult, Message
+from .cache import ResultCache
+from .parallel import default_jobs, iter_balanced_chunks, map_chunks
+
+# Bump when the stored form of a file's imports changes.
+EXTRACTOR_VERSION = 1
+TOP_FAN_IN = 10
+
+# An import statement as written: `module` is the dotted name after `import`
+# or `from` ('' for `from . import x`), `level` the number of leading dots,
+# and `names` the imported names of a from-import (None for `import x`).
+# `scope` is where it runs: only 'module' imports run when the module is
+# imported, so only they can make an import cycle fail or slow startup;
+# 'function' imports wait until the function is called and 'type-checking'
+# imports (under `if TYPE_CHECKING:`) never run.
+RawImport = namedtuple('RawImport', ['module', 'level', 'names', 'line', 'scope'])
+
+# An edge of the graph between two of the project's modules.
+ImportEdge = namedtuple('ImportEdge', ['source', 'target', 'line', 'scope'])
+
+
+def _is_type_checking(test):
+    return (isinstance(test, ast.Name) and test.id == 'TYPE_CHECKING'
+            or isinstance(test, ast.Attribute) and test.attr == 'TYPE_CHECKING')
+
+
+def _collect(statements, scope, imports):
+    """Append the RawImports in a list of statements, descending only into statements."""
+    for node in statements:
+        if isinstance(node, ast.Import):
+            imports.extend(RawImport(alias.name, 0, None, node.lineno, scope) for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            imports.append(RawImport(node.module or '', node.level, [alias.name for alias in node.names],
+                                     node.lineno, scope))
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            _collect(node.body, 'function', imports)
+        elif isinstance(node, ast.If) and scope == 'module' and _is_type_checking(node.test):
+            _collect(node.body, 'type-checking', imports)
+            _collect(node.orelse, scope, imports)
+        else:
+            # Class bodies, conditionals, loops, with blocks and try statements run in the enclosing scope.
+            for field in ('body', 'orelse', 'finalbody'):
+                _collect(getattr(node, field, ()), scope, imports)
+            for handler in getattr(node, 'handlers', ()):
+                _collect(handler.body, scope, imports)
+            for case in getattr(node, 'cases', ()):
+                _collect(case.body, scope, imports)
+
+
+def extract_imports(source, path='<string>'):
+    """Return the RawImports of a module's source."""
+    if (b'import' if isinstance(source, bytes) else 'import') not in source:
+        return []
+    imports = []
+    _collect(ast.parse(source, filename=path).body, 'module', imports)
+    return imports
+
+
+def _parse_chunk(paths):
+    """Read the imports of a chunk of files. Runs inside pool workers."""
+    results = []
+    for path in paths:
+        try:
+            with open(path, 'rb') as f:
+                results.append((path, extract_imports(f.read(), path), None))
+        except (OSError, SyntaxError, ValueError, RecursionError) as e:
+            results.append((path, None, str(e) or e.__class__.__name__))
+    return results
+
+
+class ImportCache:
+    """Remember each file's imports by content hash."""
+
+    def __init__(self, cache_dir=None):
+        self.store = ResultCache('imports', cache_dir)
+
+    def _key(self, path):
+        return f"imports|{EXTRACTOR_VERSION}|{self.store.file_digest(path)}"
+
+    def get(self, path):
+        """Return the cached RawImports for path's current content, or None."""
+        value = self.store.get(self._key(path))
+        if value is None:
+            return None
+        return [RawImport(*fields) for fields in json.loads(value)]
+
+    def set(self, path, imports):
+        self.store.set(self._key(path), json.dumps(imports))
+
+    def commit(self):
+        self.store.commit()
+
+    def close(self):
+        self.store.close()
+
+
+def read_imports(paths, jobs=None, cache=None):
+    """Yield (path, RawImports, error) for every path, parsing only cache misses across `jobs` processes."""
+    jobs = jobs or default_jobs()
+    misses = []
+    for path in paths:
+        try:
+            imports = cache.get(path) if cache is not None else None
+        except OSError as e:
+            yield path, None, str(e)
+            continue
+        if imports is None:
+            misses.append(path)
+        else:
+            yield path, imports, None
+    for chunk, results, error in map_chunks(_parse_chunk, iter_balanced_chunks(misses, jobs), jobs):
+        if error is not None:
+            results = [(p, None, str(error)) for p in chunk]
+        for path, imports, file_error in results:
+            if cache is not None and file_error is None:
+                cache.set(path, imports)
+            yield path, imports, file_error
+        if cache is not None:
+            cache.commit()
+
+
+class _ModuleNamer:
+    """Name modules from the package layout: a file's module path starts
+    at the first directory above it without an __init__.py."""
+
+    def __init__(self):
+        self._packages = {}
+
+    def _package(self, directory):
+        if directory not in self._packages:
+            if os.path.isfile(os.path.join(directory, '__init__.py')):
+                parent = os.path.dirname(directory)
+                prefix = self._package(parent) if parent != directory else ''
+                name = os.path.basename(directory)
+                self._packages[directory] = f"{prefix}.{name}" if prefix else name
+            else:
+                self._packages[directory] = ''
+        return self._packages[directory]
+
+    def __call__(self, path):
+        """Return (module name, is_package) for a Python file."""
+        path = os.path.abspath(path)
+        package = self._package(os.path.dirname(path))
+        stem = os.path.splitext(os.path.basename(path))[0]
+        if stem == '__init__':
+            return package, True
+        return (f"{package}.{stem}" if package else stem), False
+
+
+def strongly_connected_components(graph):
+    """Return the strongly connected components of graph ({node: successors}) with Tarjan's algorithm.
+
+    Iterative, so deep import chains cannot hit the recursion limit.
+    Components come out in reverse topological order.
+    """
+    index = {}
+    low = {}
+    stack = []
+    on_stack = set()
+    components = []
+    for root in graph:
+        if root in index:
+            continue
+        index[root] = low[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(graph[root]))]
+        while work:
+            node, successors = work[-1]
+            for successor in successors:
+                if successor not in index:
+                    index[successor] = low[successor] = len(index)
+                    stack.append(successor)
+                    on_stack.add(successor)
+                    work.append((successor, iter(graph.get(successor, ()))))
+                    break
+                if successor in on_stack:
+                    low[node] = min(low[node], index[successor])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+    return components
+
+
+class ImportGraph:
+    """The graph of imports between a project's modules.
+
+    Fill it with build(), or with analyze(), which also yields an
+    AnalysisResult per file as the usual analyze output; the graph can then
+    be queried and exported.
+    Imports of modules outside the project are not part of the graph.
+    """
+
+    def __init__(self):
+        self.modules = {}  # module name -> path
+        self.edges = []
+        self._namer = _ModuleNamer()
+        self._cycles = None
+
+    def build(self, paths, jobs=None, cache=None):
+        """Add the modules in paths and the imports between them.
+
+        Returns {path: error} for files that could not be read or parsed.
+        """
+        raw = {}
+        errors = {}
+        for path, imports, error in read_imports(paths, jobs, cache):
+            if error is not None:
+                errors[path] = error
+                continue
+            module, is_package = self.module_name(path)
+            if module in self.modules:
+                continue  # e.g. a script shadowed by a package of the same name
+            self.modules[module] = path
+            raw[module] = (is_package, imports)
+        for module, (is_package, imports) in raw.items():
+            self._add_edges(module, is_package, imports)
+        self._cycles = None
+        return errors
+
+    def analyze(self, paths, jobs=None, cache=None):
+        """Build the graph from paths and yield an AnalysisResult per file with a DB301 message per import
+        that closes a cycle."""
+        errors = self.build(paths, jobs, cache)
+        messages = {}
+        for cycle, edges in self.cycles():
+            text = "Import cycle: " + ' -> '.join(cycle + [cycle[0]])
+            for edge in edges:
+                path = self.modules[edge.source]
+                messages.setdefault(path, []).append(Message(path, edge.line, 0, 'DB301', 'import-cycle', text,
+                                                             'warning'))
+        for path in sorted(self.modules.values()):
+            yield AnalysisResult(path, messages.get(path, []), None)
+        for path, error in errors.items():
+            yield AnalysisResult(path, [], error)
+
+    def module_name(self, path):
+        """Return (module name, is_package) for a Python file, which need not exist."""
+        return self._namer(path)
+
+    def dependents(self, modules):
+        """Return the modules that import any of modules, directly or indirectly, in any scope,
+        together with modules themselves."""
+        importers = {}
+        for edge in self.edges:
+            importers.setdefault(edge.target, set()).add(edge.source)
+        found = set(modules)
+        queue = deque(found)
+        while queue:
+            for importer in importers.get(queue.popleft(), ()):
+                if importer not in found:
+                    found.add(importer)
+                    queue.append(importer)
+        return found
+
+    def resolve(self, name):
+        """Return the project module that importing name runs last: its longest prefix that is a module."""
+        while name:
+            if name in self.modules:
+                return name
+            name = name.rpartition('.')[0]
+        return None
+
+    def _add_edges(self, module, is_package, imports):
+        seen = set()
+        for imp in imports:
+            base = imp.module
+            if imp.level:
+                package = (module if is_package else module.rpartition('.')[0]).split('.')
+                if imp.level - 1 > len(package) or package == ['']:
+                    continue
+                base = '.'.join(package[:len(package) - (imp.level - 1)] + ([base] if base else []))
+            targets = []
+            if imp.names is None:
+                targets.append(self.resolve(base))
+            else:
+                # `from package import name` imports the submodule package.name if there is one.
+                submodules = [f"{base}.{name}" for name in imp.names if f"{base}.{name}" in self.modules]
+                targets.extend(submodules)
+                if len(submodules) < len(imp.names):
+                    targets.append(self.resolve(base))
+            for target in targets:
+                if target is None:
+                    continue
+                for name in self._with_parents(target, module):
+                    if (name, imp.scope) in seen:
+                        continue
+                    seen.add((name, imp.scope))
+                    self.edges.append(ImportEdge(module, name, imp.line, imp.scope))
+
+    def _with_parents(self, target, importer):
+        """Return the project packages that importing target runs first (outermost first), and target.
+
+        The importer itself and its own parent packages are left out: they
+        are imported before the importer's code runs, so e.g.
+        `from . import VERSION` in a package's __init__ adds no edge.
+        """
+        parts = target.split('.')
+        names = []
+        for i in range(1, len(parts)):
+            package = '.'.join(parts[:i])
+            if package in self.modules and package != importer and not importer.startswith(package + '.'):
+                names.append(package)
+        if target != importer:
+            names.append(target)
+        return names
+
+    def successors(self, scopes=('module',)):
+        """Return {module: [imported modules]} for imports in the given scopes."""
+        graph = {module: [] for module in self.modules}
+        for edge in self.edges:
+            if edge.scope in scopes and edge.target not in graph[edge.source]:
+                graph[edge.source].append(edge.target)
+        return graph
+
+    def cycles(self):
+        """Return [(cycle, edges)] for every import cycle among module-level imports.
+
+        Each strongly connected component of the graph is reported once, as
+        one shortest cycle through its first module (the modules in import
+        order, and the edges that close it).
+        """
+        if self._cycles is not None:
+            return self._cycles
+        graph = self.successors()
+        first_edge = {}
+        for edge in self.edges:
+            if edge.scope == 'module':
+                first_edge.setdefault((edge.source, edge.target), edge)
+        self._cycles = []
+        for component in strongly_connected_components(graph):
+            members = set(component)
+            if len(component) == 1 and component[0] not in graph[component[0]]:
+                continue
+            start = min(component)
+            cycle = _shortest_cycle(graph, start, members)
+            edges = [first_edge[(a, b)] for a, b in zip(cycle, cycle[1:] + cycle[:1])]
+            self._cycles.append((cycle, edges))
+        self._cycles.sort(key=lambda item: item[0])
+        return self._cycles
+
+    def fan_in(self, top=TOP_FAN_IN):
+        """Return [(module, importers)] for the modules imported by the most other modules."""
+        importers = Counter()
+        for _, target in {(edge.source, edge.target) for edge in self.edges if edge.source != edge.target}:
+            importers[target] += 1
+        return sorted(importers.items(), key=lambda item: (-item[1], item[0]))[:top]
+
+    def to_dict(self):
+        return {
+            'modules': [{'name': name, 'path': path} for name, path in sorted(self.modules.items())],
+            'edges': [edge._asdict() for edge in self.edges],
+            'cycles': [cycle for cycle, _ in self.cycles()],
+            'fan_in': dict(self.fan_in(len(self.modules))),
+        }
+
+    def to_dot(self):
+        """Return the graph in Graphviz DOT. Deferred imports are dashed, imports in cycles red."""
+        cycle_edges = {(edge.source, edge.target) for _, edges in self.cycles() for edge in edges}
+        lines = ['digraph imports {', '    node [shape=box, fontname="Helvetica"];']
+        for name in sorted(self.modules):
+            lines.append(f"    {json.dumps(name)};")
+        for edge in self.edges:
+            attributes = []
+            if edge.scope != 'module':
+                attributes.append('style=dashed')
+            elif (edge.source, edge.target) in cycle_edges:
+                attributes.append('color=red')
+            suffix = f" [{', '.join(attributes)}]" if attributes else ''
+            lines.append(f"    {json.dumps(edge.source)} -> {json.dumps(edge.target)}{suffix};")
+        lines.append('}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path, graph_format=None):
+        """Write the graph to path as DOT or JSON (by default from the file extension)."""
+        graph_format = graph_format or ('json' if path.endswith('.json') else 'dot')
+        with open(path, 'w', encoding='utf-8') as f:
+            if graph_format == 'json':
+                json.dump(self.to_dict(), f, indent=2)
+                f.write('\n')
+            else:
+                f.write(self.to_dot())
+
+
+def _shortest_cycle(graph, start, members):
+    """Return the shortest path from start back to itself within members, as a list of modules."""
+    parents = {start: None}
+    queue = deque([start])
+    while queue:
+        node = queue.popleft()
+        for successor in graph[node]:
+            if successor == start:
+                cycle = [node]
+                while parents[cycle[-1]] is not None:
+                    cycle.append(parents[cycle[-1]])
+                return cycle[::-1]
+            if successor in members and successor not in parents:
+                parents[successor] = node
+                queue.append(successor)
+    return [start]
@@ -0,0 +1,278 @@
+"""
+Formatters for the non-Python languages DevBuddy scaffolds.
+Files are grouped by extension and each group is handed to its language's
+command line formatter in as few invocations as the OS argument limit
+allows. Different languages are formatted concurrently.
+"""
+
+import os
+import re
+import shutil
+import subprocess
+import sys
+
+# Languages that `dbuddy format --languages` accepts. Python is formatted by
+# the in-process engines; the others by the external formatters below.
+PYTHON = 'python'
+ALL_LANGUAGES = 'all'
+
+# Stay well below ARG_MAX (and the 32k command line limit on Windows).
+MAX_ARGV_CHARS = 30000 if sys.platform == 'win32' else 100000
+
+_CARGO_EDITION_RE = re.compile(r'^\s*edition\s*=\s*["\'](\d{4})["\']', re.MULTILINE)
+_RUSTFMT_DIFF_RE = re.compile(r'^Diff in (.+?)(?: at line \d+|:\d+):\s*$', re.MULTILINE)
+_GOFMT_ERROR_RE = re.compile(r'^(.+?):\d+:\d+: (.*)$')
+_DOTNET_DIAGNOSTIC_RE = re.compile(r'^(.+?)\(\d+,\d+\): \w+ WHITESPACE:', re.MULTILINE)
+
+
+def _argv_chunks(paths, limit=MAX_ARGV_CHARS):
+    """Split paths into chunks whose combined length stays below limit."""
+    chunk, size = [], 0
+    for path in paths:
+        if chunk and size + len(path) + 1 > limit:
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(path)
+        size += len(path) + 1
+    if chunk:
+        yield chunk
+
+
+class LanguageFormatter:
+    """Run a language's command line formatter over batches of files.
+
+    Subclasses build the command line and work out which files changed
+    from the tool's output. `changed` is None for files the tool does not
+    report on individually.
+    """
+
+    language = None
+    tool = None
+    extensions = ()
+
+    def executable(self):
+        """Return the command prefix for the tool, or None if it is not installed."""
+        path = shutil.which(self.tool)
+        return [path] if path else None
+
+    def run_chunk(self, command, paths, check, diff):
+        """Format one batch of files. Returns ({path: changed}, {path: error}, output)."""
+        raise NotImplementedError
+
+    def run(self, paths, check=False, diff=False):
+        """Format paths in as few invocations as possible.
+
+        Returns (changed, errors, output) where changed maps each path to
+        True, False or None, errors maps failed paths to a message and
+        output is text the tool printed that should be shown to the user.
+        """
+        command = self.executable()
+        changed, errors, output = {}, {}, []
+        if command is None:
+            message = f"{self.tool} is not installed"
+            return changed, {p: message for p in paths}, ''
+        for chunk in _argv_chunks(paths):
+            try:
+                chunk_changed, chunk_errors, chunk_output = self.run_chunk(command, chunk, check, diff)
+            except subprocess.CalledProcessError as e:
+                # The first line of the tool's error output is usually the useful one.
+                detail = (e.stderr or '').strip().splitlines()[:1]
+                message = f"{self.tool} exited with status {e.returncode}" + (f": {detail[0]}" if detail else '')
+                errors.update((p, message) for p in chunk)
+                continue
+            except (OSError, subprocess.SubprocessError) as e:
+                errors.update((p, str(e)) for p in chunk)
+                continue
+            changed.update(chunk_changed)
+            errors.update(chunk_errors)
+            if chunk_output:
+                output.append(chunk_output)
+        return changed, errors, ''.join(output)
+
+
+def _run(command, cwd=None, ok_codes=(0,), env=None):
+    result = subprocess.run(command, cwd=cwd, capture_output=True, text=True, encoding='utf-8', errors='replace',
+                            env=env)
+    if result.returncode not in ok_codes:
+        raise subprocess.CalledProcessError(result.returncode, command, result.stdout,
+                                            result.stderr.strip() or result.stdout.strip())
+    return result
+
+
+def _listed(paths, stdout):
+    """Map paths to whether the tool listed them in stdout, one path per line."""
+    listed = {os.path.abspath(line) for line in stdout.splitlines() if line.strip()}
+    return {p: os.path.abspath(p) in listed for p in paths}
+
+
+class Gofmt(LanguageFormatter):
+    language = 'go'
+    tool = 'gofmt'
+    extensions = ('.go',)
+
+    def run_chunk(self, command, paths, check, diff):
+        # -l lists the files whose formatting differs; with -w they are rewritten too.
+        # Files that fail to parse are reported as "path:line:col: message"
+        # (exit status 2) and the rest of the batch is still processed.
+        result = _run(command + ['-l'] + ([] if check else ['-w']) + paths, ok_codes=(0, 2))
+        changed = _listed(paths, result.stdout)
+        errors = {}
+        if result.returncode:
+            by_path = {os.path.abspath(p): p for p in paths}
+            for line in result.stderr.splitlines():
+                match = _GOFMT_ERROR_RE.match(line)
+                if match and os.path.abspath(match.group(1)) in by_path:
+                    errors.setdefault(by_path[os.path.abspath(match.group(1))], match.group(2))
+            if not errors:
+                raise subprocess.CalledProcessError(result.returncode, command, result.stdout, result.stderr)
+        output = ''
+        if diff:
+            would_change = [p for p in paths if changed[p]]
+            if would_change:
+                output = _run(command + ['-d'] + would_change).stdout
+        return changed, errors, output
+
+
+class Rustfmt(LanguageFormatter):
+    language = 'rust'
+    tool = 'rustfmt'
+    extensions = ('.rs',)
+    # What cargo and rustfmt use for a crate (or file) that does not set an edition.
+    default_edition = '2015'
+
+    def __init__(self):
+        self._editions = {}
+
+    def edition(self, directory):
+        """Return the Rust edition of the crate containing directory."""
+        if directory in self._editions:
+            return self._editions[directory]
+        edition = self.default_edition
+        try:
+            with open(os.path.join(directory, 'Cargo.toml'), encoding='utf-8') as f:
+                match = _CARGO_EDITION_RE.search(f.read())
+            if match:
+                edition = match.group(1)
+        except OSError:
+            parent = os.path.dirname(directory)
+            if parent != directory:
+                edition = self.edition(parent)
+        self._editions[directory] = edition
+        return edition
+
+    def run(self, paths, check=False, diff=False):
+        # Files of crates on different editions need separate invocations.
+        by_edition = {}
+        for path in paths:
+            by_edition.setdefault(self.edition(os.path.dirname(os.path.abspath(path))), []).append(path)
+        changed, errors, output = {}, {}, []
+        for _, edition_paths in sorted(by_edition.items()):
+            group_changed, group_errors, group_output = super().run(edition_paths, check, diff)
+            changed.update(group_changed)
+            errors.update(group_errors)
+            output.append(group_output)
+        return changed, errors, ''.join(output)
+
+    def run_chunk(self, command, paths, check, diff):
+        # run() groups files by crate edition, so every file in a chunk shares one.
+        edition = self.edition(os.path.dirname(os.path.abspath(paths[0])))
+        command = command + ['--edition', edition, '--color', 'never']
+        if not check:
+            # -l prints the files that were reformatted.
+            return _listed(paths, _run(command + ['-l'] + paths).stdout), {}, ''
+        if not diff:
+            return _listed(paths, _run(command + ['--check', '-l'] + paths, ok_codes=(0, 1)).stdout), {}, ''
+        result = _run(command + ['--check'] + paths, ok_codes=(0, 1))
+        listed = {os.path.realpath(p) for p in _RUSTFMT_DIFF_RE.findall(result.stdout)}
+        return {p: os.path.realpath(p) in listed for p in paths}, {}, result.stdout
+
+
+class Prettier(LanguageFormatter):
+    language = 'javascript'
+    tool = 'prettier'
+    extensions = ('.js', '.jsx', '.mjs', '.cjs', '.ts', '.tsx', '.vue', '.css', '.scss', '.less', '.html', '.json')
+
+    def executable(self):
+        command = super().executable()
+        if command is None and shutil.which('npx'):
+            # Use a project-local prettier from node_modules, never download one.
+            command = [shutil.which('npx'), '--no-install', 'prettier']
+        return command
+
+    def run_chunk(self, command, paths, check, diff):
+        # --list-different prints the files that are (or were) not formatted
+        # and makes check runs exit with status 1 when there are any.
+        args = ['--list-different'] + ([] if check else ['--write'])
+        result = _run(command + args + paths, ok_codes=(0, 1))
+        changed = _listed(paths, result.stdout)
+        if result.returncode and not any(changed.values()):
+            # npx also exits with 1, e.g. when prettier is not installed locally.
+            raise subprocess.CalledProcessError(result.returncode, command, result.stdout,
+                                                result.stderr.strip() or result.stdout.strip())
+        return changed, {}, ''
+
+
+class DotnetFormat(LanguageFormatter):
+    language = 'dotnet'
+    tool = 'dotnet'
+    extensions = ('.cs', '.vb')
+
+    def run_chunk(self, command, paths, check, diff):
+        # --folder formats loose files without loading a project or solution;
+        # the included paths are relative to the folder.
+        abs_paths = [os.path.abspath(p) for p in paths]
+        folder = os.path.commonpath([os.path.dirname(p) for p in abs_paths])
+        args = ['format', 'whitespace', folder, '--folder', '--include']
+        args += [os.path.relpath(p, folder) for p in abs_paths]
+        env = dict(os.environ, DOTNET_NOLOGO='1', DOTNET_CLI_TELEMETRY_OPTOUT='1')
+        if not check:
+            # dotnet format does not say which files it rewrote.
+            _run(command + args, env=env)
+            return {p: None for p in paths}, {}, ''
+        # Verification exits with status 2 and prints one diagnostic per
+        # whitespace problem, prefixed with the file's path.
+        result = _run(command + args + ['--verify-no-changes'], ok_codes=(0, 2), env=env)
+        report = result.stdout + result.stderr
+        flagged = {os.path.abspath(os.path.join(folder, p)) for p in _DOTNET_DIAGNOSTIC_RE.findall(report)}
+        changed = {p: a in flagged for p, a in zip(paths, abs_paths)}
+        return changed, {}, report if diff and result.returncode else ''
+
+
+LANGUAGE_FORMATTERS = {f.language: f for f in (Gofmt(), Rustfmt(), Prettier(), DotnetFormat())}
+LANGUAGES = (PYTHON,) + tuple(LANGUAGE_FORMATTERS)
+
+
+def parse_languages(spec):
+    """Split a comma-separated --languages value, expanding 'all'."""
+    if isinstance(spec, str):
+        spec = spec.split(',')
+    languages = []
+    for name in spec:
+        name = name.strip().lower()
+        if name == ALL_LANGUAGES:
+            return list(LANGUAGES)
+        if name and name not in languages:
+            languages.append(name)
+    return languages
+
+
+def extension_map(languages):
+    """Return {extension: language} for the given languages."""
+    extensions = {}
+    for language in languages:
+        if language == PYTHON:
+            extensions['.py'] = PYTHON
+        elif language in LANGUAGE_FORMATTERS:
+            for extension in LANGUAGE_FORMATTERS[language].extensions:
+                extensions[extension] = language
+    return extensions
+
+
+def group_by_language(paths, extensions):
+    """Split paths into {language: [paths]} by file extension."""
+    groups = {}
+    for path in paths:
+        language = extensions.get(os.path.splitext(path)[1])
+        if language is not None:
+            groups.setdefault(language, []).append(path)
+    return groups
@@ -0,0 +1,412 @@
+"""
+Repository metrics for DevBuddy.
+Files are read in fixed-size buffers and their lines classified as code,
+comment or blank per language; Python files also get McCabe cyclomatic
+complexity per function. Workers aggregate their share of the tree into
+array-backed counters keyed by directory and language, so memory stays
+bounded by the number of directories rather than files or bytes.
+"""
+
+import ast
+import heapq
+import io
+import os
+from array import array
+from collections import namedtuple
+
+from .parallel import default_jobs, iter_balanced_chunks, map_chunks
+from .walker import iter_files
+
+# Read buffer size; lines longer than this are classified by their prefix.
+BUFFER_SIZE = 64 * 1024
+# Python files larger than this are counted but not parsed for complexity.
+MAX_PARSE_BYTES = 8 * 1024 * 1024
+# Number of most complex functions reported.
+TOP_FUNCTIONS = 10
+
+# Slots of a counter array.
+FIELDS = ('files', 'lines', 'code', 'comment', 'blank', 'complexity', 'functions')
+FILES, LINES, CODE, COMMENT, BLANK, COMPLEXITY, FUNCTIONS = range(len(FIELDS))
+
+# How a language writes comments. `blocks` are (open, close) pairs for
+# block comments; `strings` are block string delimiters whose contents are
+# code, except when they open a line, where they are docstrings.
+Language = namedtuple('Language', ['name', 'extensions', 'line_comments', 'blocks', 'strings'],
+                      defaults=[(), (), ()])
+
+_C_BLOCK = ((b'/*', b'*/'),)
+LANGUAGES = [
+    Language('python', ('.py', '.pyi'), (b'#',), (), ((b'"""', b'"""'), (b"'''", b"'''"))),
+    Language('c', ('.c', '.h'), (b'//',), _C_BLOCK),
+    Language('c++', ('.cc', '.cpp', '.cxx', '.hh', '.hpp', '.hxx'), (b'//',), _C_BLOCK),
+    Language('c#', ('.cs',), (b'//',), _C_BLOCK),
+    Language('java', ('.java',), (b'//',), _C_BLOCK),
+    Language('kotlin', ('.kt', '.kts'), (b'//',), _C_BLOCK),
+    Language('scala', ('.scala',), (b'//',), _C_BLOCK),
+    Language('swift', ('.swift',), (b'//',), _C_BLOCK),
+    Language('go', ('.go',), (b'//',), _C_BLOCK),
+    Language('rust', ('.rs',), (b'//',), _C_BLOCK),
+    Language('javascript', ('.js', '.jsx', '.mjs', '.cjs'), (b'//',), _C_BLOCK),
+    Language('typescript', ('.ts', '.tsx', '.mts', '.cts'), (b'//',), _C_BLOCK),
+    Language('php', ('.php',), (b'//', b'#'), _C_BLOCK),
+    Language('css', ('.css', '.scss', '.less'), (b'//',), _C_BLOCK),
+    Language('html', ('.html', '.htm', '.vue', '.xml', '.svg'), (), ((b'<!--', b'-->'),)),
+    Language('sql', ('.sql',), (b'--',), _C_BLOCK),
+    Language('lua', ('.lua',), (b'--',), ((b'--[[', b']]'),)),
+    Language('ruby', ('.rb',), (b'#',), ((b'=begin', b'=end'),)),
+    Language('shell', ('.sh', '.bash', '.zsh'), (b'#',)),
+    Language('yaml', ('.yml', '.yaml'), (b'#',)),
+    Language('toml', ('.toml',), (b'#',)),
+    Language('markdown', ('.md', '.rst')),
+]
+LANGUAGE_BY_EXTENSION = {ext: lang for lang in LANGUAGES for ext in lang.extensions}
+# Any other text file (Makefile, .txt, .cfg, ...), with the most common comment marker.
+TEXT = Language('text', (), (b'#',))
+
+# A function and its cyclomatic complexity, for the most-complex list.
+FunctionComplexity = namedtuple('FunctionComplexity', ['complexity', 'path', 'line', 'name'])
+
+
+def new_counter():
+    return array('q', bytes(8 * len(FIELDS)))
+
+
+def add_counter(total, counter):
+    for i, value in enumerate(counter):
+        total[i] += value
+
+
+def _find_unquoted(line, token, start=0):
+    """Find token in line outside double-quoted strings (a cheap heuristic)."""
+    index = line.find(token, start)
+    while index >= 0 and line.count(b'"', 0, index) % 2:
+        index = line.find(token, index + 1)
+    return index
+
+
+class LineClassifier:
+    """Classify lines as code, comment or blank, carrying block state between lines."""
+
+    def __init__(self, language):
+        self.language = language
+        # (close token, counts as comment) while inside a block comment or string.
+        self.block = None
+
+    def classify(self, line):
+        """Return CODE, COMMENT or BLANK for one line (bytes, without the newline)."""
+        stripped = line.strip()
+        if not stripped:
+            return BLANK
+        kind = None
+        if self.block is not None:
+            close, is_comment = self.block
+            end = stripped.find(close)
+            if end < 0:
+                return COMMENT if is_comment else CODE
+            self.block = None
+            kind = COMMENT if is_comment else CODE
+            stripped = stripped[end + len(close):].strip()
+            if not stripped:
+                return kind
+        rest_kind = self._classify_text(stripped)
+        return CODE if CODE in (kind, rest_kind) else rest_kind
+
+    def _classify_text(self, text):
+        language = self.language
+        if language.line_comments and text.startswith(language.line_comments):
+            return COMMENT
+        for opener, close in language.blocks:
+            if text.startswith(opener):
+                end = text.find(close, len(opener))
+                if end < 0:
+                    self.block = (close, True)
+                    return COMMENT
+                rest = text[end + len(close):].strip()
+                return self._classify_text(rest) if rest else COMMENT
+        for opener, close in language.strings:
+            if text.startswith(opener):
+                # A string opening a line is a docstring.
+                end = text.find(close, len(opener))
+                if end < 0:
+                    self.block = (close, True)
+                    return COMMENT
+                rest = text[end + len(close):].strip()
+                return self._classify_text(rest) if rest else COMMENT
+        self._open_trailing_block(text)
+        return CODE
+
+    def _open_trailing_block(self, text):
+        """Enter block state if a comment or string opens on a code line and is left open."""
+        # Nothing after a line comment can open a block.
+        limit = len(text)
+        for marker in self.language.line_comments:
+            index = _find_unquoted(text, marker)
+            if 0 <= index < limit:
+                limit = index
+        text = text[:limit]
+        position = 0
+        while True:
+            found = None
+            for tokens, is_comment in ((self.language.blocks, True), (self.language.strings, False)):
+                for opener, close in tokens:
+                    index = _find_unquoted(text, opener, position) if is_comment else text.find(opener, position)
+                    if index >= 0 and (found is None or index < found[0]):
+                        found = (index, opener, close, is_comment)
+            if found is None:
+                return
+            index, opener, close, is_comment = found
+            end = text.find(close, index + len(opener))
+            if end < 0:
+                self.block = (close, is_comment)
+                return
+            position = end + len(close)
+
+
+def count_lines(f, language, counter):
+    """Classify the lines read from a binary file object into counter.
+
+    The file is read in BUFFER_SIZE pieces; a partial line is carried over
+    between them, truncated to BUFFER_SIZE if it never ends. Returns False
+    (and counts nothing) if the file looks binary.
+    """
+    classifier = LineClassifier(language)
+    buffer = bytearray(BUFFER_SIZE)
+    view = memoryview(buffer)
+    partial = b''
+    first = True
+    lines = 0
+    while True:
+        n = f.readinto(buffer)
+        if not n:
+            break
+        data = view[:n].tobytes()
+        if first:
+            if b'\0' in data:
+                return False
+            first = False
+        pieces = data.split(b'\n')
+        pieces[0] = partial + pieces[0]
+        partial = pieces.pop()[:BUFFER_SIZE]
+        for line in pieces:
+            counter[classifier.classify(line)] += 1
+        lines += len(pieces)
+    if partial:
+        counter[classifier.classify(partial)] += 1
+        lines += 1
+    counter[LINES] += lines
+    counter[FILES] += 1
+    return True
+
+
+class _ComplexityVisitor(ast.NodeVisitor):
+    """McCabe complexity of each function: 1 plus one per decision point."""
+
+    def __init__(self):
+        self.functions = []
+        # Complexity of each enclosing function, and names of enclosing functions and classes.
+        self.stack = []
+        self.names = []
+
+    def _function(self, node):
+        self.names.append(node.name)
+        self.stack.append(1)
+        self.generic_visit(node)
+        complexity = self.stack.pop()
+        self.functions.append((complexity, node.lineno, '.'.join(self.names)))
+        self.names.pop()
+
+    visit_FunctionDef = visit_AsyncFunctionDef = _function
+
+    def visit_ClassDef(self, node):
+        self.names.append(node.name)
+        self.generic_visit(node)
+        self.names.pop()
+
+    def _decision(self, node, weight=1):
+        if self.stack:
+            self.stack[-1] += weight
+        self.generic_visit(node)
+
+    def visit_If(self, node):
+        self._decision(node)
+
+    visit_IfExp = visit_For = visit_AsyncFor = visit_While = visit_ExceptHandler = visit_Assert = visit_If
+
+    def visit_BoolOp(self, node):
+        self._decision(node, len(node.values) - 1)
+
+    def visit_comprehension(self, node):
+        self._decision(node, 1 + len(node.ifs))
+
+    def visit_match_case(self, node):
+        self._decision(node)
+
+
+def python_complexity(source, path='<string>'):
+    """Return [(complexity, line, qualified name)] for every function in source."""
+    visitor = _ComplexityVisitor()
+    visitor.visit(ast.parse(source, filename=path))
+    return visitor.functions
+
+
+def language_for(path):
+    """Return the Language of path by its extension, or TEXT for unknown extensions."""
+    return LANGUAGE_BY_EXTENSION.get(os.path.splitext(path)[1].lower(), TEXT)
+
+
+def measure_file(path, language=None):
+    """Measure one file. Returns (counter, functions), or None for binary files.
+
+    Files with an unknown extension are counted as TEXT. functions lists
+    (complexity, line, name) for Python files small enough to parse; it is
+    empty for other languages.
+    """
+    language = language or language_for(path)
+    counter = new_counter()
+    functions = []
+    with open(path, 'rb') as f:
+        if language.name == 'python' and os.fstat(f.fileno()).st_size <= MAX_PARSE_BYTES:
+            data = f.read()
+            if not count_lines(io.BytesIO(data), language, counter):
+                return None
+            try:
+                functions = python_complexity(data, path)
+            except (SyntaxError, ValueError, RecursionError):
+                functions = []
+        elif not count_lines(f, language, counter):
+            return None
+    counter[FUNCTIONS] = len(functions)
+    counter[COMPLEXITY] = sum(c for c, _, _ in functions)
+    return counter, functions
+
+
+def _measure_chunk(paths, root, top):
+    """Measure a chunk of files into per-(directory, language) counters. Runs inside pool workers."""
+    counters = {}
+    most_complex = []
+    skipped = []
+    for path in paths:
+        try:
+            measured = measure_file(path)
+        except OSError as e:
+            skipped.append((path, str(e)))
+            continue
+        if measured is None:
+            skipped.append((path, 'binary file'))
+            continue
+        counter, functions = measured
+        rel_dir = os.path.relpath(os.path.dirname(os.path.abspath(path)), root)
+        language = language_for(path).name
+        key = (rel_dir, language)
+        if key not in counters:
+            counters[key] = new_counter()
+        add_counter(counters[key], counter)
+        for complexity, line, name in functions:
+            item = FunctionComplexity(complexity, path, line, name)
+            if len(most_complex) < top:
+                heapq.heappush(most_complex, item)
+            elif item > most_complex[0]:
+                heapq.heapreplace(most_complex, item)
+    return counters, most_complex, skipped
+
+
+class Metrics:
+    """Aggregated metrics of a tree, keyed by directory (relative to root) and language."""
+
+    def __init__(self, root, top=TOP_FUNCTIONS):
+        self.root = os.path.abspath(root)
+        self.top = top
+        self.counters = {}
+        self.most_complex = []
+        self.skipped = []
+
+    def merge(self, counters, most_complex, skipped=()):
+        for key, counter in counters.items():
+            if key not in self.counters:
+                self.counters[key] = new_counter()
+            add_counter(self.counters[key], counter)
+        for item in most_complex:
+            if len(self.most_complex) < self.top:
+                heapq.heappush(self.most_complex, item)
+            elif item > self.most_complex[0]:
+                heapq.heapreplace(self.most_complex, item)
+        self.skipped.extend(skipped)
+
+    def total(self):
+        total = new_counter()
+        for counter in self.counters.values():
+            add_counter(total, counter)
+        return total
+
+    def by_language(self):
+        languages = {}
+        for (_, language), counter in self.counters.items():
+            add_counter(languages.setdefault(language, new_counter()), counter)
+        return languages
+
+    def by_directory(self, depth=1):
+        """Roll counters up to directories at most depth levels below the root."""
+        directories = {}
+        for (directory, _), counter in self.counters.items():
+            parts = [] if directory == os.curdir else directory.split(os.sep)
+            key = os.sep.join(parts[:depth]) or os.curdir
+            add_counter(directories.setdefault(key, new_counter()), counter)
+        return directories
+
+    def top_functions(self):
+        return sorted(self.most_complex, reverse=True)
+
+    def to_dict(self, depth=1):
+        def fields(counter):
+            return dict(zip(FIELDS, counter))
+        return {
+            'root': self.root,
+            'total': fields(self.total()),
+            'languages': {name: fields(c) for name, c in sorted(self.by_language().items())},
+            'directories': {name: fields(c) for name, c in sorted(self.by_directory(depth).items())},
+            'most_complex': [{'path': f.path, 'line': f.line, 'name': f.name, 'complexity': f.complexity}
+                             for f in self.top_functions()],
+            'skipped': len(self.skipped),
+        }
+
+
+def collect_metrics(path, jobs=None, top=TOP_FUNCTIONS):
+    """Measure every source file under path across `jobs` worker processes. Returns Metrics."""
+    jobs = jobs or default_jobs()
+    metrics = Metrics(path if os.path.isdir(path) else os.path.dirname(os.path.abspath(path)), top)
+    paths = iter_files(path, tuple(LANGUAGE_BY_EXTENSION))
+    chunks = iter_balanced_chunks(paths, jobs)
+    for chunk, result, error in map_chunks(_measure_chunk, chunks, jobs, metrics.root, top):
+        if error is not None:
+            metrics.skipped.extend((p, str(error)) for p in chunk)
+            continue
+        metrics.merge(*result)
+    return metrics
+
+
+def _table(title, rows, with_complexity):
+    columns = ['files', 'lines', 'code', 'comment', 'blank'] + (['complexity'] if with_complexity else [])
+    width = max([len(title)] + [len(name) for name, _ in rows])
+    lines = [f"{title:<{width}}" + ''.join(f"{c.capitalize():>12}" for c in columns)]
+    for name, counter in rows:
+        values = [counter[FIELDS.index(c)] for c in columns]
+        lines.append(f"{name:<{width}}" + ''.join(f"{v:>12}" for v in values))
+    return '\n'.join(lines)
+
+
+def format_table(metrics, depth=1):
+    """Render metrics as plain-text tables."""
+    languages = sorted(metrics.by_language().items(), key=lambda item: -item[1][CODE])
+    with_complexity = any(c[FUNCTIONS] for _, c in languages)
+    sections = [_table('Language', languages + [('Total', metrics.total())], with_complexity)]
+    directories = sorted(metrics.by_directory(depth).items(), key=lambda item: -item[1][CODE])
+    sections.append(_table('Directory', directories, with_complexity))
+    functions = metrics.top_functions()
+    if functions:
+        lines = ['Most complex Python functions:']
+        for f in functions:
+            lines.append(f"  {f.complexity:>4}  {os.path.relpath(f.path)}:{f.line} {f.name}")
+        sections.append('\n'.join(lines))
+    if metrics.skipped:
+        sections.append(f"{len(metrics.skipped)} files skipped (binary or unreadable).")
+    return '\n\n'.join(sections)
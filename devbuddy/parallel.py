@@ -0,0 +1,113 @@
+"""
+Helpers for spreading per-file work across worker processes.
+Files are split into size-balanced chunks so every worker gets a similar
+amount of work and no single command line grows past the OS argv limit.
+"""
+
+import heapq
+import itertools
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+
+# Aim for several chunks per worker so a slow chunk does not leave the
+# other workers idle at the end of a run.
+CHUNKS_PER_JOB = 4
+# Upper bound on files per chunk; keeps subprocess command lines short.
+MAX_CHUNK_FILES = 500
+# Lower bound on files per chunk, so a handful of files is handled in the
+# current process instead of paying for a worker pool.
+MIN_CHUNK_FILES = 8
+# Number of discovered files balanced together when paths arrive as a stream.
+WINDOW_FILES = 4096
+# Fixed cost assumed per file, so many tiny files still spread out evenly.
+PER_FILE_WEIGHT = 4096
+
+
+def default_jobs():
+    """Return the default number of workers (the CPU count)."""
+    return os.cpu_count() or 1
+
+
+def _file_weight(path):
+    try:
+        return os.path.getsize(path) + PER_FILE_WEIGHT
+    except OSError:
+        return PER_FILE_WEIGHT
+
+
+def balanced_chunks(paths, jobs, max_chunk_files=MAX_CHUNK_FILES, chunks_per_job=CHUNKS_PER_JOB):
+    """Split paths into chunks of roughly equal total file size.
+
+    Uses longest-processing-time-first assignment: the largest remaining file
+    always goes to the chunk with the least work so far.
+    """
+    paths = list(paths)
+    if not paths:
+        return []
+    count = max(1, min(-(-len(paths) // MIN_CHUNK_FILES), jobs * chunks_per_job))
+    count = max(count, -(-len(paths) // max_chunk_files))
+
+    weighted = sorted(((_file_weight(p), p) for p in paths), reverse=True)
+    chunks = [[] for _ in range(count)]
+    heap = [(0, i) for i in range(count)]
+    for weight, path in weighted:
+        total, index = heapq.heappop(heap)
+        chunks[index].append(path)
+        if len(chunks[index]) < max_chunk_files:
+            heapq.heappush(heap, (total + weight, index))
+    return [chunk for chunk in chunks if chunk]
+
+
+def iter_balanced_chunks(paths, jobs, window=WINDOW_FILES, **kwargs):
+    """Like balanced_chunks, but consume paths lazily in windows.
+
+    Chunks for the first window are yielded as soon as it has been read, so
+    work can start while the rest of the tree is still being discovered.
+    """
+    paths = iter(paths)
+    while True:
+        batch = list(itertools.islice(paths, window))
+        if not batch:
+            return
+        for chunk in balanced_chunks(batch, jobs, **kwargs):
+            yield chunk
+
+
+def map_chunks(func, chunks, jobs, *args, threads=False):
+    """Run func(chunk, *args) for every chunk across a worker pool.
+
+    Yields (chunk, result, error) tuples as chunks finish; error is the
+    exception raised by func, if any. Chunks may be a lazy iterable; only a
+    bounded number are submitted ahead of the workers. Work runs in the
+    current process when jobs is 1 or there is only one chunk. Set threads
+    for work that mostly waits on subprocesses.
+    """
+    chunks = iter(chunks)
+    head = list(itertools.islice(chunks, 2))
+    if jobs <= 1 or len(head) <= 1:
+        for chunk in itertools.chain(head, chunks):
+            try:
+                yield chunk, func(chunk, *args), None
+            except Exception as e:
+                yield chunk, None, e
+        return
+
+    executor_class = ThreadPoolExecutor if threads else ProcessPoolExecutor
+    max_in_flight = jobs * 2
+    with executor_class(max_workers=jobs) as pool:
+        pending = {}
+        for chunk in itertools.chain(head, chunks):
+            pending[pool.submit(func, chunk, *args)] = chunk
+            if len(pending) >= max_in_flight:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield _outcome(pending.pop(future), future)
+        for future in as_completed(pending):
+            yield _outcome(pending[future], future)
+
+
+def _outcome(chunk, future):
+    try:
+        return chunk, future.result(), None
+    except Exception as e:
+        return chunk, None, e
@@ -1,23 +1,41 @@
 """
 Plugin system for DevBuddy.
 Plugins can extend the core functionality with custom commands.
+
+A plugin lists its commands in a `plugin.json` manifest next to its
+`__init__.py`, e.g. {"commands": {"system-info": "Display system information."}}.
+Only the manifests are read when the CLI starts; a plugin is imported the
+first time one of its commands runs, so plugins with heavy dependencies do
+not slow down other commands or `dbuddy --help`. Plugins without a
+manifest are imported at startup, as before. A manifest can also list the
+lifecycle hooks (see devbuddy.plugins.hooks) the plugin subscribes to under
+"hooks"; the plugin is then imported when one of them first fires.
 """
 
 import os
+import functools
 import importlib
+import json
 import sys
 
+import click
+
+from .hooks import registry as hook_registry
+
+MANIFEST_NAME = 'plugin.json'
+# Installed plugins are packages in this directory.
+PLUGIN_DIR = os.path.dirname(os.path.abspath(__file__))
+
 def discover_plugins():
     """Discover all installed plugins."""
-    plugin_dir = os.path.dirname(__file__)
     plugins = []
     
-    # Look for plugin directories (excluding __pycache__ etc.)
-    for name in os.listdir(plugin_dir):
-        if name.startswith('__'):
+    # Look for plugin directories (excluding __pycache__, installs in progress etc.)
+    for name in os.listdir(PLUGIN_DIR):
+        if name.startswith(('__', '.')):
             continue
             
-        plugin_path = os.path.join(plugin_dir, name)
+        plugin_path = os.path.join(PLUGIN_DIR, name)
         if os.path.isdir(plugin_path) and os.path.exists(os.path.join(plugin_path, '__init__.py')):
             plugins.append(name)
             
@@ -29,18 +47,65 @@ def load_plugin(plugin_name):
         module_path = f"devbuddy.plugins.{plugin_name}"
         return importlib.import_module(module_path)
     except ImportError as e:
-        print(f"Error loading plugin {plugin_name}: {e}")
+        print(f"Error loading plugin {plugin_name}: {e}", file=sys.stderr)
         return None
 
+def read_manifest(plugin_name):
+    """Return ({command name: short help}, [hook names]) from a plugin's manifest, or None if it has none."""
+    path = os.path.join(PLUGIN_DIR, plugin_name, MANIFEST_NAME)
+    try:
+        with open(path, encoding='utf-8') as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"Error reading the manifest of plugin {plugin_name}: {e}", file=sys.stderr)
+        return None
+    commands = manifest.get('commands', {})
+    if isinstance(commands, list):
+        commands = dict.fromkeys(commands, '')
+    if not isinstance(commands, dict):
+        print(f"Error reading the manifest of plugin {plugin_name}: 'commands' must be an object",
+              file=sys.stderr)
+        return None
+    return commands, list(manifest.get('hooks', []))
+
+def load_plugin_commands(plugin_name, group, cmd_name):
+    """Import a plugin and register its commands on group; the lazy loader of its manifest's commands."""
+    plugin = load_plugin(plugin_name)
+    if plugin is None or not hasattr(plugin, 'register_commands'):
+        raise click.ClickException(f"Plugin {plugin_name} does not provide a register_commands function.")
+    try:
+        plugin.register_commands(group)
+    except Exception as e:
+        raise click.ClickException(f"Error registering commands from plugin {plugin_name}: {e}")
+    hook_registry.register_plugin(plugin_name, plugin)
+    if cmd_name not in group.commands:
+        raise click.ClickException(f"Plugin {plugin_name} lists {cmd_name} in its manifest "
+                                   f"but does not register it.")
+
 def register_plugin_commands(cli_group):
-    """Register commands from all available plugins with the CLI."""
+    """Register commands from all available plugins with the CLI.
+
+    Plugins with a manifest get lazy commands (on a
+    devbuddy.commands.LazyGroup) and lazy hook subscriptions, and are not imported yet; the others are imported
+    and registered straight away.
+    """
     plugins = discover_plugins()
     
     for plugin_name in plugins:
+        manifest = read_manifest(plugin_name)
+        if manifest is not None and hasattr(cli_group, 'add_lazy_command'):
+            commands, hook_names = manifest
+            for name, short_help in commands.items():
+                cli_group.add_lazy_command(name, functools.partial(load_plugin_commands, plugin_name), short_help)
+            hook_registry.add_lazy(plugin_name, hook_names)
+            continue
         plugin = load_plugin(plugin_name)
         if plugin and hasattr(plugin, 'register_commands'):
             try:
                 plugin.register_commands(cli_group)
-                print(f"Loaded plugin: {plugin_name}")
             except Exception as e:
-                print(f"Error registering commands from plugin {plugin_name}: {e}") 
\ No newline at end of file
+                print(f"Error registering commands from plugin {plugin_name}: {e}", file=sys.stderr)
+        if plugin:
+            hook_registry.register_plugin(plugin_name, plugin)
\ No newline at end of file
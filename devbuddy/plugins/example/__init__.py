@@ -9,6 +9,8 @@ import platform
 import subprocess
 import sys
 
+from devbuddy.metrics import BLANK, CODE, COMMENT, COMPLEXITY, FUNCTIONS, LINES, measure_file
+
 def get_system_info():
     """Get basic system information."""
     info = {
@@ -37,22 +39,27 @@ def register_commands(cli_group):
             click.echo(f"{key}: {value}")
             
     @cli_group.command()
-    @click.argument('file_path', type=click.Path(exists=True))
+    @click.argument('file_path', type=click.Path(exists=True, dir_okay=False))
     def count_lines(file_path):
-        """Count lines in a file."""
+        """Count lines in a file (see 'dbuddy metrics' for whole trees)."""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-                
-            total_lines = len(lines)
-            code_lines = len([line for line in lines if line.strip() and not line.strip().startswith('#')])
-            
-            click.echo(f"File: {os.path.basename(file_path)}")
-            click.echo(f"Total lines: {total_lines}")
-            click.echo(f"Code lines: {code_lines}")
-            click.echo(f"Comment/empty lines: {total_lines - code_lines}")
-        except Exception as e:
+            measured = measure_file(file_path)
+        except OSError as e:
             click.echo(f"Error reading file: {e}")
+            return
+        if measured is None:
+            click.echo(f"Binary file: {file_path}")
+            return
+        counter, functions = measured
+
+        click.echo(f"File: {os.path.basename(file_path)}")
+        click.echo(f"Total lines: {counter[LINES]}")
+        click.echo(f"Code lines: {counter[CODE]}")
+        click.echo(f"Comment lines: {counter[COMMENT]}")
+        click.echo(f"Empty lines: {counter[BLANK]}")
+        if functions:
+            click.echo(f"Functions: {counter[FUNCTIONS]} (total complexity {counter[COMPLEXITY]}, "
+                       f"max {max(c for c, _, _ in functions)})")
 
     # Return the commands if you want other plugins to extend them
     return {
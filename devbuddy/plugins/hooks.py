@@ -0,0 +1,261 @@
+"""
+Lifecycle hooks for DevBuddy plugins.
+Besides adding commands, a plugin can subscribe functions to events in the
+core commands by defining `register_hooks(hooks)`:
+
+    def register_hooks(hooks):
+        @hooks.on('post_format_file')
+        def log(result):
+            ...
+
+Plugins with a manifest list the hooks they use under "hooks", and are
+imported the first time one of those hooks fires. Firing a hook nobody
+subscribed to is a single set lookup. Every subscriber call is timed; the
+totals per command, plugin and hook are kept in the DevBuddy cache for
+`dbuddy plugin stats`, and per-hook time budgets can warn about or skip
+plugins that are too slow. A plugin skipped because of earlier runs is
+still timed every PROBE_EVERY runs, so it comes back once it is fast
+again.
+"""
+
+import atexit
+import json
+import sys
+import time
+
+# Hook name -> the keyword arguments its subscribers are called with.
+HOOKS = {
+    'pre_format_file': 'path',
+    'post_format_file': 'result (a FormatResult)',
+    'pre_analyze': 'path, label',
+    'post_analyze': 'path, label, messages',
+    'post_scaffold': 'project, project_type',
+    'pre_test': 'path, tests',
+    'post_test': 'path, status',
+}
+PRE_FORMAT_FILE = 'pre_format_file'
+POST_FORMAT_FILE = 'post_format_file'
+PRE_ANALYZE = 'pre_analyze'
+POST_ANALYZE = 'post_analyze'
+POST_SCAFFOLD = 'post_scaffold'
+PRE_TEST = 'pre_test'
+POST_TEST = 'post_test'
+
+# What happens when a plugin's hook call takes longer than its budget.
+BUDGET_ACTIONS = ('warn', 'skip')
+STATS_NAMESPACE = 'plugin-stats'
+# A plugin skipped for being over budget in its last timed run is timed again every this many runs.
+PROBE_EVERY = 10
+
+
+def _open_store(cache_dir=None):
+    # The registry is imported on every startup; the cache (and sqlite3) only when timings are read or saved.
+    from ..cache import ResultCache
+    return ResultCache(STATS_NAMESPACE, cache_dir)
+
+
+class PluginHooks:
+    """The object a plugin's register_hooks(hooks) receives; subscribes functions under the plugin's name."""
+
+    def __init__(self, hook_registry, plugin):
+        self.registry = hook_registry
+        self.plugin = plugin
+
+    def subscribe(self, hook, func):
+        self.registry.subscribe(hook, func, self.plugin)
+
+    def on(self, hook):
+        """Decorator form of subscribe."""
+        def decorator(func):
+            self.subscribe(hook, func)
+            return func
+        return decorator
+
+
+class HookRegistry:
+    """Subscribers to each hook, with timing accounting and budgets."""
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir
+        self.command = None
+        self.active = set()  # hooks with subscribers or lazily loaded plugins
+        self.subscribers = {}  # hook -> [(plugin, func)]
+        self.lazy = {}  # hook -> [plugin names not imported yet]
+        self.stats = {}  # (plugin, hook) -> [calls, total seconds, max seconds]
+        self.loaded = set()
+        self.skipped = set()
+        self.skipped_runs = {}  # (plugin, hook) -> runs skipped in a row because of earlier runs
+        self.warned = set()
+        self._budgets = None
+
+    def subscribe(self, hook, func, plugin):
+        if hook not in HOOKS:
+            raise ValueError(f"Unknown hook {hook!r}. Choose from: {', '.join(HOOKS)}")
+        self.subscribers.setdefault(hook, []).append((plugin, func))
+        self.active.add(hook)
+
+    def add_lazy(self, plugin, hooks):
+        """Import plugin the first time one of hooks fires."""
+        for hook in hooks:
+            if hook not in HOOKS:
+                print(f"Warning: Plugin {plugin} lists unknown hook {hook!r} in its manifest.", file=sys.stderr)
+                continue
+            self.lazy.setdefault(hook, []).append(plugin)
+            self.active.add(hook)
+
+    def register_plugin(self, plugin, module):
+        """Call a plugin module's register_hooks, once."""
+        if plugin in self.loaded:
+            return
+        self.loaded.add(plugin)
+        if hasattr(module, 'register_hooks'):
+            try:
+                module.register_hooks(PluginHooks(self, plugin))
+            except Exception as e:
+                print(f"Error registering hooks from plugin {plugin}: {e}", file=sys.stderr)
+
+    def _load_lazy(self, hook):
+        from . import load_plugin
+
+        for plugin in self.lazy.pop(hook, ()):
+            if plugin not in self.loaded:
+                module = load_plugin(plugin)
+                if module is not None:
+                    self.register_plugin(plugin, module)
+        if not self.subscribers.get(hook):
+            self.active.discard(hook)
+
+    def call(self, hook, **kwargs):
+        """Call every subscriber of hook with kwargs, timing each call.
+
+        A subscriber that raises is reported on stderr and does not stop
+        the command.
+        """
+        if hook not in self.active:
+            return
+        if hook in self.lazy:
+            self._load_lazy(hook)
+        for plugin, func in self.subscribers.get(hook, ()):
+            key = (plugin, hook)
+            if key in self.skipped or (self._budgets is None and self._load_budgets(key)):
+                continue
+            start = time.perf_counter()
+            try:
+                func(**kwargs)
+            except Exception as e:
+                print(f"Warning: Plugin {plugin} failed in its {hook} hook: {e}", file=sys.stderr)
+            self._account(key, time.perf_counter() - start)
+
+    def _account(self, key, elapsed):
+        entry = self.stats.get(key)
+        if entry is None:
+            if not self.stats:
+                atexit.register(self.save_stats)
+            entry = self.stats[key] = [0, 0.0, 0.0]
+        entry[0] += 1
+        entry[1] += elapsed
+        if elapsed > entry[2]:
+            entry[2] = elapsed
+        budget = self._budgets.get(key[1])
+        if budget is not None and elapsed * 1000 > budget[0] and key not in self.warned:
+            self.warned.add(key)
+            plugin, hook = key
+            action = ", skipping it for the rest of this run" if budget[1] == 'skip' else ""
+            print(f"Warning: Plugin {plugin} took {elapsed * 1000:.0f} ms in its {hook} hook "
+                  f"(budget {budget[0]:g} ms){action}.", file=sys.stderr)
+            if budget[1] == 'skip':
+                self.skipped.add(key)
+
+    def _load_budgets(self, key):
+        """Read the budgets, and the stats of earlier runs of this command, before the first timed call.
+
+        A plugin whose calls averaged over a 'skip' budget the last time
+        they were timed is skipped from the start, except every PROBE_EVERY
+        runs, when it is timed again. Returns True if key is skipped.
+        """
+        with _open_store(self.cache_dir) as store:
+            self._budgets = {k.split('|', 1)[1]: tuple(json.loads(v)) for k, v in store.items('budget|')}
+            prefix = f"stats|{self.command or ''}|"
+            history = {tuple(k[len(prefix):].split('|', 1)): json.loads(v) for k, v in store.items(prefix)}
+        for (plugin, hook), record in history.items():
+            budget = self._budgets.get(hook)
+            if budget is None or budget[1] != 'skip' or not record[0]:
+                continue
+            last_mean, skipped_runs = _recent(record)
+            if last_mean * 1000 <= budget[0]:
+                continue
+            if (skipped_runs + 1) % PROBE_EVERY == 0:
+                continue  # time it this run, to see whether it got faster
+            self.skipped.add((plugin, hook))
+            self.warned.add((plugin, hook))
+            self.skipped_runs[plugin, hook] = skipped_runs + 1
+            print(f"Warning: Skipping plugin {plugin} in the {hook} hook: it took {last_mean * 1000:.0f} ms "
+                  f"per call when last timed (budget {budget[0]:g} ms). See 'dbuddy plugin stats'.",
+                  file=sys.stderr)
+        if self.skipped_runs:
+            atexit.register(self.save_stats)
+        return key in self.skipped
+
+    def save_stats(self):
+        """Add this run's timings to the totals kept for `dbuddy plugin stats`.
+
+        Each record also keeps the mean time per call of the last run that
+        timed the plugin, and how many runs skipped it since.
+        """
+        if not self.stats and not self.skipped_runs:
+            return
+        with _open_store(self.cache_dir) as store:
+            for (plugin, hook), (calls, total, longest) in self.stats.items():
+                key = f"stats|{self.command or ''}|{plugin}|{hook}"
+                value = store.get(key)
+                old_calls, old_total, old_longest = json.loads(value)[:3] if value is not None else (0, 0.0, 0.0)
+                store.set(key, json.dumps([old_calls + calls, old_total + total, max(old_longest, longest),
+                                           total / calls, 0]))
+            for (plugin, hook), skipped_runs in self.skipped_runs.items():
+                key = f"stats|{self.command or ''}|{plugin}|{hook}"
+                value = store.get(key)
+                if value is not None and (plugin, hook) not in self.stats:
+                    record = json.loads(value)
+                    store.set(key, json.dumps(record[:3] + [_recent(record)[0], skipped_runs]))
+        self.stats = {}
+        self.skipped_runs = {}
+
+
+def _recent(record):
+    """Return (mean seconds per call in the last timed run, runs skipped since) from a stats record."""
+    if len(record) >= 5:
+        return record[3], record[4]
+    calls, total = record[0], record[1]  # written before the last run was recorded separately
+    return total / calls if calls else 0.0, 0
+
+
+def read_stats(cache_dir=None):
+    """Return ([(command, plugin, hook, calls, total seconds, max seconds)], {hook: (ms, action)})."""
+    with _open_store(cache_dir) as store:
+        rows = [tuple(key.split('|', 3)[1:]) + tuple(json.loads(value)[:3]) for key, value in store.items('stats|')]
+        budgets = {key.split('|', 1)[1]: tuple(json.loads(value)) for key, value in store.items('budget|')}
+    return rows, budgets
+
+
+def reset_stats(cache_dir=None):
+    with _open_store(cache_dir) as store:
+        for key, _ in store.items('stats|'):
+            store.delete(key)
+
+
+def set_budget(hook, milliseconds, action='warn', cache_dir=None):
+    """Set the time budget of each call to hook; None removes it."""
+    with _open_store(cache_dir) as store:
+        if milliseconds is None:
+            store.delete(f"budget|{hook}")
+        else:
+            store.set(f"budget|{hook}", json.dumps([milliseconds, action]))
+
+
+registry = HookRegistry()
+call_hook = registry.call
+
+
+def has_subscribers(hook):
+    """Return True if firing hook could call a plugin, e.g. to skip preparing its arguments."""
+    return hook in registry.active
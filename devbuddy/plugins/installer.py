@@ -0,0 +1,228 @@
+"""
+Plugin installation for DevBuddy.
+A plugin comes from a git repository, a local directory or an archive
+(.zip, .tar.gz, .tgz or .tar). Git repositories are fetched shallowly
+(one commit of one branch), several plugins are fetched at once, and each
+one is unpacked into a staging directory that replaces the installed copy
+in a single rename, so a failed install never leaves a half-written plugin.
+
+A plugin store is a directory mirroring plugins for machines without
+network access: it holds plugins as directories, archives or bare git
+repositories named after the plugin (optionally prefixed with
+`devbuddy-plugin-`), plus wheels of their dependencies for pip.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tarfile
+import tempfile
+import zipfile
+from collections import namedtuple
+
+from ..parallel import map_chunks
+from . import PLUGIN_DIR
+
+STORE_ENV = 'DEVBUDDY_PLUGIN_STORE'
+DEFAULT_URL = 'https://github.com/z0roday/devbuddy-plugin-{name}.git'
+ARCHIVE_EXTENSIONS = ('.zip', '.tar.gz', '.tgz', '.tar')
+# Concurrent fetches; they mostly wait on git and the network.
+MAX_FETCH_JOBS = 8
+
+# Where a plugin is installed from: kind is 'git', 'directory' or 'archive'.
+PluginSource = namedtuple('PluginSource', ['name', 'kind', 'location'])
+
+
+class PluginInstallError(Exception):
+    pass
+
+
+def _is_archive(path):
+    return path.lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+def _local_source(name, path):
+    if os.path.isdir(path):
+        if os.path.exists(os.path.join(path, 'HEAD')) and os.path.isdir(os.path.join(path, 'objects')):
+            # A bare repository; local clones ignore --depth unless given a file:// URL.
+            return PluginSource(name, 'git', 'file://' + os.path.abspath(path))
+        return PluginSource(name, 'directory', os.path.abspath(path))
+    if os.path.isfile(path) and _is_archive(path):
+        return PluginSource(name, 'archive', os.path.abspath(path))
+    return None
+
+
+def find_in_store(name, store):
+    """Return the PluginSource for name in a plugin store, or None."""
+    for base in (name, f"devbuddy-plugin-{name}"):
+        for suffix in ('',) + ARCHIVE_EXTENSIONS + ('.git',):
+            source = _local_source(name, os.path.join(store, base + suffix))
+            if source is not None:
+                return source
+    return None
+
+
+def find_source(name, url=None, store=None, offline=False):
+    """Work out where to install plugin name from.
+
+    url may be a git URL, a local directory or an archive. Without one, the
+    store is searched first, then the plugin's default GitHub repository is
+    used unless offline is set.
+    """
+    if url:
+        source = _local_source(name, url)
+        if source is not None:
+            return source
+        if offline and '://' in url and not url.startswith('file://'):
+            raise PluginInstallError(f"{url} is not available offline")
+        return PluginSource(name, 'git', url)
+    if store:
+        source = find_in_store(name, store)
+        if source is not None:
+            return source
+    if offline:
+        raise PluginInstallError(f"Plugin {name} is not in the plugin store" if store else
+                                 "--offline needs a plugin store (--store or DEVBUDDY_PLUGIN_STORE) or a local --url")
+    return PluginSource(name, 'git', DEFAULT_URL.format(name=name))
+
+
+def _git(*args):
+    subprocess.run(['git'] + list(args), check=True, stdin=subprocess.DEVNULL,
+                   stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+
+def _extract(archive, target):
+    """Unpack an archive into target, returning the plugin's root directory inside it."""
+    if archive.lower().endswith('.zip'):
+        with zipfile.ZipFile(archive) as f:
+            f.extractall(target)
+    else:
+        with tarfile.open(archive) as f:
+            if hasattr(tarfile, 'data_filter'):
+                f.extractall(target, filter='data')
+            else:
+                for member in f.getmembers():
+                    path = os.path.realpath(os.path.join(target, member.name))
+                    if not path.startswith(os.path.realpath(target) + os.sep) or member.issym() or member.islnk():
+                        raise PluginInstallError(f"{archive} contains unsafe path {member.name}")
+                f.extractall(target)
+    # Archives of a repository usually wrap everything in one top-level directory.
+    entries = os.listdir(target)
+    if len(entries) == 1 and os.path.isdir(os.path.join(target, entries[0])) \
+            and not os.path.exists(os.path.join(target, '__init__.py')):
+        return os.path.join(target, entries[0])
+    return target
+
+
+def _update_git(target, location):
+    """Move an installed git plugin to the default branch of location, fetching one commit.
+
+    The plugin is fetched from location rather than its origin, so an
+    install from a store or a new --url never reaches the old remote.
+    """
+    _git('-C', target, 'fetch', '--depth', '1', '--no-tags', location, 'HEAD')
+    _git('-C', target, 'reset', '--hard', '--quiet', 'FETCH_HEAD')
+    _git('-C', target, 'remote', 'set-url', 'origin', location)
+
+
+def fetch_plugin(source, plugin_dir=PLUGIN_DIR):
+    """Install source into plugin_dir, replacing any installed copy. Returns the plugin's directory.
+
+    An installed git checkout is updated in place with a shallow fetch from
+    source.location; anything else is staged next to it and swapped in.
+    """
+    target = os.path.join(plugin_dir, source.name)
+    if source.kind == 'git' and os.path.isdir(os.path.join(target, '.git')):
+        _update_git(target, source.location)
+        return target
+
+    staging = tempfile.mkdtemp(prefix=f".{source.name}-", dir=plugin_dir)
+    try:
+        if source.kind == 'git':
+            root = os.path.join(staging, 'plugin')
+            _git('clone', '--depth', '1', '--single-branch', '--no-tags', '--quiet', source.location, root)
+        elif source.kind == 'directory':
+            root = os.path.join(staging, 'plugin')
+            shutil.copytree(source.location, root, ignore=shutil.ignore_patterns('.git', '__pycache__'))
+        else:
+            root = _extract(source.location, os.path.join(staging, 'plugin'))
+        if not os.path.exists(os.path.join(root, '__init__.py')):
+            raise PluginInstallError(f"{source.location} is not a DevBuddy plugin: it has no __init__.py")
+        previous = None
+        if os.path.exists(target):
+            previous = os.path.join(staging, 'previous')
+            os.replace(target, previous)
+        try:
+            os.replace(root, target)
+        except OSError:
+            if previous is not None:
+                os.replace(previous, target)
+            raise
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return target
+
+
+def _fetch_chunk(sources, plugin_dir):
+    """Fetch one plugin. Runs inside pool threads."""
+    return [fetch_plugin(source, plugin_dir) for source in sources]
+
+
+def is_package(path):
+    """Return True if the plugin at path is pip-installed as a package rather than from a requirements.txt."""
+    if os.path.exists(os.path.join(path, 'requirements.txt')):
+        return False
+    return os.path.exists(os.path.join(path, 'setup.py')) or os.path.exists(os.path.join(path, 'pyproject.toml'))
+
+
+def install_dependencies(paths, store=None, offline=False):
+    """Install the dependencies of the plugins at paths in one pip run.
+
+    A plugin's requirements.txt is used when it has one; otherwise a
+    plugin with setup.py or pyproject.toml is installed as a package. With
+    a store, pip also looks for wheels there, and offline it looks nowhere
+    else.
+    """
+    args = []
+    for path in paths:
+        if is_package(path):
+            args.append(path)
+        elif os.path.exists(os.path.join(path, 'requirements.txt')):
+            args += ['-r', os.path.join(path, 'requirements.txt')]
+    if not args:
+        return
+    command = [sys.executable, '-m', 'pip', 'install', '--disable-pip-version-check']
+    if store:
+        command += ['--find-links', store]
+    if offline:
+        command.append('--no-index')
+    subprocess.run(command + args, check=True)
+
+
+def install_plugins(sources, store=None, offline=False, jobs=None, plugin_dir=PLUGIN_DIR):
+    """Fetch plugins concurrently, then install their dependencies.
+
+    Yields (name, error) for every source as it finishes; error is None on
+    success. Dependencies are installed once all plugins are fetched, in a
+    single pip run, since concurrent pip runs are not safe.
+    """
+    jobs = jobs or min(len(sources), MAX_FETCH_JOBS)
+    fetched = []
+    for chunk, result, error in map_chunks(_fetch_chunk, ([s] for s in sources), jobs, plugin_dir, threads=True):
+        source = chunk[0]
+        if error is None:
+            fetched.append((source.name, result[0]))
+            continue
+        if isinstance(error, subprocess.CalledProcessError):
+            error = (error.stderr or b'').decode('utf-8', 'replace').strip() or str(error)
+        yield source.name, str(error)
+    if fetched:
+        try:
+            install_dependencies([path for _, path in fetched], store, offline)
+        except (subprocess.CalledProcessError, OSError) as e:
+            for name, _ in fetched:
+                yield name, f"could not install its dependencies: {e}"
+            return
+    for name, _ in fetched:
+        yield name, None
@@ -0,0 +1,54 @@
+"""
+pytest plugin used by `dbuddy test`.
+It is loaded with `-p devbuddy.pytest_timing` and, when DEVBUDDY_TEST_REPORT
+names a file, appends one JSON object per test phase (setup, call and
+teardown) with the test's file, outcome and duration. dbuddy reads these
+records back to update its timing cache and to merge the results of
+several pytest processes into one report.
+"""
+
+import json
+import os
+
+REPORT_ENV = 'DEVBUDDY_TEST_REPORT'
+
+
+class TimingRecorder:
+    def __init__(self, rootpath, report_path):
+        self.rootpath = str(rootpath)
+        self.file = open(report_path, 'a', encoding='utf-8')
+
+    def pytest_runtest_logreport(self, report):
+        self.file.write(json.dumps({
+            'nodeid': report.nodeid,
+            'path': os.path.join(self.rootpath, report.location[0]),
+            'when': report.when,
+            'outcome': report.outcome,
+            'duration': report.duration,
+        }) + '\n')
+
+    def pytest_collectreport(self, report):
+        if report.failed:
+            self.file.write(json.dumps({
+                'nodeid': report.nodeid,
+                'path': os.path.join(self.rootpath, report.nodeid.split('::')[0]),
+                'when': 'collect',
+                'outcome': 'failed',
+                'duration': 0.0,
+            }) + '\n')
+
+    def close(self):
+        self.file.close()
+
+
+def pytest_configure(config):
+    report_path = os.environ.get(REPORT_ENV)
+    if report_path:
+        config.pluginmanager.register(TimingRecorder(config.rootpath, report_path), 'devbuddy-timing')
+
+
+def pytest_unconfigure(config):
+    recorder = config.pluginmanager.get_plugin('devbuddy-timing')
+    if recorder is not None:
+        recorder.close()
+        config.pluginmanager.unregister(recorder)
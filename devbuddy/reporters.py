@@ -0,0 +1,203 @@
+"""
+Machine-readable output for DevBuddy commands.
+Reporters write one record per finding or file as results arrive, in JSON
+Lines or SARIF 2.1.0 (for GitHub code scanning), without holding results in
+memory. While a reporter owns stdout, the usual human-readable output is
+sent to stderr.
+"""
+
+import json
+import os
+import pathlib
+import sys
+from contextlib import contextmanager, redirect_stdout
+
+OUTPUT_FORMATS = ('text', 'jsonl', 'sarif')
+
+SARIF_SCHEMA = 'https://json.schemastore.org/sarif-2.1.0.json'
+SARIF_VERSION = '2.1.0'
+# SARIF levels for pylint's message types and the built-in analyzer's severities.
+SARIF_LEVELS = {'fatal': 'error', 'error': 'error', 'warning': 'warning'}
+
+
+def format_status(result, check=False):
+    """Return the status of a FormatResult as reported in machine-readable output."""
+    if result.error:
+        return 'error'
+    if result.changed is None:
+        return 'formatted'
+    if result.changed:
+        return 'would-reformat' if check else 'reformatted'
+    return 'unchanged'
+
+
+class Reporter:
+    """Base class for streaming reporters.
+
+    start() is called once the producing tool is known, then
+    analysis_result() or format_result() once per file, and close() at the
+    end. close() must be called even if the run fails, so that the output
+    is complete.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self.started = False
+
+    def start(self, tool, version=None):
+        self.started = True
+
+    def analysis_result(self, result, tool):
+        raise NotImplementedError
+
+    def format_result(self, result, tool, check=False):
+        raise NotImplementedError
+
+    def close(self):
+        if not self.started:
+            self.start('devbuddy')
+
+    def _write(self, text):
+        self.stream.write(text)
+        self.stream.flush()
+
+
+class JsonLinesReporter(Reporter):
+    """One JSON object per line: findings, per-file format results, errors and a final summary.
+
+    The summary counts files, and findings by severity or files by format
+    status.
+    """
+
+    def __init__(self, stream=None):
+        super().__init__(stream)
+        self.files = 0
+        self.counts = {}
+
+    def _record(self, record, counter):
+        self.counts[counter] = self.counts.get(counter, 0) + 1
+        self._write(json.dumps(record) + '\n')
+
+    def analysis_result(self, result, tool):
+        self.files += 1
+        if result.error:
+            self._record({'type': 'error', 'tool': tool, 'path': result.path, 'message': result.error}, 'error')
+            return
+        for m in result.messages:
+            self._record({'type': 'finding', 'tool': tool, 'path': m.path, 'line': m.line, 'column': m.column,
+                          'code': m.code, 'symbol': m.symbol, 'severity': m.severity, 'message': m.text},
+                         m.severity)
+
+    def format_result(self, result, tool, check=False):
+        self.files += 1
+        status = format_status(result, check)
+        record = {'type': 'file', 'tool': tool, 'path': result.path, 'status': status}
+        if result.cached:
+            record['cached'] = True
+        if result.error:
+            record['error'] = result.error
+        if result.diff:
+            record['diff'] = result.diff
+        self._record(record, status)
+
+    def close(self):
+        super().close()
+        self._write(json.dumps({'type': 'summary', 'files': self.files, 'counts': self.counts}) + '\n')
+
+
+class SarifReporter(Reporter):
+    """A SARIF 2.1.0 log with a single run, written incrementally.
+
+    Results are streamed into the run's results array as they arrive; the
+    tool description, which lists the rules seen, and the invocation record
+    follow them once the run is over.
+    """
+
+    def __init__(self, stream=None, root=None):
+        super().__init__(stream)
+        self.root = os.path.abspath(root or os.getcwd())
+        self.driver = {'name': 'devbuddy'}
+        self.rules = {}
+        self.notifications = []
+        self.results = 0
+
+    def start(self, tool, version=None):
+        super().start(tool, version)
+        self.driver = {'name': tool}
+        if version:
+            self.driver['version'] = version
+        self._write('{"version": "%s", "$schema": "%s", "runs": [{"results": [' % (SARIF_VERSION, SARIF_SCHEMA))
+
+    def _location(self, path, line=None, column=None):
+        path = os.path.abspath(path)
+        location = {'physicalLocation': {'artifactLocation': self._artifact(path)}}
+        if line:
+            region = {'startLine': max(1, line)}
+            if column is not None:
+                region['startColumn'] = column + 1
+            location['physicalLocation']['region'] = region
+        return location
+
+    def _artifact(self, path):
+        if path.startswith(self.root + os.sep):
+            return {'uri': pathlib.PurePath(os.path.relpath(path, self.root)).as_posix(), 'uriBaseId': 'SRCROOT'}
+        return {'uri': pathlib.Path(path).as_uri()}
+
+    def _result(self, rule_id, name, level, text, location):
+        if rule_id not in self.rules:
+            self.rules[rule_id] = {'id': rule_id, 'name': name}
+        result = {'ruleId': rule_id, 'level': level, 'message': {'text': text}, 'locations': [location]}
+        self._write((',' if self.results else '') + json.dumps(result))
+        self.results += 1
+
+    def _notify(self, path, text):
+        self.notifications.append({'level': 'error', 'message': {'text': text},
+                                   'locations': [self._location(path)]})
+
+    def analysis_result(self, result, tool):
+        if result.error:
+            self._notify(result.path, f"Could not analyze: {result.error}")
+            return
+        for m in result.messages:
+            self._result(m.code, m.symbol, SARIF_LEVELS.get(m.severity, 'note'), m.text,
+                         self._location(m.path, m.line, m.column))
+
+    def format_result(self, result, tool, check=False):
+        if result.error:
+            self._notify(result.path, f"Could not format with {tool}: {result.error}")
+        elif result.changed:
+            name = tool.replace(',', '-')
+            text = f"File would be reformatted by {tool}" if check else f"File was reformatted by {tool}"
+            self._result(f"format/{name}", f"{name}-formatting", 'warning' if check else 'note', text,
+                         self._location(result.path, 1))
+
+    def close(self):
+        super().close()
+        self.driver['rules'] = list(self.rules.values())
+        invocation = {'executionSuccessful': not self.notifications,
+                      'toolExecutionNotifications': self.notifications}
+        self._write('], "tool": %s, "invocations": [%s], "originalUriBaseIds": {"SRCROOT": {"uri": %s}}}]}\n'
+                    % (json.dumps({'driver': self.driver}), json.dumps(invocation),
+                       json.dumps(pathlib.Path(self.root).as_uri() + '/')))
+
+
+REPORTERS = {'jsonl': JsonLinesReporter, 'sarif': SarifReporter}
+
+
+@contextmanager
+def reporting(output_format, stream=None, log=None):
+    """Yield the reporter for output_format, or None for the human-readable text format.
+
+    While a reporter is active, anything printed to stdout goes to log
+    (default: stderr) so it cannot corrupt the machine-readable stream. The
+    reporter is closed on exit, completing its output.
+    """
+    if output_format in (None, 'text'):
+        yield None
+        return
+    reporter = REPORTERS[output_format](stream or sys.stdout)
+    try:
+        with redirect_stdout(log or sys.stderr):
+            yield reporter
+    finally:
+        reporter.close()
@@ -3,6 +3,12 @@ import subprocess
 import shutil
 import sys
 from .animations import animate_install, show_completion, animate_progress
+from .plugins.hooks import POST_SCAFFOLD, call_hook
+
+# Added to every generated CI workflow, so credentials committed later are caught on push.
+SECRET_SCAN_STEP = """    - name: Scan for committed secrets
+      run: pipx run --spec z0roday-devbuddy dbuddy analyze . --secrets
+"""
 
 def check_prerequisites(project_type):
     """Check if required tools are installed for the project type."""
@@ -260,7 +266,7 @@ jobs:
     runs-on: ubuntu-latest
     steps:
     - uses: actions/checkout@v2
-    - name: Set up Python
+""" + SECRET_SCAN_STEP + """    - name: Set up Python
       uses: actions/setup-python@v2
       with:
         python-version: '3.9'
@@ -292,7 +298,7 @@ jobs:
     runs-on: ubuntu-latest
     steps:
     - uses: actions/checkout@v2
-    - name: Use Node.js
+""" + SECRET_SCAN_STEP + """    - name: Use Node.js
       uses: actions/setup-node@v2
       with:
         node-version: '14'
@@ -321,7 +327,7 @@ jobs:
     runs-on: ubuntu-latest
     steps:
     - uses: actions/checkout@v2
-    - name: Set up Go
+""" + SECRET_SCAN_STEP + """    - name: Set up Go
       uses: actions/setup-go@v2
       with:
         go-version: 1.18
@@ -345,7 +351,7 @@ jobs:
     runs-on: ubuntu-latest
     steps:
     - uses: actions/checkout@v2
-    - name: Build
+""" + SECRET_SCAN_STEP + """    - name: Build
       run: cargo build --verbose
     - name: Run tests
       run: cargo test --verbose
@@ -365,7 +371,7 @@ jobs:
     runs-on: ubuntu-latest
     steps:
     - uses: actions/checkout@v2
-    - name: Setup .NET
+""" + SECRET_SCAN_STEP + """    - name: Setup .NET
       uses: actions/setup-dotnet@v1
       with:
         dotnet-version: 6.0.x
@@ -527,7 +533,12 @@ def scaffold_project(project_name, project_type='python', dockerize=False, git_i
             os.chdir(project_name)
             subprocess.run(['git', 'init'], check=True)
             subprocess.run(['git', 'add', '.'], check=True)
-            subprocess.run(['git', 'commit', '-m', 'Initial commit by z0roday DevBuddy'], check=True)
+            # Imported here so 'dbuddy create' without --git does not load the formatters.
+            from .githooks import scan_staged_secrets
+            if scan_staged_secrets():
+                print("Skipped the initial commit: remove the secrets listed above, then commit.")
+            else:
+                subprocess.run(['git', 'commit', '-m', 'Initial commit by z0roday DevBuddy'], check=True)
             os.chdir(original_dir)
             print("Initialized Git repository")
 
@@ -541,6 +552,8 @@ def scaffold_project(project_name, project_type='python', dockerize=False, git_i
             animate_progress("Setting up CI/CD configuration", 1.0)
             setup_ci_cd(project_name, project_type)
 
+        call_hook(POST_SCAFFOLD, project=project_name, project_type=project_type)
+
         # Show completion message with next steps
         show_completion(project_name, project_type)
 
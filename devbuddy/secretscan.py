@@ -0,0 +1,154 @@
+"""
+Secret scanning for DevBuddy.
+Every rule is compiled into one combined regular expression, so each file is
+searched in a single pass however many rules there are. Files are mapped
+into memory rather than read, binary files are recognised from their first
+block and skipped, and the tree is scanned across worker processes, which
+keeps a full repository scan close to disk-read speed.
+"""
+
+import mmap
+import re
+from collections import namedtuple
+
+from .analyzer import AnalysisResult, Message, map_analysis
+from .parallel import default_jobs
+
+# Files with a NUL byte in their first block are treated as binary, as git does.
+BINARY_CHECK_BYTES = 8192
+# Characters of a matched secret left visible in reports.
+VISIBLE_CHARS = 4
+
+# A kind of secret. `pattern` is a bytes regex matching the secret; when it
+# also matches surrounding context such as an assignment, `secret_group`
+# names the group holding the secret itself.
+#
+# Patterns must start with a literal character and have no top-level `|`:
+# the combined expression can then jump straight to the positions where
+# some rule could start instead of trying every rule at every byte.
+SecretRule = namedtuple('SecretRule', ['code', 'symbol', 'description', 'pattern', 'secret_group'],
+                        defaults=[None])
+
+RULES = [
+    SecretRule('DB201', 'private-key', 'private key',
+               rb'-----BEGIN (?:RSA |DSA |EC |OPENSSH |PGP |ENCRYPTED )?PRIVATE KEY(?: BLOCK)?-----'),
+    # Long-term (AKIA) and temporary (ASIA) keys; other prefixes identify resources, not credentials.
+    SecretRule('DB202', 'aws-access-key-id', 'AWS access key ID', rb'A(?:KI|SI)A[0-9A-Z]{16}(?![0-9A-Za-z])'),
+    SecretRule('DB203', 'aws-secret-access-key', 'AWS secret access key',
+               rb'_(?<=[Aa][Ww][Ss]_)(?:secret_access_key|SECRET_ACCESS_KEY)["\']?\s*[:=]\s*["\']?'
+               rb'(?P<aws_secret>[0-9A-Za-z/+]{40})(?![0-9A-Za-z/+])', 'aws_secret'),
+    SecretRule('DB204', 'github-token', 'GitHub token',
+               rb'gh(?:[pousr]_[0-9A-Za-z]{36}|ithub_pat_[0-9A-Za-z_]{82})(?![0-9A-Za-z_])'),
+    SecretRule('DB205', 'gitlab-token', 'GitLab personal access token', rb'glpat-[0-9A-Za-z_\-]{20}'),
+    SecretRule('DB206', 'slack-token', 'Slack token', rb'xox[abposr]-[0-9A-Za-z\-]{10,}'),
+    SecretRule('DB207', 'slack-webhook', 'Slack webhook URL',
+               rb'https://hooks\.slack\.com/services/T[0-9A-Z]+/B[0-9A-Z]+/[0-9A-Za-z]+'),
+    # Secret (sk_) and restricted (rk_) keys; publishable (pk_) keys are meant to be public.
+    SecretRule('DB208', 'stripe-key', 'Stripe secret key',
+               rb'k_live_(?<=[rs]k_live_)(?P<stripe_key>[0-9A-Za-z]{20,})', 'stripe_key'),
+    SecretRule('DB209', 'google-api-key', 'Google API key', rb'AIza[0-9A-Za-z_\-]{35}'),
+    SecretRule('DB210', 'npm-token', 'npm access token', rb'npm_[0-9A-Za-z]{36}(?![0-9A-Za-z])'),
+    SecretRule('DB211', 'pypi-token', 'PyPI API token', rb'pypi-AgEIcHlwaS5vcmc[0-9A-Za-z_\-]{50,}'),
+    SecretRule('DB212', 'sendgrid-key', 'SendGrid API key', rb'SG\.[0-9A-Za-z_\-]{22}\.[0-9A-Za-z_\-]{43}'),
+    SecretRule('DB213', 'twilio-key', 'Twilio API key', rb'SK[0-9a-f]{32}(?![0-9A-Za-z])'),
+    SecretRule('DB214', 'jwt', 'JSON Web Token',
+               rb'eyJ[0-9A-Za-z_\-]{10,}\.eyJ[0-9A-Za-z_\-]{10,}\.[0-9A-Za-z_\-]{10,}'),
+    SecretRule('DB215', 'url-credentials', 'password in a URL',
+               rb'://[^\s/:@"\'<>]{1,64}:(?P<url_password>[^\s/:@"\'<>$]{3,64})@[0-9A-Za-z]', 'url_password'),
+]
+RULES_BY_CODE = {rule.code: rule for rule in RULES}
+
+_NOQA_RE = re.compile(rb'#\s*noqa(?::\s*([A-Z]+\d+(?:\s*,\s*[A-Z]+\d+)*))?', re.IGNORECASE)
+_PLACEHOLDER_RE = re.compile(rb'(?:x{4,}|\*{4,}|\.{3}|<[^>]*>|\$\{|\{\{|changeme|example|dummy|your[_\-]?)',
+                             re.IGNORECASE)
+
+
+def compile_rules(rules=RULES):
+    """Combine rules into one bytes regex; the match's lastgroup is the code of the rule that matched.
+
+    Each rule ends in an empty group named after its code rather than being
+    wrapped in one, which would hide the rules' first characters from the
+    regex compiler.
+    """
+    return re.compile(b'|'.join(b'%s(?P<%s>)' % (rule.pattern, rule.code.encode()) for rule in rules))
+
+
+_COMBINED_RE = compile_rules()
+
+
+def is_binary(data):
+    """Return True if data (bytes or a memory map) looks like a binary file."""
+    return data.find(b'\0', 0, BINARY_CHECK_BYTES) != -1
+
+
+def redact(secret):
+    """Return secret with all but its first few characters masked."""
+    text = secret.decode('utf-8', 'replace')
+    return text[:VISIBLE_CHARS] + '*' * min(max(len(text) - VISIBLE_CHARS, 0), 16)
+
+
+def _suppressed(line, code):
+    """Return True if line carries a `# noqa` comment that covers code."""
+    match = _NOQA_RE.search(line)
+    if match is None:
+        return False
+    codes = match.group(1)
+    return codes is None or code.encode() in {c.strip().upper() for c in codes.split(b',')}
+
+
+def scan_bytes(data, path='<string>', pattern=_COMBINED_RE):
+    """Return a Message for every secret found in data (bytes or a memory map).
+
+    Matches on a line with `# noqa` or `# noqa: DB2xx`, and values that are
+    obviously placeholders (e.g. `xxxx` or `<token>`), are not reported.
+    """
+    messages = []
+    line, offset = 1, 0
+    for match in pattern.finditer(data):
+        code = match.lastgroup
+        rule = RULES_BY_CODE[code]
+        start = match.start(rule.secret_group or 0)
+        line += data[offset:start].count(b'\n')
+        offset = start
+        line_start = data.rfind(b'\n', 0, start) + 1
+        line_end = data.find(b'\n', start)
+        text = data[line_start:line_end if line_end != -1 else len(data)]
+        if b'noqa' in text.lower() and _suppressed(text, code):
+            continue
+        secret = match.group(rule.secret_group or 0)
+        if _PLACEHOLDER_RE.search(secret):
+            continue
+        messages.append(Message(path, line, start - line_start, rule.code, rule.symbol,
+                                f"Possible {rule.description}: {redact(secret)}", 'error'))
+    return messages
+
+
+def scan_file(path):
+    """Scan one file for secrets, returning an AnalysisResult.
+
+    The file is memory-mapped, so large files are searched without being
+    copied into memory. Empty and binary files yield no messages.
+    """
+    try:
+        with open(path, 'rb') as f:
+            try:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                return AnalysisResult(path, [], None)  # empty file
+            with data:
+                if is_binary(data):
+                    return AnalysisResult(path, [], None)
+                return AnalysisResult(path, scan_bytes(data, path), None)
+    except OSError as e:
+        return AnalysisResult(path, [], str(e))
+
+
+def _scan_chunk(paths):
+    """Scan a chunk of files. Runs inside pool workers."""
+    return [scan_file(p) for p in paths]
+
+
+def iter_secrets(paths, jobs=None):
+    """Scan paths for secrets across `jobs` processes, yielding AnalysisResults."""
+    for results in map_analysis(_scan_chunk, paths, jobs or default_jobs()):
+        yield from results
@@ -0,0 +1,268 @@
+"""
+A long-running DevBuddy server that keeps formatter engines loaded.
+Clients send format/check requests over a Unix domain socket and receive the
+command's output as a stream of JSON lines, so repeated invocations (e.g.
+from git hooks) skip Python startup and formatter imports. Clients send their
+DevBuddy version with each request; a server running another version (e.g.
+after an upgrade) shuts down instead of answering, and the client formats
+in-process.
+"""
+
+import io
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from contextlib import redirect_stderr, redirect_stdout
+
+from . import __version__
+from .cache import user_cache_dir
+
+SOCKET_ENV = 'DEVBUDDY_SOCKET'
+NO_SERVER_ENV = 'DEVBUDDY_NO_SERVER'
+DEFAULT_IDLE_TIMEOUT = 3600
+
+
+def socket_path():
+    """Return the path of the server's Unix domain socket."""
+    return os.environ.get(SOCKET_ENV) or os.path.join(user_cache_dir(), 'server.sock')
+
+
+def is_supported():
+    return hasattr(socket, 'AF_UNIX')
+
+
+def _send(wfile, message):
+    wfile.write(json.dumps(message).encode('utf-8') + b'\n')
+    wfile.flush()
+
+
+class _SocketOutput(io.TextIOBase):
+    """A text stream that forwards everything written to it to the client.
+
+    kind is 'output' for human-readable output, 'error' for error output
+    (e.g. of a formatter run as a subprocess) and 'report' for the
+    machine-readable stream of --output-format.
+    """
+
+    def __init__(self, wfile, kind='output'):
+        self._wfile = wfile
+        self._kind = kind
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        if text:
+            _send(self._wfile, {'type': self._kind, 'data': text})
+        return len(text)
+
+
+def _connect(path, timeout=None):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(timeout)
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def _run_format(options, wfile):
+    """Run format_code for a request and return its exit status."""
+    from .engines import reset_config_caches
+    from .formatter import format_code
+    from .reporters import reporting
+
+    # Config files may have changed since the previous request.
+    reset_config_caches()
+    output_format = options.pop('output_format', 'text')
+    with reporting(output_format, _SocketOutput(wfile, 'report'), _SocketOutput(wfile)) as reporter:
+        results = format_code(reporter=reporter, **options)
+    if options.get('check') or options.get('diff'):
+        return 1 if any(r.changed or r.error for r in results) else 0
+    return 0
+
+
+def _handle(conn):
+    """Serve one request. Returns False when the server should shut down."""
+    rfile = conn.makefile('rb')
+    wfile = conn.makefile('wb')
+    try:
+        line = rfile.readline()
+        if not line:
+            return True
+        request = json.loads(line.decode('utf-8'))
+        command = request.get('command')
+        if command == 'ping':
+            _send(wfile, {'type': 'result', 'status': 0, 'pid': os.getpid(), 'version': __version__})
+        elif command == 'shutdown':
+            _send(wfile, {'type': 'result', 'status': 0})
+            return False
+        elif request.get('version', __version__) != __version__:
+            _send(wfile, {'type': 'result', 'status': 2, 'stale': True, 'version': __version__})
+            return False
+        elif command == 'format':
+            os.chdir(request.get('cwd') or '/')
+            with redirect_stdout(_SocketOutput(wfile)), redirect_stderr(_SocketOutput(wfile, 'error')):
+                status = _run_format(request.get('options', {}), wfile)
+            _send(wfile, {'type': 'result', 'status': status})
+        else:
+            _send(wfile, {'type': 'result', 'status': 2, 'error': f"Unknown command: {command}"})
+    except Exception as e:
+        # A bad request (e.g. an option this server does not know) fails only that request.
+        try:
+            _send(wfile, {'type': 'result', 'status': 1, 'error': f"{type(e).__name__}: {e}"})
+        except OSError:
+            pass
+    finally:
+        for f in (rfile, wfile):
+            try:
+                f.close()
+            except OSError:
+                pass
+    return True
+
+
+def serve(idle_timeout=DEFAULT_IDLE_TIMEOUT):
+    """Run the server in the foreground until shut down or idle for idle_timeout seconds."""
+    if not is_supported():
+        print("Error: The DevBuddy server needs Unix domain sockets, which this platform does not support.")
+        return
+    path = socket_path()
+    version = server_version(path)
+    if version == __version__:
+        print(f"A DevBuddy server is already running on {path}")
+        return
+    if version is not None:
+        print(f"Replacing the DevBuddy {version or 'server'} running on {path} with version {__version__}")
+        stop(path)
+    if os.path.exists(path):
+        os.unlink(path)  # left behind by a server that did not shut down cleanly
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    from .engines import SUPPORTED_TOOLS, get_engine
+    for tool in SUPPORTED_TOOLS:
+        get_engine(tool)
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    old_umask = os.umask(0o177)  # only the current user may connect
+    try:
+        sock.bind(path)
+    finally:
+        os.umask(old_umask)
+    sock.listen(16)
+    sock.settimeout(idle_timeout or None)
+    print(f"DevBuddy server listening on {path} (pid {os.getpid()})", flush=True)
+    try:
+        while True:
+            try:
+                conn, _ = sock.accept()
+            except socket.timeout:
+                print("Idle timeout reached, shutting down.")
+                break
+            with conn:
+                conn.settimeout(None)
+                if not _handle(conn):
+                    print("Shutdown requested.")
+                    break
+    except KeyboardInterrupt:
+        print("\nServer stopped.")
+    finally:
+        sock.close()
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+def start_background(idle_timeout=DEFAULT_IDLE_TIMEOUT, wait=5.0):
+    """Start the server as a detached process and wait until it accepts connections."""
+    subprocess.Popen([sys.executable, '-m', 'devbuddy.cli', 'serve', '--idle-timeout', str(idle_timeout)],
+                     stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                     start_new_session=True)
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        if server_version() == __version__:
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def _request(message, path=None):
+    """Send a request and yield the server's reply messages."""
+    with _connect(path or socket_path()) as sock:
+        sock.sendall(json.dumps(message).encode('utf-8') + b'\n')
+        with sock.makefile('rb') as rfile:
+            for line in rfile:
+                yield json.loads(line.decode('utf-8'))
+
+
+def server_version(path=None):
+    """Return the DevBuddy version of the running server ('' if it does not say), or None if none is running."""
+    if not is_supported():
+        return None
+    try:
+        for message in _request({'command': 'ping'}, path):
+            if message.get('type') == 'result':
+                return message.get('version', '')
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def ping(path=None):
+    """Return True if a server is accepting requests."""
+    return server_version(path) is not None
+
+
+def stop(path=None):
+    """Ask a running server to shut down. Returns False if none was running."""
+    try:
+        for message in _request({'command': 'shutdown'}, path):
+            if message.get('type') == 'result':
+                return True
+    except (OSError, ValueError):
+        pass
+    return False
+
+
+def request_format(options):
+    """Run format_code(**options) on a running server, streaming its output.
+
+    Returns the command's exit status, or None if no server is running, it
+    runs another DevBuddy version, or DEVBUDDY_NO_SERVER is set, and the
+    caller should format in-process.
+    With a machine-readable output_format option, the report is written to
+    stdout and the human-readable output to stderr.
+    """
+    if not is_supported() or os.environ.get(NO_SERVER_ENV):
+        return None
+    try:
+        sock = _connect(socket_path())
+    except OSError:
+        return None
+    with sock:
+        request = {'command': 'format', 'cwd': os.getcwd(), 'options': options, 'version': __version__}
+        sock.sendall(json.dumps(request).encode('utf-8') + b'\n')
+        streams = {'output': sys.stdout, 'error': sys.stderr, 'report': sys.stdout}
+        if options.get('output_format', 'text') != 'text':
+            streams['output'] = sys.stderr
+        with sock.makefile('rb') as rfile:
+            for line in rfile:
+                message = json.loads(line.decode('utf-8'))
+                stream = streams.get(message.get('type'))
+                if stream is not None:
+                    stream.write(message['data'])
+                    stream.flush()
+                elif message.get('type') == 'result':
+                    if message.get('stale'):
+                        return None
+                    if message.get('error'):
+                        print(f"Error from DevBuddy server: {message['error']}")
+                    return message.get('status', 1)
+    print("Error: The DevBuddy server closed the connection unexpectedly.")
+    return 1
@@ -0,0 +1,313 @@
+"""
+A persistent symbol index for Python projects.
+Every file's definitions, imports and name references are extracted with
+the ast module and stored in a SQLite database in the user cache directory,
+so "where is this defined" and "who uses it" lookups are single indexed
+queries. The index is updated incrementally: files are re-parsed only when
+their size, mtime and content hash say they changed.
+"""
+
+import ast
+import hashlib
+import os
+import sqlite3
+from collections import namedtuple
+
+from .cache import hash_bytes, user_cache_dir
+from .parallel import default_jobs, iter_balanced_chunks, map_chunks
+from .walker import find_repo_root, iter_files
+
+SCHEMA_VERSION = 1
+# Kinds of definitions the index records.
+SYMBOL_KINDS = ('class', 'function', 'method', 'variable', 'attribute')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY, path TEXT UNIQUE, module TEXT, mtime_ns INTEGER, size INTEGER, digest TEXT);
+CREATE TABLE IF NOT EXISTS definitions (
+    file_id INTEGER, name TEXT, qualname TEXT, kind TEXT, line INTEGER, col INTEGER, end_line INTEGER);
+CREATE TABLE IF NOT EXISTS imports (
+    file_id INTEGER, name TEXT, target TEXT, line INTEGER, col INTEGER);
+CREATE TABLE IF NOT EXISTS refs (
+    file_id INTEGER, name TEXT, kind TEXT, scope TEXT, line INTEGER, col INTEGER);
+CREATE INDEX IF NOT EXISTS definitions_name ON definitions (name);
+CREATE INDEX IF NOT EXISTS definitions_file ON definitions (file_id);
+CREATE INDEX IF NOT EXISTS imports_name ON imports (name);
+CREATE INDEX IF NOT EXISTS imports_target ON imports (target);
+CREATE INDEX IF NOT EXISTS imports_file ON imports (file_id);
+CREATE INDEX IF NOT EXISTS refs_name ON refs (name);
+CREATE INDEX IF NOT EXISTS refs_file ON refs (file_id);
+"""
+
+# A definition found by find_symbol. `qualname` includes enclosing classes
+# and functions; `module` is the dotted module path of the file.
+Definition = namedtuple('Definition', ['path', 'module', 'name', 'qualname', 'kind', 'line', 'col', 'end_line'])
+# A use of a name found by find_references. `kind` is 'name' for a plain
+# name, 'attribute' for `obj.name` and 'import' for an import of it;
+# `scope` is the qualname of the enclosing function or class.
+Reference = namedtuple('Reference', ['path', 'line', 'col', 'kind', 'scope'])
+
+# Summary of an index update.
+IndexStats = namedtuple('IndexStats', ['files', 'parsed', 'removed', 'errors'])
+
+
+def module_name(rel_path):
+    """Return the dotted module name for a path relative to the project root."""
+    parts = rel_path.replace(os.sep, '/')[:-len('.py')].split('/')
+    if parts[-1] == '__init__':
+        parts.pop()
+    return '.'.join(parts)
+
+
+class _Extractor(ast.NodeVisitor):
+    """Collect the definitions, imports and references of one module."""
+
+    def __init__(self, module):
+        self.module = module
+        self.stack = []
+        self.kinds = []
+        self.definitions = []
+        self.imports = []
+        self.refs = []
+
+    def qualname(self, name):
+        return '.'.join(self.stack + [name])
+
+    def scope(self):
+        return '.'.join(self.stack)
+
+    def define(self, node, name, kind):
+        self.definitions.append((name, self.qualname(name), kind, node.lineno, node.col_offset,
+                                 getattr(node, 'end_lineno', None) or node.lineno))
+
+    def visit_FunctionDef(self, node):
+        in_class = bool(self.kinds) and self.kinds[-1] == 'class'
+        self.define(node, node.name, 'method' if in_class else 'function')
+        self._enter(node, 'function')
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_ClassDef(self, node):
+        self.define(node, node.name, 'class')
+        self._enter(node, 'class')
+
+    def _enter(self, node, kind):
+        self.stack.append(node.name)
+        self.kinds.append(kind)
+        self.generic_visit(node)
+        self.stack.pop()
+        self.kinds.pop()
+
+    def visit_Name(self, node):
+        if isinstance(node.ctx, ast.Store):
+            # Module-level and class-level assignments are definitions;
+            # function locals are not worth indexing.
+            if not self.kinds or self.kinds[-1] == 'class':
+                self.define(node, node.id, 'attribute' if self.kinds else 'variable')
+        else:
+            self.refs.append((node.id, 'name', self.scope(), node.lineno, node.col_offset))
+
+    def visit_Attribute(self, node):
+        self.refs.append((node.attr, 'attribute', self.scope(), node.lineno, node.col_offset))
+        self.generic_visit(node)
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            name = alias.asname or alias.name.split('.')[0]
+            self.imports.append((name, alias.name, node.lineno, node.col_offset))
+
+    def visit_ImportFrom(self, node):
+        base = node.module or ''
+        if node.level:
+            # Resolve relative imports against this module's package.
+            package = self.module.split('.')
+            package = package[:len(package) - node.level] if node.level <= len(package) else []
+            base = '.'.join(package + ([base] if base else []))
+        for alias in node.names:
+            target = f"{base}.{alias.name}" if base else alias.name
+            self.imports.append((alias.asname or alias.name, target, node.lineno, node.col_offset))
+
+
+def extract_symbols(source, module='', path='<string>'):
+    """Return (definitions, imports, refs) rows for a module's source."""
+    extractor = _Extractor(module)
+    extractor.visit(ast.parse(source, filename=path))
+    return extractor.definitions, extractor.imports, extractor.refs
+
+
+def _index_chunk(paths, root):
+    """Read and parse a chunk of files. Runs inside pool workers."""
+    records = []
+    for path in paths:
+        rel_path = os.path.relpath(path, root)
+        try:
+            st = os.stat(path)
+            with open(path, 'rb') as f:
+                data = f.read()
+            module = module_name(rel_path)
+            definitions, imports, refs = extract_symbols(data, module, path)
+        except (OSError, SyntaxError, ValueError, RecursionError) as e:
+            records.append((rel_path, None, None, None, None, None, None, None, str(e)))
+            continue
+        records.append((rel_path, module, st.st_mtime_ns, st.st_size, hash_bytes(data),
+                        definitions, imports, refs, None))
+    return records
+
+
+def index_path(root):
+    """Return the path of the index database for a project root."""
+    digest = hashlib.blake2b(os.path.abspath(root).encode('utf-8', 'surrogateescape'), digest_size=8).hexdigest()
+    return os.path.join(user_cache_dir(), 'symbols', f"{os.path.basename(os.path.abspath(root)) or 'root'}-{digest}.sqlite")
+
+
+def project_root(path):
+    """Return the directory a symbol index covers: the enclosing repository, or path itself."""
+    path = os.path.abspath(path)
+    directory = path if os.path.isdir(path) else os.path.dirname(path)
+    return find_repo_root(directory) or directory
+
+
+class SymbolIndex:
+    """The SQLite symbol index of one project."""
+
+    def __init__(self, root, db_path=None):
+        self.root = os.path.abspath(root)
+        self.db_path = db_path or index_path(self.root)
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, timeout=30)
+        self._conn.executescript(_SCHEMA)
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'schema'").fetchone()
+        if row is None or row[0] != str(SCHEMA_VERSION):
+            with self._conn:
+                self.clear()
+                self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('schema', ?)", (str(SCHEMA_VERSION),))
+
+    def is_empty(self):
+        return self._conn.execute("SELECT 1 FROM files LIMIT 1").fetchone() is None
+
+    def clear(self):
+        for table in ('files', 'definitions', 'imports', 'refs'):
+            self._conn.execute(f"DELETE FROM {table}")
+
+    def _remove_rows(self, file_id):
+        for table in ('definitions', 'imports', 'refs'):
+            self._conn.execute(f"DELETE FROM {table} WHERE file_id = ?", (file_id,))
+
+    def update(self, jobs=None):
+        """Bring the index up to date with the files on disk. Returns IndexStats."""
+        jobs = jobs or default_jobs()
+        known = {path: (file_id, mtime_ns, size, digest) for file_id, path, mtime_ns, size, digest
+                 in self._conn.execute("SELECT id, path, mtime_ns, size, digest FROM files")}
+        seen = set()
+        errors = []
+
+        def changed_files():
+            for path in iter_files(self.root):
+                rel_path = os.path.relpath(path, self.root)
+                seen.add(rel_path)
+                entry = known.get(rel_path)
+                if entry is not None:
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    if entry[1] == st.st_mtime_ns and entry[2] == st.st_size:
+                        continue
+                yield path
+
+        parsed = 0
+        with self._conn:
+            chunks = iter_balanced_chunks(changed_files(), jobs)
+            for chunk, records, error in map_chunks(_index_chunk, chunks, jobs, self.root):
+                if error is not None:
+                    errors.extend((p, str(error)) for p in chunk)
+                    continue
+                for record in records:
+                    parsed += self._store(record, known, errors)
+            removed = [rel_path for rel_path in known if rel_path not in seen]
+            for rel_path in removed:
+                self._remove_rows(known[rel_path][0])
+                self._conn.execute("DELETE FROM files WHERE id = ?", (known[rel_path][0],))
+        return IndexStats(len(seen), parsed, len(removed), errors)
+
+    def _store(self, record, known, errors):
+        """Write one parsed file to the index. Returns 1 if its symbols were replaced."""
+        rel_path, module, mtime_ns, size, digest, definitions, imports, refs, error = record
+        entry = known.get(rel_path)
+        if error is not None:
+            errors.append((rel_path, error))
+            return 0
+        if entry is not None:
+            file_id = entry[0]
+            self._conn.execute("UPDATE files SET mtime_ns = ?, size = ? WHERE id = ?", (mtime_ns, size, file_id))
+            if entry[3] == digest:
+                return 0  # touched but unchanged
+            self._conn.execute("UPDATE files SET digest = ?, module = ? WHERE id = ?", (digest, module, file_id))
+            self._remove_rows(file_id)
+        else:
+            file_id = self._conn.execute("INSERT INTO files (path, module, mtime_ns, size, digest) "
+                                         "VALUES (?, ?, ?, ?, ?)", (rel_path, module, mtime_ns, size, digest)).lastrowid
+        self._conn.executemany("INSERT INTO definitions VALUES (?, ?, ?, ?, ?, ?, ?)",
+                               [(file_id,) + d for d in definitions])
+        self._conn.executemany("INSERT INTO imports VALUES (?, ?, ?, ?, ?)", [(file_id,) + i for i in imports])
+        self._conn.executemany("INSERT INTO refs VALUES (?, ?, ?, ?, ?, ?)", [(file_id,) + r for r in refs])
+        return 1
+
+    def find_symbol(self, name, kind=None):
+        """Return the Definitions matching name.
+
+        name may be a bare name (`format_code`), a qualified name within a
+        module (`FormatCache.commit`) or a full dotted path
+        (`devbuddy.formatter.FormatCache.commit`). Shell-style wildcards
+        (`*`, `?`) are allowed.
+        """
+        last = name.rsplit('.', 1)[-1]
+        wildcard = any(c in name for c in '*?[')
+        op = 'GLOB' if wildcard else '='
+        sql = ("SELECT f.path, f.module, d.name, d.qualname, d.kind, d.line, d.col, d.end_line "
+               "FROM definitions d JOIN files f ON f.id = d.file_id WHERE ")
+        params = []
+        if wildcard and any(c in last for c in '*?['):
+            sql += "(d.qualname GLOB ? OR f.module || '.' || d.qualname GLOB ?)"
+            params += [name, name]
+        else:
+            sql += f"d.name = ? AND (d.qualname {op} ? OR f.module || '.' || d.qualname {op} ?)"
+            params += [last, name, name]
+        if kind:
+            sql += " AND d.kind = ?"
+            params.append(kind)
+        sql += " ORDER BY f.path, d.line"
+        return [Definition(os.path.join(self.root, row[0]), *row[1:]) for row in self._conn.execute(sql, params)]
+
+    def find_references(self, name):
+        """Return the References to a name, including imports of it.
+
+        For a dotted name only the last component is matched against uses,
+        while imports must match the full dotted target.
+        """
+        last = name.rsplit('.', 1)[-1]
+        rows = list(self._conn.execute(
+            "SELECT f.path, r.line, r.col, r.kind, r.scope FROM refs r JOIN files f ON f.id = r.file_id "
+            "WHERE r.name = ?", (last,)))
+        import_sql = ("SELECT f.path, i.line, i.col, 'import', '' FROM imports i JOIN files f ON f.id = i.file_id "
+                      "WHERE i.target = ?")
+        params = [name]
+        if '.' not in name:
+            import_sql += " OR i.target LIKE ? ESCAPE '\\'"
+            params.append('%.' + name.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_'))
+        rows += self._conn.execute(import_sql, params)
+        rows.sort(key=lambda row: (row[0], row[1], row[2]))
+        return [Reference(os.path.join(self.root, row[0]), *row[1:]) for row in rows]
+
+    def close(self):
+        try:
+            self._conn.commit()
+        finally:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
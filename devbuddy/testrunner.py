@@ -0,0 +1,382 @@
+"""
+Test running for DevBuddy.
+`dbuddy test` runs pytest. With --affected, the files changed since a base
+revision are mapped through the project's static import graph to the test
+modules that depend on them, directly or indirectly, and only those run.
+The graph comes from devbuddy.importgraph, whose per-file cache means only
+changed files are parsed again between runs.
+
+Every run records how long each test took. Test files can then be split
+into shards of about equal expected duration, run by parallel pytest
+processes or, with --shard, by separate CI nodes; the results of parallel
+processes are merged into a single summary and JUnit XML report.
+"""
+
+import heapq
+import importlib.util
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from xml.etree import ElementTree
+
+from .cache import ResultCache
+from .gitutils import changed_files, merge_base, repo_root
+from .importgraph import ImportCache, ImportGraph
+from .parallel import map_chunks
+from .pytest_timing import REPORT_ENV
+from .walker import iter_files
+
+# Changes to these files can affect any test, so they select the whole suite.
+SUITE_FILES = frozenset(['pytest.ini', 'pyproject.toml', 'setup.cfg', 'tox.ini', 'setup.py'])
+# pytest's exit status when it collected no tests.
+NO_TESTS_COLLECTED = 5
+# Worst outcome first: a test that failed in its call and errored in teardown counts as failed.
+OUTCOMES = ('failed', 'error', 'skipped', 'passed')
+
+
+def is_test_file(path):
+    """Return True for files pytest collects by default: test_*.py and *_test.py."""
+    name = os.path.basename(path)
+    return name.endswith('.py') and (name.startswith('test_') or name.endswith('_test.py'))
+
+
+def _under(path, directories):
+    return any(path.startswith(directory + os.sep) for directory in directories)
+
+
+def _test_directory(path, tests, root):
+    """Return the closest directory above path, below root, that contains tests, or None."""
+    directory = os.path.dirname(path)
+    while directory.startswith(root + os.sep):
+        if any(_under(test, [directory]) for test in tests):
+            return directory
+        directory = os.path.dirname(directory)
+    return None
+
+
+def select_tests(graph, changes, root):
+    """Return (test paths, reason) for the test files affected by changes.
+
+    changes are gitutils.ChangedFile entries. reason is None, or says why
+    the whole suite has to run (e.g. a pytest config file changed), in
+    which case the test paths are not meaningful.
+
+    A changed Python module selects every test module that imports it in
+    any scope, directly or through other modules. A changed conftest.py
+    selects the tests in its directory and below, and a changed non-Python
+    file (e.g. test data) those of the closest directory with tests above
+    it, unless that is the project root. A removed module selects the
+    importers of its package.
+    """
+    by_path = {os.path.abspath(path): module for module, path in graph.modules.items()}
+    tests = {os.path.abspath(path): path for path in graph.modules.values() if is_test_file(path)}
+    modules = set()
+    directories = set()
+    for change in changes:
+        removed = [change.old_path] if change.old_path else []
+        if change.status == 'D':
+            removed.append(change.path)
+        else:
+            name = os.path.basename(change.path)
+            if name in SUITE_FILES or (name.startswith('requirements') and name.endswith('.txt')):
+                return [], f"{os.path.relpath(change.path, root)} changed"
+            if name == 'conftest.py':
+                directories.add(os.path.dirname(change.path))
+            elif not name.endswith('.py'):
+                directory = _test_directory(change.path, tests, root)
+                if directory is not None:
+                    directories.add(directory)
+            elif change.path in by_path:
+                modules.add(by_path[change.path])
+            elif is_test_file(change.path):
+                tests.setdefault(change.path, change.path)  # e.g. a new test that does not parse yet
+                modules.add(change.path)
+        for path in removed:
+            if not path.endswith('.py'):
+                continue
+            module, is_package = graph.module_name(path)
+            # Importers of a removed module now resolve to the closest package still there.
+            package = graph.resolve(module if is_package else module.rpartition('.')[0])
+            if package is None:
+                return [], f"{os.path.relpath(path, root)} was removed"
+            modules.add(package)
+
+    affected = graph.dependents(modules)
+    selected = [path for abs_path, path in tests.items()
+                if by_path.get(abs_path, abs_path) in affected or _under(abs_path, directories)]
+    return sorted(selected), None
+
+
+def affected_tests(path='.', base='HEAD', jobs=None, use_cache=True):
+    """Return (test paths, reason) for the tests under path affected by changes since base.
+
+    For any base other than HEAD, changes are taken from where HEAD
+    branched off it, so commits that only landed on base do not count.
+    See select_tests for reason.
+    """
+    root = os.path.abspath(path)
+    git_root = repo_root(root)
+    if base != 'HEAD':
+        base = merge_base(base, git_root)
+    changes = [c for c in changed_files(git_root, base)
+               if c.path.startswith(root + os.sep) or (c.old_path or '').startswith(root + os.sep)]
+    graph = ImportGraph()
+    cache = ImportCache() if use_cache else None
+    try:
+        graph.build(iter_files(path), jobs, cache)
+    finally:
+        if cache is not None:
+            cache.close()
+    return select_tests(graph, changes, root)
+
+
+class TimingCache:
+    """Per-test durations recorded by earlier runs of one project's tests.
+
+    Durations live in the DevBuddy cache, or in durations_file when one is
+    given: a JSON file mapping each test file, relative to the project
+    root, to the durations of its tests. Commit that file so every CI node
+    splits the suite the same way.
+    """
+
+    def __init__(self, root, durations_file=None, cache_dir=None):
+        self.root = os.path.abspath(root)
+        self.durations_file = durations_file
+        self.store = None
+        self.data = {}
+        if durations_file is None:
+            self.store = ResultCache('test-durations', cache_dir)
+        elif os.path.exists(durations_file):
+            with open(durations_file, encoding='utf-8') as f:
+                self.data = json.load(f)
+
+    def _relpath(self, path):
+        return os.path.relpath(os.path.abspath(path), self.root).replace(os.sep, '/')
+
+    def get(self, path):
+        """Return {test id: seconds} for the test file path, or None if it never ran."""
+        if self.store is None:
+            return self.data.get(self._relpath(path))
+        value = self.store.get(f"durations|{self.root}|{self._relpath(path)}")
+        return json.loads(value) if value is not None else None
+
+    def file_duration(self, path):
+        """Return the total duration of the tests in path, or None if it never ran."""
+        durations = self.get(path)
+        return sum(durations.values()) if durations is not None else None
+
+    def set(self, path, durations):
+        if self.store is None:
+            self.data[self._relpath(path)] = durations
+        else:
+            self.store.set(f"durations|{self.root}|{self._relpath(path)}", json.dumps(durations))
+
+    def record(self, records):
+        """Store the durations measured in a run, from devbuddy.pytest_timing records."""
+        files = {}
+        for record in records:
+            if record['when'] != 'collect':
+                tests = files.setdefault(record['path'], {})
+                tests[record['nodeid']] = tests.get(record['nodeid'], 0.0) + record['duration']
+        for path, durations in files.items():
+            self.set(path, {nodeid: round(seconds, 4) for nodeid, seconds in durations.items()})
+
+    def close(self):
+        if self.store is not None:
+            self.store.close()
+        elif self.data:
+            with open(self.durations_file, 'w', encoding='utf-8') as f:
+                json.dump(self.data, f, indent=2, sort_keys=True)
+                f.write('\n')
+
+
+def split_tests(tests, durations, count):
+    """Split test files into count shards of about equal expected duration.
+
+    durations maps test files to seconds, or None for files that never ran;
+    those are assumed to take as long as the average file that did, or,
+    before anything has run, are weighed by size. Files are assigned
+    longest first to the shard with the least work so far, in a fixed
+    order, so every caller with the same durations gets the same shards.
+    """
+    known = [d for d in (durations.get(t) for t in tests) if d is not None]
+    if known:
+        default = sum(known) / len(known)
+        weights = {t: durations[t] if durations.get(t) is not None else default for t in tests}
+    else:
+        weights = {t: os.path.getsize(t) if os.path.exists(t) else 0 for t in tests}
+    shards = [[] for _ in range(count)]
+    heap = [(0, i) for i in range(count)]
+    for test in sorted(tests, key=lambda t: (-weights[t], t)):
+        total, index = heapq.heappop(heap)
+        shards[index].append(test)
+        heapq.heappush(heap, (total + weights[test], index))
+    return [sorted(shard) for shard in shards]
+
+
+def parse_shard(value):
+    """Parse a shard spec such as '2/4' into (index, count), with 1 <= index <= count."""
+    index, sep, count = value.partition('/')
+    if not sep or not index.strip().isdigit() or not count.strip().isdigit():
+        raise ValueError(f"expected INDEX/COUNT such as 1/4, not {value!r}")
+    index, count = int(index), int(count)
+    if not 1 <= index <= count:
+        raise ValueError(f"shard index must be between 1 and {count}")
+    return index, count
+
+
+def select_shard(tests, timings, shard):
+    """Return the test files of shard (index, count) of tests."""
+    index, count = shard
+    return split_tests(tests, {t: timings.file_duration(t) for t in tests}, count)[index - 1]
+
+
+def test_outcomes(records):
+    """Return {test id: outcome} from devbuddy.pytest_timing records.
+
+    A test fails if its call failed and errors if its setup or teardown (or
+    its file's collection) did.
+    """
+    outcomes = {}
+    for record in records:
+        outcome = record['outcome']
+        if outcome == 'failed' and record['when'] != 'call':
+            outcome = 'error'
+        elif outcome == 'passed' and record['when'] != 'call':
+            continue
+        previous = outcomes.get(record['nodeid'])
+        if previous is None or OUTCOMES.index(outcome) < OUTCOMES.index(previous):
+            outcomes[record['nodeid']] = outcome
+    return outcomes
+
+
+def merge_junit(paths, target):
+    """Merge the test suites of the JUnit XML files at paths into one file at target."""
+    merged = ElementTree.Element('testsuites')
+    totals = Counter()
+    for path in paths:
+        try:
+            root = ElementTree.parse(path).getroot()
+        except (OSError, ElementTree.ParseError):
+            continue
+        for suite in root.iter('testsuite'):
+            merged.append(suite)
+            for name in ('tests', 'failures', 'errors', 'skipped'):
+                totals[name] += int(suite.get(name, 0))
+            totals['time'] += float(suite.get('time', 0))
+    for name in ('tests', 'failures', 'errors', 'skipped'):
+        merged.set(name, str(totals[name]))
+    merged.set('time', f"{totals['time']:.3f}")
+    ElementTree.ElementTree(merged).write(target, encoding='utf-8', xml_declaration=True)
+
+
+def _read_records(paths):
+    records = []
+    for path in paths:
+        try:
+            with open(path, encoding='utf-8') as f:
+                records.extend(json.loads(line) for line in f if line.strip())
+        except OSError:
+            pass
+    return records
+
+
+def _run_shard(shard, report_dir, args, junitxml, capture):
+    """Run one shard of test files with pytest. Runs inside pool threads."""
+    index, paths = shard
+    args = list(args)
+    if junitxml:
+        args.append(f"--junitxml={junitxml if not capture else os.path.join(report_dir, f'shard-{index}.xml')}")
+    result = run_pytest(paths, args, os.path.join(report_dir, f'shard-{index}.jsonl'), capture)
+    return result.returncode, result.stdout
+
+
+def _print_summary(records, shards, elapsed):
+    outcomes = test_outcomes(records)
+    counts = Counter(outcomes.values())
+    labels = {'failed': 'failed', 'error': 'errors', 'skipped': 'skipped', 'passed': 'passed'}
+    parts = [f"{counts[o]} {labels[o]}" for o in OUTCOMES if counts[o]]
+    test_time = sum(r['duration'] for r in records)
+    print(f"{shards} shards: {', '.join(parts) or 'no tests ran'} in {elapsed:.2f}s "
+          f"({test_time:.2f}s of test time)")
+    for nodeid, outcome in sorted(outcomes.items()):
+        if outcome in ('failed', 'error'):
+            print(f"  {outcome.upper()} {nodeid}")
+
+
+def run_test_suite(path='.', tests=(), args=(), workers=1, shard=None, durations_file=None, junitxml=None):
+    """Run tests under path with pytest and return the exit status.
+
+    tests are the test files to run; all of path is run if there are none.
+    With workers > 1 the test files are split into that many shards of about
+    equal expected duration, run by parallel pytest processes, and their
+    results merged into one summary (and one JUnit XML file at junitxml).
+    shard=(index, count) only runs that shard of the test files, to spread
+    a suite across CI nodes. Test durations are recorded in a TimingCache
+    for later splits.
+    """
+    timings = TimingCache(path, durations_file)
+    report_dir = tempfile.mkdtemp(prefix='devbuddy-test-')
+    try:
+        if workers <= 1 and shard is None:
+            report = os.path.join(report_dir, 'shard-1.jsonl')
+            status, _ = _run_shard((1, list(tests) or [path]), report_dir, args, junitxml, False)
+            timings.record(_read_records([report]))
+            return status
+
+        tests = list(tests) or [p for p in iter_files(path) if is_test_file(p)]
+        if shard is not None:
+            tests = select_shard(tests, timings, shard)
+            print(f"Shard {shard[0]}/{shard[1]}: {len(tests)} test files.")
+            if not tests:
+                return 0
+        shards = [s for s in split_tests(tests, {t: timings.file_duration(t) for t in tests}, workers) if s]
+        capture = len(shards) > 1
+        start = time.monotonic()
+        statuses = []
+        for (index, paths), result, error in map_chunks(_run_shard, enumerate(shards, 1), len(shards),
+                                                        report_dir, args, junitxml, capture, threads=True):
+            if error is not None:
+                print(f"Error: Could not run shard {index}: {error}")
+                statuses.append(1)
+                continue
+            status, output = result
+            statuses.append(status)
+            if capture:
+                print(f"===== shard {index}/{len(shards)}: {len(paths)} test files =====")
+                print(output, end='')
+        records = _read_records(os.path.join(report_dir, f'shard-{i}.jsonl') for i in range(1, len(shards) + 1))
+        timings.record(records)
+        if capture:
+            if junitxml:
+                merge_junit([os.path.join(report_dir, f'shard-{i}.xml') for i in range(1, len(shards) + 1)],
+                            junitxml)
+            _print_summary(records, len(shards), time.monotonic() - start)
+        ran = [s for s in statuses if s != NO_TESTS_COLLECTED]
+        return max(ran) if ran else NO_TESTS_COLLECTED
+    finally:
+        timings.close()
+        shutil.rmtree(report_dir, ignore_errors=True)
+
+
+def pytest_available():
+    return importlib.util.find_spec('pytest') is not None
+
+
+def run_pytest(paths=(), args=(), report=None, capture=False):
+    """Run pytest on paths with extra arguments and return the CompletedProcess.
+
+    With report, devbuddy.pytest_timing appends the outcome and duration of
+    every test to that file. With capture, pytest's output is returned in
+    stdout instead of being shown.
+    """
+    env = dict(os.environ, **{REPORT_ENV: report}) if report else None
+    command = [sys.executable, '-m', 'pytest', '-p', 'devbuddy.pytest_timing'] + list(args) + list(paths)
+    if capture:
+        return subprocess.run(command, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    return subprocess.run(command, env=env)
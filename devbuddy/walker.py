@@ -0,0 +1,248 @@
+"""
+Streaming file discovery for DevBuddy commands.
+Walks a directory tree with os.scandir, honours .gitignore/.ignore rules and
+a default exclude set, and yields matching files as soon as they are found.
+"""
+
+import os
+import re
+
+# Directories that are never worth descending into. Build output is left to .gitignore,
+# since e.g. build/ or env/ can just as well be a source package.
+DEFAULT_EXCLUDES = frozenset([
+    '.git', '.hg', '.svn', '__pycache__', 'node_modules', '.eggs', '.tox', '.nox',
+    '.mypy_cache', '.pytest_cache', '.ruff_cache',
+])
+# Directories skipped only when they are virtual environments (contain pyvenv.cfg).
+VIRTUALENV_NAMES = frozenset(['venv', '.venv', 'env'])
+IGNORE_FILES = ('.gitignore', '.ignore')
+
+
+class IgnoreRule:
+    """A single compiled .gitignore pattern."""
+
+    __slots__ = ('base', 'prefix', 'regex', 'negate', 'dir_only')
+
+    def __init__(self, base, regex, negate, dir_only):
+        self.base = base
+        self.prefix = base.rstrip(os.sep) + os.sep
+        self.regex = regex
+        self.negate = negate
+        self.dir_only = dir_only
+
+
+def _translate(pattern):
+    """Translate a gitignore glob into a regular expression."""
+    i, n = 0, len(pattern)
+    parts = []
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith('**/', i):
+            parts.append('(?:.*/)?')
+            i += 3
+        elif pattern.startswith('**', i):
+            parts.append('.*')
+            i += 2
+        elif c == '*':
+            parts.append('[^/]*')
+            i += 1
+        elif c == '?':
+            parts.append('[^/]')
+            i += 1
+        elif c == '[':
+            j = i + 1
+            if j < n and pattern[j] == '!':
+                j += 1
+            if j < n and pattern[j] == ']':
+                j += 1
+            end = pattern.find(']', j)
+            if end == -1:
+                parts.append(re.escape(c))
+                i += 1
+                continue
+            body = pattern[i + 1:end]
+            if body.startswith('!'):
+                body = '^' + body[1:]
+            parts.append('[' + body.replace('\\', '\\\\') + ']')
+            i = end + 1
+        elif c == '\\' and i + 1 < n:
+            parts.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            parts.append(re.escape(c))
+            i += 1
+    return ''.join(parts)
+
+
+def parse_ignore_line(line, base):
+    """Compile one line of an ignore file, returning an IgnoreRule or None."""
+    line = line.rstrip('\n').rstrip('\r')
+    if not line.endswith('\\ '):
+        line = line.rstrip(' ')
+    if not line or line.startswith('#'):
+        return None
+    negate = line.startswith('!')
+    if negate:
+        line = line[1:]
+    elif line.startswith('\\!') or line.startswith('\\#'):
+        line = line[1:]
+    dir_only = line.endswith('/')
+    line = line.rstrip('/')
+    if not line:
+        return None
+    if '/' in line:
+        # Patterns containing a slash are relative to the ignore file's directory.
+        pattern = line.lstrip('/')
+    else:
+        pattern = '**/' + line
+    return IgnoreRule(base, re.compile(_translate(pattern) + r'\Z'), negate, dir_only)
+
+
+def load_ignore_file(path, base):
+    """Return the rules defined in an ignore file, or [] if it cannot be read."""
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            lines = f.readlines()
+    except OSError:
+        return []
+    rules = []
+    for line in lines:
+        rule = parse_ignore_line(line, base)
+        if rule is not None:
+            rules.append(rule)
+    return rules
+
+
+def is_ignored(path, is_dir, rules):
+    """Return True if the last rule matching the absolute path excludes it."""
+    for rule in reversed(rules):
+        if rule.dir_only and not is_dir:
+            continue
+        if not path.startswith(rule.prefix):
+            continue
+        rel = path[len(rule.prefix):]
+        if os.sep != '/':
+            rel = rel.replace(os.sep, '/')
+        if rule.regex.match(rel):
+            return not rule.negate
+    return False
+
+
+def is_excluded_dir(path, exclude=DEFAULT_EXCLUDES):
+    """Return True if the directory at path is pruned by name, or is a virtual environment."""
+    name = os.path.basename(path)
+    if name in exclude:
+        return True
+    return name in VIRTUALENV_NAMES and os.path.isfile(os.path.join(path, 'pyvenv.cfg'))
+
+
+def find_repo_root(path):
+    """Return the closest directory at or above path that contains .git, or None."""
+    current = os.path.abspath(path)
+    while True:
+        if os.path.exists(os.path.join(current, '.git')):
+            return current
+        parent = os.path.dirname(current)
+        if parent == current:
+            return None
+        current = parent
+
+
+def _inherited_rules(root):
+    """Collect ignore rules from the repository root down to root's parent."""
+    repo_root = find_repo_root(root)
+    if repo_root is None:
+        return []
+    rules = load_ignore_file(os.path.join(repo_root, '.git', 'info', 'exclude'), repo_root)
+    chain = []
+    current = os.path.dirname(root)
+    while len(current) >= len(repo_root):
+        chain.append(current)
+        parent = os.path.dirname(current)
+        if parent == current:
+            break
+        current = parent
+    for directory in reversed(chain):
+        for name in IGNORE_FILES:
+            rules.extend(load_ignore_file(os.path.join(directory, name), directory))
+    return rules
+
+
+def _walk(root, recursive, exclude, use_ignore_files):
+    """Yield (directory, abs_directory, rules, entries) for every directory visited.
+
+    entries are the directory's sorted os.DirEntry objects, and rules the
+    ignore rules in effect inside it. Excluded and ignored subdirectories
+    are never visited.
+    """
+    abs_root = os.path.abspath(root)
+    base_rules = _inherited_rules(abs_root) if use_ignore_files else []
+    stack = [(root, abs_root, base_rules)]
+    while stack:
+        directory, abs_directory, rules = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+        if use_ignore_files:
+            local_rules = []
+            for entry in entries:
+                if entry.name in IGNORE_FILES:
+                    local_rules.extend(load_ignore_file(os.path.join(abs_directory, entry.name), abs_directory))
+            if local_rules:
+                rules = rules + local_rules
+        yield directory, abs_directory, rules, entries
+        if not recursive:
+            continue
+
+        subdirs = []
+        for entry in entries:
+            if entry.name in exclude:
+                continue
+            try:
+                if not entry.is_dir(follow_symlinks=False):
+                    continue
+            except OSError:
+                continue
+            abs_path = os.path.join(abs_directory, entry.name)
+            if entry.name in VIRTUALENV_NAMES and is_excluded_dir(abs_path, exclude):
+                continue
+            if rules and is_ignored(abs_path, True, rules):
+                continue
+            subdirs.append((entry.path, abs_path, rules))
+        # Push in reverse so subdirectories are visited in sorted order.
+        stack.extend(reversed(subdirs))
+
+
+def iter_files(root, extensions=('.py',), recursive=True, exclude=DEFAULT_EXCLUDES, use_ignore_files=True):
+    """Yield files under root whose names end with one of extensions.
+
+    Pass extensions=None to yield every file. Excluded and ignored
+    directories are pruned without being entered. If root is a file it is
+    yielded as-is. Paths are yielded joined onto root, in sorted order within
+    each directory.
+    """
+    if not os.path.isdir(root):
+        yield root
+        return
+
+    suffixes = tuple(extensions) if extensions is not None else None
+    for _, abs_directory, rules, entries in _walk(root, recursive, exclude, use_ignore_files):
+        for entry in entries:
+            if suffixes is not None and not entry.name.endswith(suffixes):
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    continue
+            except OSError:
+                continue
+            if rules and is_ignored(os.path.join(abs_directory, entry.name), False, rules):
+                continue
+            yield entry.path
+
+
+def iter_dirs(root, recursive=True, exclude=DEFAULT_EXCLUDES, use_ignore_files=True):
+    """Yield (abs_directory, rules) for root and every directory that would be walked."""
+    for _, abs_directory, rules, _ in _walk(root, recursive, exclude, use_ignore_files):
+        yield abs_directory, rules
@@ -0,0 +1,191 @@
+"""
+File change watching for long-running DevBuddy commands.
+Uses Linux inotify through ctypes when available and falls back to polling
+file modification times everywhere else.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import time
+
+from .walker import DEFAULT_EXCLUDES, is_excluded_dir, iter_dirs, iter_files, is_ignored
+
+# inotify constants from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE_SELF
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+class InotifyWatcher:
+    """Report changed files under a directory tree using Linux inotify."""
+
+    # poll() blocks in select(), so waiting for the first event needs no timeout.
+    wait_timeout = None
+
+    def __init__(self, root, extensions=('.py',), recursive=True, exclude=DEFAULT_EXCLUDES):
+        libc_name = ctypes.util.find_library('c')
+        if not sys.platform.startswith('linux') or not libc_name:
+            raise OSError(errno.ENOSYS, "inotify is not available on this platform")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.root = os.path.abspath(root)
+        self.suffixes = tuple(extensions)
+        self.recursive = recursive
+        self.exclude = exclude
+        self._dirs = {}
+        self._rules = {}
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        try:
+            self._add_tree(self.root)
+        except OSError:
+            self.close()
+            raise
+
+    def _add_tree(self, directory):
+        """Watch directory and every non-ignored directory below it.
+
+        Returns the files found in newly watched directories, since they may
+        have been written before the watch existed.
+        """
+        found = []
+        for abs_directory, rules in iter_dirs(directory, self.recursive, self.exclude):
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(abs_directory), _WATCH_MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                raise OSError(err, f"Could not watch {abs_directory}: {os.strerror(err)}")
+            self._dirs[wd] = abs_directory
+            self._rules[abs_directory] = rules
+        if directory != self.root:
+            found.extend(os.path.abspath(p) for p in iter_files(directory, self.suffixes, exclude=self.exclude))
+        return found
+
+    def _wants(self, path, is_dir=False):
+        rules = self._rules.get(os.path.dirname(path), [])
+        return not (rules and is_ignored(path, is_dir, rules))
+
+    def poll(self, timeout):
+        """Wait up to timeout seconds and return the set of changed files.
+
+        Returns None if the kernel queue overflowed and events were lost;
+        callers should then rescan the whole tree.
+        """
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + _EVENT_HEADER.size:offset + _EVENT_HEADER.size + length].rstrip(b'\0')
+            offset += _EVENT_HEADER.size + length
+            if mask & IN_Q_OVERFLOW:
+                return None
+            directory = self._dirs.get(wd)
+            if mask & IN_IGNORED:
+                self._rules.pop(self._dirs.pop(wd, None), None)
+                continue
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, os.fsdecode(name))
+            if mask & IN_ISDIR:
+                if self.recursive and mask & (IN_CREATE | IN_MOVED_TO) and not is_excluded_dir(path, self.exclude) \
+                        and self._wants(path, True):
+                    try:
+                        changed.update(self._add_tree(path))
+                    except OSError:
+                        pass
+            elif path.endswith(self.suffixes) and mask & (IN_CLOSE_WRITE | IN_MOVED_TO) and self._wants(path):
+                changed.add(path)
+        return changed
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class PollingWatcher:
+    """Report changed files by periodically comparing modification times."""
+
+    def __init__(self, root, extensions=('.py',), recursive=True, exclude=DEFAULT_EXCLUDES, interval=0.5):
+        self.root = root
+        self.extensions = extensions
+        self.recursive = recursive
+        self.exclude = exclude
+        self.wait_timeout = interval
+        self._snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        for path in iter_files(self.root, self.extensions, self.recursive, self.exclude):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            snapshot[os.path.abspath(path)] = (st.st_mtime_ns, st.st_size)
+        return snapshot
+
+    def poll(self, timeout):
+        """Wait up to timeout seconds and return the set of changed files."""
+        time.sleep(min(timeout, self.wait_timeout) if timeout is not None else self.wait_timeout)
+        snapshot = self._scan()
+        changed = {path for path, state in snapshot.items() if self._snapshot.get(path) != state}
+        self._snapshot = snapshot
+        return changed
+
+    def close(self):
+        pass
+
+
+def create_watcher(root, extensions=('.py',), recursive=True, exclude=DEFAULT_EXCLUDES):
+    """Return an inotify watcher for root, or a polling watcher if inotify is unavailable."""
+    try:
+        return InotifyWatcher(root, extensions, recursive, exclude)
+    except (OSError, AttributeError):
+        return PollingWatcher(root, extensions, recursive, exclude)
+
+
+def watch_changes(watcher, debounce=0.05):
+    """Yield batches of changed files, waiting for bursts of events to settle.
+
+    A batch is yielded once no new event has arrived for `debounce` seconds.
+    None is yielded when events were lost and the whole tree should be
+    rescanned.
+    """
+    while True:
+        changed = watcher.poll(watcher.wait_timeout)
+        if changed is None:
+            yield None
+            continue
+        if not changed:
+            continue
+        while True:
+            more = watcher.poll(debounce)
+            if more is None:
+                changed = None
+                break
+            if not more:
+                break
+            changed |= more
+        yield changed
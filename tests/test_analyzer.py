@@ -0,0 +1,129 @@
+import json
+import sys
+import textwrap
+
+import pytest
+from click.testing import CliRunner
+
+from devbuddy import analyzer
+from devbuddy.analyzer import AnalysisCache, Message, analyze_code, iter_pylint
+from devbuddy.commands import analysis
+
+# A stand-in for pylint: reports missing-module-docstring for files containing 'nodoc',
+# fails as a whole (status 32) for files containing 'crash', and logs every run.
+FAKE_PYLINT = textwrap.dedent("""\
+    import json, sys
+    args = sys.argv[1:]
+    with open(sys.argv[0] + '.log', 'a') as log:
+        log.write(json.dumps(args) + '\\n')
+    if args == ['--version']:
+        print('pylint 9.9.9')
+        sys.exit(0)
+    records = []
+    for path in [a for a in args if not a.startswith('--')]:
+        text = open(path).read()
+        if 'crash' in text:
+            sys.exit(32)
+        if 'nodoc' in text:
+            records.append({'path': path, 'line': 1, 'column': 0, 'message-id': 'C0114',
+                            'symbol': 'missing-module-docstring', 'message': 'Missing module docstring',
+                            'type': 'convention'})
+    print(json.dumps(records))
+    sys.exit(16 if records else 0)
+""")
+
+
+@pytest.fixture
+def pylint(tmp_path):
+    script = tmp_path / 'pylint.py'
+    script.write_text(FAKE_PYLINT)
+
+    class FakePylint:
+        command = [sys.executable, str(script)]
+
+        @staticmethod
+        def runs():
+            log = tmp_path / 'pylint.py.log'
+            return [json.loads(line) for line in log.read_text().splitlines()] if log.exists() else []
+
+    return FakePylint
+
+
+def _files(root, contents):
+    paths = []
+    for name, text in contents.items():
+        (root / name).write_text(text)
+        paths.append(str(root / name))
+    return paths
+
+
+def test_messages_are_split_per_file(pylint, tmp_path):
+    paths = _files(tmp_path, {'a.py': 'nodoc\n', 'b.py': 'ok\n', 'c.py': 'nodoc\n'})
+    results = {r.path: r for r in iter_pylint(paths, jobs=2, command=pylint.command)}
+    assert sorted(results) == paths
+    assert [m.code for m in results[paths[0]].messages] == ['C0114']
+    assert results[paths[1]].messages == []
+    for run in pylint.runs():
+        assert '--disable=duplicate-code,cyclic-import' in run
+
+
+def test_failed_shard_is_an_error(pylint, tmp_path):
+    paths = _files(tmp_path, {'a.py': 'crash\n'})
+    [result] = iter_pylint(paths, jobs=1, command=pylint.command)
+    assert result.error and result.messages == []
+
+
+def test_cached_files_are_not_linted_again(pylint, tmp_path):
+    paths = _files(tmp_path, {'a.py': 'nodoc\n', 'b.py': 'ok\n'})
+    cache = AnalysisCache('pylint', '9.9.9', analyzer.PYLINT_CONFIG_FILES, str(tmp_path / 'cache'))
+    try:
+        first = list(iter_pylint(paths, jobs=1, cache=cache, command=pylint.command))
+        runs = len(pylint.runs())
+        second = list(iter_pylint(paths, jobs=1, cache=cache, command=pylint.command))
+        assert len(pylint.runs()) == runs
+        assert all(r.cached for r in second)
+        assert {r.path: r.messages for r in second} == {r.path: r.messages for r in first}
+        (tmp_path / 'b.py').write_text('nodoc\n')
+        third = {r.path: r for r in iter_pylint(paths, jobs=1, cache=cache, command=pylint.command)}
+        assert third[paths[0]].cached and not third[paths[1]].cached
+        assert pylint.runs()[-1][-1:] == [paths[1]]
+    finally:
+        cache.close()
+
+
+def test_analysis_cache_invalidation(tmp_path):
+    path = _files(tmp_path, {'a.py': 'x = 1\n'})[0]
+    cache_dir = str(tmp_path / 'cache')
+    message = Message(path, 1, 0, 'C0114', 'missing-module-docstring', 'Missing module docstring', 'convention')
+    cache = AnalysisCache('pylint', '1.0', ['.pylintrc'], cache_dir)
+    cache.set(path, [message])
+    assert cache.get(path) == [message]
+    cache.close()
+    assert AnalysisCache('pylint', '1.0', ['.pylintrc'], cache_dir).get(path) == [message]
+    assert AnalysisCache('pylint', '2.0', ['.pylintrc'], cache_dir).get(path) is None
+    (tmp_path / '.pylintrc').write_text('[MESSAGES CONTROL]\n')
+    assert AnalysisCache('pylint', '1.0', ['.pylintrc'], cache_dir).get(path) is None
+
+
+def test_analyze_code_reports_and_counts(pylint, tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv('DEVBUDDY_CACHE_DIR', str(tmp_path / 'cache'))
+    monkeypatch.setattr(analyzer, 'pylint_command', lambda: pylint.command)
+    (tmp_path / 'src').mkdir()
+    _files(tmp_path / 'src', {'a.py': 'nodoc\n', 'b.py': 'ok\n'})
+    assert analyze_code(str(tmp_path / 'src'), jobs=1) == 1
+    out = capsys.readouterr().out
+    assert 'with pylint 9.9.9' in out and 'C0114' in out and 'Cache: 0 hits, 2 misses.' in out
+    assert analyze_code(str(tmp_path / 'src'), jobs=1) == 1
+    assert 'Cache: 2 hits, 0 misses.' in capsys.readouterr().out
+
+
+def test_importable_pylint_is_not_installed_again(tmp_path, monkeypatch):
+    (tmp_path / 'a.py').write_text('x = 1\n')
+    calls = []
+    monkeypatch.setattr(analyzer.importlib.util, 'find_spec', lambda name: object())
+    monkeypatch.setattr(analyzer.shutil, 'which', lambda name: None)
+    monkeypatch.setattr(analysis.subprocess, 'run', lambda *a, **k: pytest.fail('pip install was run'))
+    monkeypatch.setattr(analysis, 'analyze_code', lambda path, **kwargs: calls.append(path))
+    result = CliRunner().invoke(analysis.analyze, [str(tmp_path)])
+    assert result.exit_code == 0, result.output
+    assert calls == [str(tmp_path)]
@@ -0,0 +1,118 @@
+import textwrap
+
+import pytest
+
+from devbuddy.astlint import check_source, select_rules
+
+
+def _codes(source, path='mod.py', codes=None):
+    return [(m.code, m.line) for m in check_source(textwrap.dedent(source), path, codes)]
+
+
+def test_unused_import():
+    assert _codes("""\
+        import os
+        import sys
+        from json import loads as load, dumps
+        print(sys.argv, load)
+    """, codes=['DB001']) == [('DB001', 1), ('DB001', 3)]
+
+
+def test_unused_import_exceptions():
+    source = """\
+        import os
+        import json as json
+        from typing import TYPE_CHECKING
+        __all__ = ['TYPE_CHECKING']
+    """
+    assert _codes(source, codes=['DB001']) == [('DB001', 1)]
+    # Imports in a package's __init__ are re-exports.
+    assert _codes(source, 'pkg/__init__.py', codes=['DB001']) == []
+
+
+def test_undefined_name():
+    assert _codes("""\
+        def f(a):
+            return a + b + len(a)
+
+        class C:
+            x = 1
+            def m(self):
+                return x
+    """, codes=['DB002']) == [('DB002', 2), ('DB002', 7)]
+
+
+def test_names_bound_anywhere_are_defined():
+    assert _codes("""\
+        def f():
+            return later()
+
+        def later():
+            return [y for y in range(3) if (z := y)] + [z]
+
+        try:
+            pass
+        except ValueError as error:
+            print(error, __name__)
+    """, codes=['DB002']) == []
+
+
+def test_bare_except():
+    assert _codes("""\
+        try:
+            pass
+        except:
+            pass
+        try:
+            pass
+        except Exception:
+            pass
+    """, codes=['DB003']) == [('DB003', 3)]
+
+
+def test_mutable_default():
+    assert _codes("""\
+        def f(a, b=[], *, c={}, d=None, e=(), g=dict()):
+            pass
+        g = lambda x=set(): x
+    """, codes=['DB004']) == [('DB004', 1), ('DB004', 1), ('DB004', 1), ('DB004', 3)]
+
+
+def test_shadowed_builtin():
+    assert _codes("""\
+        def f(list, id=1):
+            input = 2
+            input = 3
+            return list, id, input
+
+        class Model:
+            id = 1
+    """, codes=['DB005']) == [('DB005', 1), ('DB005', 1), ('DB005', 2)]
+
+
+def test_long_function():
+    body = ''.join(f"    x{i} = {i}\n" for i in range(85))
+    assert _codes(f"def short():\n    pass\n\ndef long():\n{body}", codes=['DB006']) == [('DB006', 4)]
+
+
+def test_noqa():
+    source = """\
+        import os  # noqa
+        import sys  # noqa: DB001
+        import json  # noqa: DB002
+        import re  # NOQA
+    """
+    assert _codes(source, codes=['DB001']) == [('DB001', 3)]
+
+
+def test_syntax_error():
+    assert _codes("def f(:\n") == [('DB000', 1)]
+
+
+@pytest.mark.parametrize('select, ignore, expected', [
+    (None, None, ['DB001', 'DB002', 'DB003', 'DB004', 'DB005', 'DB006']),
+    (['DB003'], None, ['DB003']),
+    (None, ['DB001', 'DB006'], ['DB002', 'DB003', 'DB004', 'DB005']),
+])
+def test_select_rules(select, ignore, expected):
+    assert select_rules(select, ignore) == expected
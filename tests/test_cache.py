@@ -0,0 +1,112 @@
+import os
+
+import pytest
+
+from devbuddy.cache import CACHE_DIR_ENV, ConfigHasher, ResultCache, hash_bytes, hash_file, user_cache_dir
+from devbuddy.engines import FormatterEngine, get_engine
+from devbuddy.formatter import FormatCache, _format_with_cache
+
+
+def test_user_cache_dir_override(monkeypatch, tmp_path):
+    monkeypatch.setenv(CACHE_DIR_ENV, str(tmp_path))
+    assert user_cache_dir() == str(tmp_path)
+
+
+def test_hash_file_matches_hash_bytes(tmp_path):
+    path = tmp_path / 'a.py'
+    path.write_bytes(b'x = 1\n')
+    assert hash_file(str(path)) == hash_bytes(b'x = 1\n')
+
+
+def test_result_cache_persists(tmp_path):
+    with ResultCache('test', str(tmp_path)) as cache:
+        assert cache.get('key') is None
+        cache.set('key', 'value')
+        cache.set('other', 'x')
+        assert cache.get('key') == 'value'
+        assert (cache.hits, cache.misses) == (1, 1)
+    with ResultCache('test', str(tmp_path)) as cache:
+        assert cache.get('key') == 'value'
+        assert cache.items('ke') == [('key', 'value')]
+        cache.delete('key')
+        assert cache.get('key') is None
+        cache.clear()
+        assert cache.items() == []
+
+
+def test_file_digest_follows_content(tmp_path):
+    path = tmp_path / 'a.py'
+    path.write_text('one\n')
+    with ResultCache('test', str(tmp_path)) as cache:
+        first = cache.file_digest(str(path))
+        assert cache.file_digest(str(path)) == first
+        path.write_text('two, longer\n')
+        assert cache.file_digest(str(path)) != first
+        assert cache.file_digest(str(path)) == hash_file(str(path))
+
+
+def test_file_digest_is_not_recomputed_for_unchanged_files(tmp_path, monkeypatch):
+    path = tmp_path / 'a.py'
+    path.write_text('one\n')
+    with ResultCache('test', str(tmp_path)) as cache:
+        digest = cache.file_digest(str(path))
+        monkeypatch.setattr('devbuddy.cache.hash_file', lambda p: pytest.fail('file hashed again'))
+        assert cache.file_digest(str(path)) == digest
+
+
+def test_config_hasher_covers_parent_directories(tmp_path):
+    sub = tmp_path / 'pkg' / 'sub'
+    sub.mkdir(parents=True)
+    before = ConfigHasher(['setup.cfg']).digest(str(sub))
+    assert ConfigHasher(['setup.cfg']).digest(str(sub)) == before
+    (tmp_path / 'setup.cfg').write_text('[isort]\n')
+    after = ConfigHasher(['setup.cfg']).digest(str(sub))
+    assert after != before
+    (tmp_path / 'unrelated.cfg').write_text('x')
+    assert ConfigHasher(['setup.cfg']).digest(str(sub)) == after
+
+
+def _engine(name='fake', version='1', config_files=('tool.cfg',)):
+    return FormatterEngine(name, version, lambda source, path, lines: source, config_files=list(config_files))
+
+
+def test_format_cache_invalidation(tmp_path):
+    path = tmp_path / 'a.py'
+    path.write_text('x = 1\n')
+    cache_dir = str(tmp_path / 'cache')
+    cache = FormatCache(_engine(), cache_dir)
+    assert not cache.is_formatted(str(path))
+    cache.mark_formatted(str(path))
+    assert cache.is_formatted(str(path))
+    cache.close()
+
+    assert FormatCache(_engine(), cache_dir).is_formatted(str(path))
+    # A new tool version, new configuration or new content invalidates the entry.
+    assert not FormatCache(_engine(version='2'), cache_dir).is_formatted(str(path))
+    (tmp_path / 'tool.cfg').write_text('line_length = 99\n')
+    assert not FormatCache(_engine(), cache_dir).is_formatted(str(path))
+    cache = FormatCache(_engine(), cache_dir)
+    cache.mark_formatted(str(path))
+    path.write_text('x = 2\n')
+    assert not cache.is_formatted(str(path))
+    cache.close()
+
+
+def test_format_with_cache_yields_in_order(tmp_path):
+    pytest.importorskip('black')
+    paths = []
+    for i, name in enumerate('abcdef'):
+        path = tmp_path / f"{name}.py"
+        path.write_text(f"x = {i}\n")
+        paths.append(str(path))
+    cache = FormatCache(get_engine('black'), str(tmp_path / 'cache'))
+    try:
+        for p in paths[:4]:
+            cache.mark_formatted(p)
+        results = list(_format_with_cache(paths, 'black', 1, cache))
+        assert [r.path for r in results if r.cached] == paths[:4]
+        assert sorted(r.path for r in results if not r.cached) == paths[4:]
+        # Files formatted on this run are cached for the next one.
+        assert all(r.cached for r in _format_with_cache(paths, 'black', 1, cache))
+    finally:
+        cache.close()
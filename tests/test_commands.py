@@ -0,0 +1,109 @@
+import subprocess
+import sys
+
+import click
+import pytest
+from click.testing import CliRunner
+
+from devbuddy.commands import LazyGroup, import_command, short_help
+
+
+def _group(**lazy):
+    @click.group(cls=LazyGroup)
+    def group():
+        pass
+    for name, (loader, help_text) in lazy.items():
+        group.add_lazy_command(name, loader, help_text)
+    return group
+
+
+def _command(name, output):
+    @click.command(name)
+    def command():
+        """Loaded."""
+        click.echo(output)
+    return command
+
+
+def test_lazy_command_is_loaded_on_first_use():
+    loads = []
+
+    def loader(group, name):
+        loads.append(name)
+        group.add_command(_command(name, 'ran'))
+    group = _group(run=(loader, 'Run it.'))
+    assert group.list_commands(None) == ['run']
+    assert loads == []
+    assert CliRunner().invoke(group, ['run']).output == 'ran\n'
+    assert CliRunner().invoke(group, ['run']).output == 'ran\n'
+    assert loads == ['run']
+
+
+def test_loader_may_register_other_lazy_commands():
+    loads = []
+
+    def loader(group, name):
+        loads.append(name)
+        group.add_command(_command('one', '1'))
+        group.add_command(_command('two', '2'))
+    group = _group(one=(loader, 'One.'), two=(loader, 'Two.'))
+    assert CliRunner().invoke(group, ['two']).output == '2\n'
+    assert group.lazy_commands == {}
+    assert CliRunner().invoke(group, ['one']).output == '1\n'
+    assert loads == ['two']
+
+
+def test_loader_that_does_not_register_the_command():
+    group = _group(ghost=(lambda group, name: None, 'Boo.'))
+    result = CliRunner().invoke(group, ['ghost'])
+    assert result.exit_code == 1
+    assert 'Could not load the ghost command.' in result.output
+    assert CliRunner().invoke(group, ['nothing']).exit_code == 2
+
+
+def test_help_does_not_load_commands():
+    def loader(group, name):
+        raise AssertionError('loaded for --help')
+    group = _group(build=(loader, 'Build the project. Then some more.'), lint=(loader, 'Lint files.'))
+    group.add_command(_command('hidden', ''))
+    group.commands['hidden'].hidden = True
+    result = CliRunner().invoke(group, ['--help'])
+    assert result.exit_code == 0
+    assert 'build  Build the project.' in result.output and 'lint   Lint files.' in result.output
+    assert 'hidden' not in result.output
+
+
+def test_import_command():
+    group = _group(hello=(import_command('devbuddy.cli:hello'), 'Say hello.'))
+    assert CliRunner().invoke(group, ['hello']).output == "Hello from z0roday's DevBuddy!\n"
+
+
+@pytest.mark.parametrize('text', [
+    'Short.',
+    'Find where NAME is defined.\n\nNAME may be a plain name.',
+    'Count code, comment and blank lines per language and directory, with Python complexity.',
+    'Create a new project (e.g., dbuddy create flask-app [--dockerize]).',
+    'No full stop at all in this rather long help text of a command',
+    'Averyveryveryveryveryveryveryveryveryveryverylongword and more.',
+])
+@pytest.mark.parametrize('limit', [20, 45, 80])
+def test_short_help_matches_click(text, limit):
+    assert short_help(text, limit) == click.Command('x', help=text).get_short_help_str(limit)
+
+
+def test_registered_short_help_matches_the_commands():
+    from devbuddy.cli import COMMANDS, cli
+
+    for name, (_, help_text) in COMMANDS.items():
+        command = cli.get_command(None, name)
+        assert short_help(help_text) == command.get_short_help_str(45), name
+
+
+def test_cli_startup_imports_no_commands():
+    code = ("import sys\n"
+            "from click.testing import CliRunner\n"
+            "from devbuddy.cli import cli\n"
+            "assert CliRunner().invoke(cli, ['--help']).exit_code == 0\n"
+            "print(sorted(m for m in sys.modules if m.startswith('devbuddy.commands.')))\n")
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    assert result.stdout == '[]\n'
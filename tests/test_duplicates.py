@@ -0,0 +1,98 @@
+import textwrap
+
+from devbuddy import duplicates
+from devbuddy.duplicates import find_duplicates, group_duplicates, iter_duplicates, window_sizes, winnow
+
+BLOCK = textwrap.dedent("""\
+    def compute(values, scale):
+        total = 0
+        for index, value in enumerate(values):
+            if value > scale:
+                total += value * index - scale
+            else:
+                total -= value // (index + 1)
+        result = [total, scale, len(values)]
+        return sum(result) / max(1, len(result))
+""")
+
+
+def test_winnow_is_deterministic():
+    tokens = [i * 7 % 13 for i in range(200)]
+    assert winnow(tokens, 5, 4) == winnow(list(tokens), 5, 4)
+
+
+def test_winnow_short_input():
+    hashes, positions = winnow([1, 2, 3], 5, 4)
+    assert list(hashes) == [] and list(positions) == []
+
+
+def test_winnow_keeps_one_fingerprint_per_window():
+    tokens = [i * 31 % 97 for i in range(300)]
+    k, window = 5, 8
+    _, positions = winnow(tokens, k, window)
+    count = len(tokens) - k + 1
+    assert list(positions) == sorted(set(positions))
+    # Every window of consecutive k-grams contains a selected position.
+    for start in range(count - window + 1):
+        assert any(start <= p < start + window for p in positions)
+
+
+def test_shared_runs_share_fingerprints():
+    k, window = window_sizes(20)
+    shared = [i * 17 % 101 for i in range(20)]
+    hashes_a, _ = winnow([1000 + i for i in range(30)] + shared + [2000 + i for i in range(30)], k, window)
+    hashes_b, _ = winnow([3000 + i for i in range(10)] + shared, k, window)
+    assert set(hashes_a) & set(hashes_b)
+
+
+def test_find_duplicates(tmp_path):
+    (tmp_path / 'a.py').write_text(BLOCK)
+    (tmp_path / 'b.py').write_text('import os\n\n\n' + BLOCK.replace('compute', 'other'))
+    (tmp_path / 'c.py').write_text('x = 1\n')
+    paths = sorted(str(p) for p in tmp_path.iterdir())
+    found, errors, files = find_duplicates(paths, jobs=1, min_tokens=30)
+    assert errors == {}
+    assert sorted(files) == paths
+    assert len(found) == 1
+    path_a, first_a, last_a, path_b, first_b, last_b, tokens = found[0]
+    assert (path_a, path_b) == (paths[0], paths[1])
+    assert (first_a, last_a) == (1, 9)
+    assert (first_b, last_b) == (4, 12)
+    assert tokens >= 30
+
+
+def test_find_duplicates_none(tmp_path):
+    (tmp_path / 'a.py').write_text(BLOCK)
+    (tmp_path / 'b.py').write_text('x = 1\n')
+    found, _, _ = find_duplicates([str(tmp_path / 'a.py'), str(tmp_path / 'b.py')], jobs=1, min_tokens=30)
+    assert found == []
+
+
+def test_group_duplicates():
+    pairs = [
+        ('a.py', 1, 9, 'b.py', 4, 12, 60),
+        ('a.py', 1, 9, 'c.py', 2, 10, 55),
+        ('b.py', 20, 30, 'd.py', 1, 11, 70),
+        ('d.py', 1, 11, 'e.py', 5, 15, 80),
+    ]
+    assert group_duplicates(pairs) == [
+        ([('a.py', 1, 9), ('b.py', 4, 12), ('c.py', 2, 10)], 60),
+        ([('b.py', 20, 30), ('d.py', 1, 11), ('e.py', 5, 15)], 80),
+    ]
+
+
+def test_iter_duplicates_reports_groups_once(tmp_path):
+    for name in ('a.py', 'b.py', 'c.py'):
+        (tmp_path / name).write_text(BLOCK)
+    paths = sorted(str(p) for p in tmp_path.iterdir())
+    results = {r.path: r for r in iter_duplicates(paths, jobs=1, min_tokens=30)}
+    assert [m.code for m in results[paths[0]].messages] == ['DB100']
+    assert results[paths[1]].messages == [] and results[paths[2]].messages == []
+    text = results[paths[0]].messages[0].text
+    assert f"{paths[1]}:1-9" in text and f"{paths[2]}:1-9" in text
+
+
+def test_unreadable_file_is_an_error(tmp_path):
+    missing = str(tmp_path / 'missing.py')
+    _, errors, files = duplicates.find_duplicates([missing], jobs=1)
+    assert missing in errors and files == []
@@ -0,0 +1,101 @@
+import pytest
+
+from devbuddy import engines
+
+SOURCE = 'a\nb\nc\nd\n'
+UGLY = "x = {  'a':37,'b':42,\n'c':927}\n"
+
+
+@pytest.fixture(autouse=True)
+def fresh_engines(monkeypatch):
+    monkeypatch.setattr(engines, '_engines', {})
+
+
+@pytest.mark.parametrize('tool', engines.SUPPORTED_TOOLS)
+def test_engine_formats_in_process(tool, tmp_path):
+    pytest.importorskip(tool)
+    engine = engines.get_engine(tool)
+    assert engine.name == tool
+    assert engine.version
+    assert engine.config_files == engines.CONFIG_FILES[tool]
+    source = 'import sys\nimport os\n' if tool == 'isort' else UGLY
+    formatted = engine.format_source(source, str(tmp_path / 'a.py'))
+    assert formatted != source
+    assert engine.format_source(formatted, str(tmp_path / 'a.py')) == formatted
+
+
+def test_engine_is_loaded_once(monkeypatch):
+    loads = []
+
+    def load():
+        loads.append(1)
+        return engines.FormatterEngine('fake', '1', lambda source, path, lines: source)
+
+    monkeypatch.setitem(engines._LOADERS, 'fake', load)
+    assert engines.get_engine('fake') is engines.get_engine('fake')
+    assert loads == [1]
+
+
+def test_missing_tool(monkeypatch):
+    def load():
+        raise ImportError('not installed')
+
+    monkeypatch.setitem(engines._LOADERS, 'fake', load)
+    assert engines.get_engine('fake') is None
+    assert engines.get_engine('unknown') is None
+
+
+def test_parse_tools():
+    assert engines.parse_tools('isort, black,,') == ['isort', 'black']
+
+
+@pytest.mark.parametrize('after, ranges, expected', [
+    (SOURCE, [(2, 3)], [(2, 3)]),
+    ('x\na\nb\nc\nd\n', [(2, 3)], [(3, 4)]),  # lines inserted above shift the range
+    ('a\nb\nb2\nc\nd\n', [(2, 3)], [(2, 4)]),  # lines inserted inside it widen it
+    ('a\nB\nc\nd\n', [(1, 1), (3, 4)], [(1, 1), (3, 4)]),
+    ('a\nd\n', [(2, 3), (4, 4)], [(2, 2)]),  # a range whose lines were all removed is dropped
+])
+def test_remap_line_ranges(after, ranges, expected):
+    assert engines.remap_line_ranges(SOURCE, after, ranges) == expected
+
+
+@pytest.fixture
+def fake_engines(monkeypatch):
+    calls = []
+
+    def insert_header(source, path, lines):
+        calls.append(('header', lines))
+        return '# header\n' + source
+
+    def upper(source, path, lines):
+        calls.append(('upper', lines))
+        out = source.splitlines(True)
+        for start, end in lines or [(1, len(out))]:
+            out[start - 1:end] = [line.upper() for line in out[start - 1:end]]
+        return ''.join(out)
+
+    monkeypatch.setattr(engines, '_engines', {
+        'header': engines.FormatterEngine('header', '1', insert_header, config_files=['a.cfg']),
+        'upper': engines.FormatterEngine('upper', '2', upper, config_files=['a.cfg', 'b.cfg']),
+    })
+    return calls
+
+
+def test_pipeline_chains_engines(fake_engines):
+    engine = engines.get_engine('header,upper')
+    assert engine.name == 'header+upper'
+    assert engine.version == '1+2'
+    assert engine.config_files == ['a.cfg', 'b.cfg']
+    assert engine.format_source('x\n') == '# HEADER\nX\n'
+
+
+def test_pipeline_remaps_ranges_between_engines(fake_engines):
+    engine = engines.get_engine('header,upper')
+    assert engine.format_source('a\nb\nc\n', 't.py', [(2, 2)]) == '# header\na\nB\nc\n'
+    # The header moved line 2 down by one before the second tool ran.
+    assert fake_engines == [('header', [(2, 2)]), ('upper', [(3, 3)])]
+
+
+def test_pipeline_missing_tool(fake_engines):
+    assert engines.get_engine('header,nonexistent') is None
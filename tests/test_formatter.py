@@ -0,0 +1,72 @@
+import os
+import stat
+
+import pytest
+
+from devbuddy import formatter
+from devbuddy.formatter import write_source
+from devbuddy.plugins.hooks import POST_FORMAT_FILE, PRE_FORMAT_FILE, registry
+
+
+def test_write_source_keeps_mode(tmp_path):
+    path = tmp_path / 'script.py'
+    path.write_text('old\n')
+    os.chmod(path, 0o751)
+    write_source(str(path), 'new\n')
+    assert path.read_text() == 'new\n'
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o751
+    assert [p.name for p in tmp_path.iterdir()] == ['script.py']
+
+
+def test_write_source_newline(tmp_path):
+    path = tmp_path / 'a.py'
+    write_source(str(path), 'a\nb\n', newline='\r\n')
+    assert path.read_bytes() == b'a\r\nb\r\n'
+
+
+@pytest.mark.skipif(not hasattr(os, 'symlink'), reason='symlinks not supported')
+def test_write_source_through_symlink(tmp_path):
+    target = tmp_path / 'real.py'
+    target.write_text('old\n')
+    link = tmp_path / 'link.py'
+    os.symlink(target, link)
+    write_source(str(link), 'new\n')
+    assert os.path.islink(link)
+    assert target.read_text() == 'new\n'
+
+
+def test_write_source_keeps_hard_links(tmp_path):
+    path = tmp_path / 'a.py'
+    path.write_text('old\n')
+    other = tmp_path / 'b.py'
+    os.link(path, other)
+    write_source(str(path), 'new\n')
+    assert other.read_text() == 'new\n'
+    assert os.stat(path).st_ino == os.stat(other).st_ino
+
+
+@pytest.fixture
+def format_hooks(monkeypatch):
+    """Record the format hooks fired through the global hook registry."""
+    fired = []
+    for name, value in (('subscribers', {}), ('active', set()), ('lazy', {}), ('stats', {}), ('_budgets', {})):
+        monkeypatch.setattr(registry, name, value)
+    registry.subscribe(PRE_FORMAT_FILE, lambda path: fired.append(('pre', path)), 'test')
+    registry.subscribe(POST_FORMAT_FILE, lambda result: fired.append(('post', result.path, result.changed)), 'test')
+    return fired
+
+
+def test_watch_code_fires_format_hooks(tmp_path, monkeypatch, format_hooks, capsys):
+    pytest.importorskip('black')
+    path = tmp_path / 'a.py'
+    path.write_text("x = 1\n")
+
+    def one_change(watcher, debounce):
+        path.write_text("x = {  'a':37}\n")
+        yield {str(path)}
+    monkeypatch.setattr(formatter, 'watch_changes', one_change)
+    formatter.watch_code(str(tmp_path), use_cache=False, jobs=1)
+    assert path.read_text() == 'x = {"a": 37}\n'
+    # The first pass goes through format_code, the change through the watcher's own loop.
+    assert format_hooks == [('pre', str(path)), ('post', str(path), False),
+                            ('pre', str(path)), ('post', str(path), True)]
@@ -0,0 +1,109 @@
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from devbuddy import githooks
+from devbuddy.plugins.hooks import POST_FORMAT_FILE, PRE_FORMAT_FILE, registry
+
+pytestmark = pytest.mark.skipif(shutil.which('git') is None, reason='git is not installed')
+
+UGLY = "x = {  'a':37}\n"
+PRETTY = "x = {\"a\": 37}\n"
+
+
+def _git(repo, *args):
+    return subprocess.run(['git', '-c', 'user.name=Test', '-c', 'user.email=test@example.com'] + list(args),
+                          cwd=repo, check=True, capture_output=True, text=True).stdout
+
+
+@pytest.fixture
+def repo(tmp_path):
+    pytest.importorskip('black')
+    _git(tmp_path, 'init', '-q')
+    (tmp_path / 'README').write_text('readme\n')
+    _git(tmp_path, 'add', '.')
+    _git(tmp_path, 'commit', '-q', '-m', 'initial')
+    return tmp_path
+
+
+def _staged(repo, path):
+    return _git(repo, 'show', f":{path}")
+
+
+def test_format_staged(repo, capsys):
+    (repo / 'a.py').write_text(UGLY)
+    (repo / 'b.py').write_text(PRETTY)
+    _git(repo, 'add', 'a.py', 'b.py')
+    assert githooks.format_staged(str(repo)) == 0
+    assert _staged(repo, 'a.py') == PRETTY
+    assert (repo / 'a.py').read_text() == PRETTY
+    assert 'reformatted a.py' in capsys.readouterr().out
+    assert _git(repo, 'status', '--porcelain') == 'A  a.py\nA  b.py\n'
+
+
+@pytest.fixture
+def format_hooks(monkeypatch):
+    """Record the format hooks fired through the global hook registry."""
+    fired = []
+    for name, value in (('subscribers', {}), ('active', set()), ('lazy', {}), ('stats', {}), ('_budgets', {})):
+        monkeypatch.setattr(registry, name, value)
+    registry.subscribe(PRE_FORMAT_FILE, lambda path: fired.append(('pre', path)), 'test')
+    registry.subscribe(POST_FORMAT_FILE, lambda result: fired.append(('post', result.path, result.changed)), 'test')
+    return fired
+
+
+def test_format_staged_fires_format_hooks(repo, format_hooks):
+    (repo / 'a.py').write_text(UGLY)
+    (repo / 'b.py').write_text(PRETTY)
+    _git(repo, 'add', 'a.py', 'b.py')
+    assert githooks.format_staged(str(repo), check=True) == 1
+    a, b = str(repo / 'a.py'), str(repo / 'b.py')
+    assert sorted(format_hooks) == [('post', a, True), ('post', b, False), ('pre', a), ('pre', b)]
+
+
+def test_format_staged_keeps_unstaged_changes(repo):
+    (repo / 'a.py').write_text(UGLY)
+    _git(repo, 'add', 'a.py')
+    (repo / 'a.py').write_text(UGLY + "y = [  1]\n")
+    assert githooks.format_staged(str(repo)) == 0
+    assert _staged(repo, 'a.py') == PRETTY
+    assert (repo / 'a.py').read_text() == UGLY + "y = [  1]\n"
+
+
+def test_format_staged_check(repo, capsys):
+    (repo / 'a.py').write_text(UGLY)
+    _git(repo, 'add', 'a.py')
+    assert githooks.format_staged(str(repo), check=True) == 1
+    assert _staged(repo, 'a.py') == UGLY
+    assert 'would reformat a.py' in capsys.readouterr().out
+
+
+def test_format_staged_reports_broken_files(repo):
+    (repo / 'a.py').write_text('def f(:\n')
+    _git(repo, 'add', 'a.py')
+    assert githooks.format_staged(str(repo)) == 1
+    assert _staged(repo, 'a.py') == 'def f(:\n'
+
+
+def test_install_and_uninstall_hook(repo):
+    path = githooks.install_hook(str(repo), tool='isort,black', secrets=True)
+    assert os.access(path, os.X_OK)
+    with open(path) as f:
+        assert 'hooks run --tool isort,black --secrets' in f.read()
+    assert githooks.uninstall_hook(str(repo))
+    assert not os.path.exists(path)
+    assert not githooks.uninstall_hook(str(repo))
+
+
+def test_install_hook_keeps_foreign_hooks(repo):
+    path = githooks.hook_path(str(repo))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write('#!/bin/sh\nexit 0\n')
+    with pytest.raises(FileExistsError):
+        githooks.install_hook(str(repo))
+    githooks.install_hook(str(repo), force=True)
+    assert githooks.is_devbuddy_hook(path)
+    assert not githooks.is_devbuddy_hook(path + '.bak')
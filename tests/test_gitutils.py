@@ -0,0 +1,115 @@
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from devbuddy import gitutils
+
+pytestmark = pytest.mark.skipif(shutil.which('git') is None, reason='git is not installed')
+
+
+def _git(repo, *args):
+    subprocess.run(['git', '-c', 'user.name=Test', '-c', 'user.email=test@example.com'] + list(args),
+                   cwd=repo, check=True, capture_output=True)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    _git(tmp_path, 'init', '-q')
+    (tmp_path / 'keep.py').write_text('one\ntwo\nthree\n')
+    (tmp_path / 'old name.py').write_text('x = 1\n' * 20)
+    (tmp_path / 'gone.py').write_text('y = 2\n')
+    _git(tmp_path, 'add', '.')
+    _git(tmp_path, 'commit', '-q', '-m', 'initial')
+    return tmp_path
+
+
+def _by_path(files, root):
+    return {os.path.relpath(f.path, root): f for f in files}
+
+
+def test_changed_files_parses_renames_and_odd_names(repo):
+    (repo / 'keep.py').write_text('one\nTWO\nthree\nfour\n')
+    _git(repo, 'mv', 'old name.py', 'new\nname.py')
+    (repo / 'gone.py').unlink()
+    (repo / 'untracked file.py').write_text('')
+
+    files = _by_path(gitutils.changed_files(str(repo)), repo)
+    assert files['keep.py'].status == 'M'
+    assert files['gone.py'].status == 'D'
+    assert files['untracked file.py'].status == '?'
+    renamed = files['new\nname.py']
+    assert renamed.status == 'R'
+    assert renamed.old_path == os.path.join(str(repo), 'old name.py')
+
+    tracked = _by_path(gitutils.changed_files(str(repo), include_untracked=False), repo)
+    assert 'untracked file.py' not in tracked
+
+
+def test_changed_files_before_the_first_commit(tmp_path):
+    _git(tmp_path, 'init', '-q')
+    (tmp_path / 'a.py').write_text('')
+    _git(tmp_path, 'add', 'a.py')
+    assert [(os.path.basename(f.path), f.status) for f in gitutils.changed_files(str(tmp_path))] == [('a.py', 'A')]
+
+
+def test_changed_line_ranges(repo):
+    (repo / 'keep.py').write_text('zero\none\nTWO\nthree\n')
+    (repo / 'gone.py').write_text('')
+    ranges = gitutils.changed_line_ranges(str(repo))
+    assert ranges[os.path.join(str(repo), 'keep.py')] == [(1, 1), (3, 3)]
+    assert ranges[os.path.join(str(repo), 'gone.py')] == []  # only deletions
+
+
+def test_changed_line_ranges_header_like_content(repo):
+    # The added line '++ added' appears in the diff as '+++ added'.
+    (repo / 'keep.py').write_text('++ added\none\ntwo\nthree\nfour\n')
+    (repo / 'gone.py').write_text('-- removed\n')
+    _git(repo, 'add', 'gone.py')
+    _git(repo, 'commit', '-q', '-m', 'dashes')
+    (repo / 'gone.py').write_text('y = 3\n')
+    ranges = gitutils.changed_line_ranges(str(repo))
+    assert ranges[os.path.join(str(repo), 'keep.py')] == [(1, 1), (5, 5)]
+    assert ranges[os.path.join(str(repo), 'gone.py')] == [(1, 1)]
+
+
+def test_changed_line_ranges_quoted_path(repo):
+    odd = 'tab\there.py'
+    (repo / odd).write_text('a\n')
+    _git(repo, 'add', odd)
+    ranges = gitutils.changed_line_ranges(str(repo))
+    assert ranges[os.path.join(str(repo), odd)] == [(1, 1)]
+
+
+def test_staged_and_unstaged_files(repo):
+    (repo / 'keep.py').write_text('staged\n')
+    _git(repo, 'add', 'keep.py')
+    (repo / 'keep.py').write_text('staged\nand not\n')
+    (repo / 'gone.py').write_text('unstaged\n')
+    assert gitutils.staged_files(str(repo)) == ['keep.py']
+    assert sorted(gitutils.unstaged_files(str(repo))) == ['gone.py', 'keep.py']
+
+
+def test_blob_round_trip(repo):
+    entries = {e.path: e for e in gitutils.index_entries(str(repo))}
+    assert set(entries) == {'keep.py', 'old name.py', 'gone.py'}
+    assert gitutils.read_blobs([entries['keep.py'].sha], str(repo)) == [b'one\ntwo\nthree\n']
+
+    contents = [b'new\r\ncontent\n', b'']
+    shas = gitutils.write_blobs(contents, str(repo))
+    assert gitutils.read_blobs(shas, str(repo)) == contents
+
+    entry = entries['keep.py']
+    gitutils.update_index([entry._replace(sha=shas[0])], str(repo))
+    assert gitutils.staged_files(str(repo)) == ['keep.py']
+
+
+@pytest.mark.parametrize('quoted, expected', [
+    ('plain.py', 'plain.py'),
+    ('"with\\ttab.py"', 'with\ttab.py'),
+    ('"quote\\"d.py"', 'quote"d.py'),
+    ('"caf\\303\\251.py"', 'café.py'),
+])
+def test_unquote_path(quoted, expected):
+    assert gitutils._unquote_path(quoted) == expected
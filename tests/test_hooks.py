@@ -0,0 +1,95 @@
+import time
+
+import pytest
+
+from devbuddy.plugins import hooks
+from devbuddy.plugins.hooks import POST_TEST, PRE_TEST, HookRegistry
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    return str(tmp_path)
+
+
+def _run(cache_dir, func, calls=1):
+    """One CLI run: a fresh registry with func subscribed to post_test, called calls times."""
+    registry = HookRegistry(cache_dir)
+    registry.command = 'test'
+    registry.subscribe(POST_TEST, func, 'slowpoke')
+    for _ in range(calls):
+        registry.call(POST_TEST, path='.', status=0)
+    registry.save_stats()
+    return registry
+
+
+def test_subscribe_and_call(cache_dir, capsys):
+    registry = HookRegistry(cache_dir)
+    with pytest.raises(ValueError):
+        registry.subscribe('no_such_hook', print, 'plugin')
+    seen = []
+    registry.subscribe(POST_TEST, lambda path, status: seen.append((path, status)), 'good')
+    registry.subscribe(POST_TEST, lambda path, status: 1 / 0, 'bad')
+    registry.call(PRE_TEST, path='.', tests=[])
+    registry.call(POST_TEST, path='.', status=1)
+    registry.save_stats()
+    assert seen == [('.', 1)]
+    assert 'Plugin bad failed in its post_test hook' in capsys.readouterr().err
+
+
+def test_stats_add_up_across_runs(cache_dir):
+    _run(cache_dir, lambda path, status: None, calls=3)
+    _run(cache_dir, lambda path, status: None, calls=2)
+    rows, budgets = hooks.read_stats(cache_dir)
+    assert [row[:4] for row in rows] == [('test', 'slowpoke', POST_TEST, 5)]
+    assert budgets == {}
+    hooks.reset_stats(cache_dir)
+    assert hooks.read_stats(cache_dir)[0] == []
+
+
+def test_warn_budget_warns_once(cache_dir, capsys):
+    hooks.set_budget(POST_TEST, 1, 'warn', cache_dir)
+    calls = []
+    _run(cache_dir, lambda path, status: (calls.append(1), time.sleep(0.005)), calls=2)
+    assert len(calls) == 2
+    assert capsys.readouterr().err.count('Plugin slowpoke took') == 1
+
+
+def test_skip_budget_skips_the_rest_of_the_run(cache_dir, capsys):
+    hooks.set_budget(POST_TEST, 1, 'skip', cache_dir)
+    calls = []
+    _run(cache_dir, lambda path, status: (calls.append(1), time.sleep(0.005)), calls=3)
+    assert len(calls) == 1
+    assert 'skipping it for the rest of this run' in capsys.readouterr().err
+
+
+def test_skipped_plugin_is_probed_and_comes_back(cache_dir, capsys):
+    hooks.set_budget(POST_TEST, 2, 'skip', cache_dir)
+    calls = []
+
+    def slow(path, status):
+        calls.append(1)
+        time.sleep(0.01)
+
+    def fast(path, status):
+        calls.append(1)
+
+    _run(cache_dir, slow)
+    assert len(calls) == 1
+    # Later runs skip it from the start, until every PROBE_EVERY-th run times it again.
+    for _ in range(hooks.PROBE_EVERY - 1):
+        _run(cache_dir, fast)
+    assert len(calls) == 1
+    assert 'Skipping plugin slowpoke in the post_test hook' in capsys.readouterr().err
+    _run(cache_dir, fast)
+    assert len(calls) == 2
+    # The probe was under budget, so the plugin runs again.
+    _run(cache_dir, fast, calls=2)
+    assert len(calls) == 4
+    assert 'Skipping' not in capsys.readouterr().err
+
+
+def test_budgets_can_be_removed(cache_dir):
+    hooks.set_budget(POST_TEST, 5, 'skip', cache_dir)
+    assert hooks.read_stats(cache_dir)[1] == {POST_TEST: (5, 'skip')}
+    hooks.set_budget(POST_TEST, None, cache_dir=cache_dir)
+    assert hooks.read_stats(cache_dir)[1] == {}
@@ -0,0 +1,153 @@
+import textwrap
+
+from devbuddy.importgraph import ImportGraph, extract_imports, strongly_connected_components
+
+
+def _components(graph):
+    return sorted(sorted(component) for component in strongly_connected_components(graph))
+
+
+def test_scc_acyclic():
+    graph = {'a': ['b', 'c'], 'b': ['c'], 'c': []}
+    assert _components(graph) == [['a'], ['b'], ['c']]
+
+
+def test_scc_reverse_topological_order():
+    graph = {'a': ['b'], 'b': ['c'], 'c': []}
+    assert strongly_connected_components(graph) == [['c'], ['b'], ['a']]
+
+
+def test_scc_cycles():
+    graph = {'a': ['b'], 'b': ['c'], 'c': ['a', 'd'], 'd': ['e'], 'e': ['d'], 'f': ['f']}
+    assert _components(graph) == [['a', 'b', 'c'], ['d', 'e'], ['f']]
+
+
+def test_scc_successors_missing_from_graph():
+    assert _components({'a': ['x'], 'x': ['a'], 'b': ['y']}) == [['a', 'x'], ['b'], ['y']]
+
+
+def test_scc_deep_chain():
+    n = 20000
+    graph = {i: [i + 1] for i in range(n)}
+    graph[n] = [0]
+    components = strongly_connected_components(graph)
+    assert len(components) == 1 and len(components[0]) == n + 1
+
+
+def test_extract_imports_scopes():
+    source = textwrap.dedent("""\
+        import os.path
+        from . import sibling
+        from typing import TYPE_CHECKING
+        if TYPE_CHECKING:
+            import json
+        def f():
+            from ..pkg import name
+    """)
+    imports = [(i.module, i.level, i.names, i.line, i.scope) for i in extract_imports(source)]
+    assert imports == [
+        ('os.path', 0, None, 1, 'module'),
+        ('', 1, ['sibling'], 2, 'module'),
+        ('typing', 0, ['TYPE_CHECKING'], 3, 'module'),
+        ('json', 0, None, 5, 'type-checking'),
+        ('pkg', 2, ['name'], 7, 'function'),
+    ]
+
+
+def _project(tmp_path, files):
+    paths = []
+    for name, source in files.items():
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(textwrap.dedent(source))
+        paths.append(str(path))
+    graph = ImportGraph()
+    assert graph.build(sorted(paths), jobs=1) == {}
+    return graph
+
+
+def test_module_names_and_edges(tmp_path):
+    graph = _project(tmp_path, {
+        'app/__init__.py': '',
+        'app/core.py': 'from . import util\nimport os\n',
+        'app/util.py': 'def helper(): pass\n',
+        'app/sub/__init__.py': '',
+        'app/sub/deep.py': 'from ..core import x\nfrom app.util import helper\n',
+        'main.py': 'import app.sub.deep\n',
+    })
+    assert sorted(graph.modules) == ['app', 'app.core', 'app.sub', 'app.sub.deep', 'app.util', 'main']
+    edges = {(e.source, e.target) for e in graph.edges}
+    assert edges == {
+        ('app.core', 'app.util'),
+        ('app.sub.deep', 'app.core'),
+        ('app.sub.deep', 'app.util'),
+        # Importing app.sub.deep runs app and app.sub first.
+        ('main', 'app'), ('main', 'app.sub'), ('main', 'app.sub.deep'),
+    }
+    assert graph.cycles() == []
+
+
+def test_cycle_through_parent_package(tmp_path):
+    graph = _project(tmp_path, {
+        'pkg/__init__.py': 'from .tools import run\n',
+        'pkg/tools.py': 'def run(): pass\n',
+        'other.py': 'import pkg.tools\n',
+        'pkg2/__init__.py': 'from other import x\n',
+        'pkg2/mod.py': 'import pkg2\n',
+    })
+    assert ('other', 'pkg') in {(e.source, e.target) for e in graph.edges}
+    assert graph.cycles() == []
+
+    graph = _project(tmp_path, {
+        'loop/__init__.py': 'import helper\n',
+        'loop/mod.py': '',
+        'helper.py': 'from loop.mod import value\n',
+    })
+    cycles = [cycle for cycle, _ in graph.cycles()]
+    assert cycles == [['helper', 'loop']]
+
+
+def test_deferred_imports_do_not_make_cycles(tmp_path):
+    graph = _project(tmp_path, {
+        'a.py': 'import b\n',
+        'b.py': 'def f():\n    import a\n',
+    })
+    assert graph.cycles() == []
+    graph = _project(tmp_path, {
+        'a.py': 'import b\n',
+        'b.py': 'import a\n',
+    })
+    cycle, edges = graph.cycles()[0]
+    assert cycle == ['a', 'b']
+    assert [(e.source, e.target, e.line) for e in edges] == [('a', 'b', 1), ('b', 'a', 1)]
+
+
+def test_dependents_and_fan_in(tmp_path):
+    graph = _project(tmp_path, {
+        'base.py': '',
+        'mid.py': 'import base\n',
+        'top.py': 'import mid\nimport base\n',
+        'lone.py': '',
+    })
+    assert graph.dependents(['base']) == {'base', 'mid', 'top'}
+    assert graph.fan_in() == [('base', 2), ('mid', 1)]
+
+
+def test_package_importing_from_its_own_init(tmp_path):
+    graph = _project(tmp_path, {
+        'a/__init__.py': 'VERSION = 1\nfrom . import VERSION as V\nfrom a import VERSION\n',
+        'b/__init__.py': 'import b\n',
+    })
+    assert graph.edges == []
+    assert graph.cycles() == []
+
+
+def test_real_cycle_next_to_an_own_init_import(tmp_path):
+    graph = _project(tmp_path, {
+        'a/__init__.py': 'VERSION = 1\nfrom . import VERSION\nfrom .b import run\n',
+        'a/b.py': 'from a import VERSION\n',
+    })
+    [(cycle, edges)] = graph.cycles()
+    assert cycle == ['a', 'a.b']
+    assert [(e.source, e.target, e.line) for e in edges] == [('a', 'a.b', 3), ('a.b', 'a', 1)]
+
@@ -0,0 +1,161 @@
+import os
+import shutil
+import subprocess
+import sys
+import zipfile
+
+import pytest
+from click.testing import CliRunner
+
+from devbuddy.commands import plugins as plugin_commands
+from devbuddy.plugins import installer
+from devbuddy.plugins.installer import PluginInstallError, PluginSource
+
+needs_git = pytest.mark.skipif(shutil.which('git') is None, reason='git is not installed')
+
+
+def _plugin(path, version='1', files=None):
+    path.mkdir(parents=True, exist_ok=True)
+    (path / '__init__.py').write_text(f"VERSION = {version}\n")
+    for name, text in (files or {}).items():
+        (path / name).write_text(text)
+    return path
+
+
+def _git(cwd, *args):
+    subprocess.run(['git', '-c', 'user.name=Test', '-c', 'user.email=test@example.com'] + list(args), cwd=cwd,
+                   check=True, capture_output=True)
+
+
+@pytest.fixture
+def pip_runs(monkeypatch):
+    """Record pip commands instead of running them."""
+    commands = []
+    real_run = subprocess.run
+
+    def run(command, *args, **kwargs):
+        if command[:3] == [sys.executable, '-m', 'pip']:
+            commands.append(command[3:])
+            return subprocess.CompletedProcess(command, 0)
+        return real_run(command, *args, **kwargs)
+    monkeypatch.setattr(subprocess, 'run', run)
+    return commands
+
+
+def test_is_package(tmp_path):
+    assert not installer.is_package(str(_plugin(tmp_path / 'plain')))
+    assert installer.is_package(str(_plugin(tmp_path / 'setup', files={'setup.py': ''})))
+    assert installer.is_package(str(_plugin(tmp_path / 'project', files={'pyproject.toml': ''})))
+    # A requirements.txt wins: the plugin is not installed as a package.
+    both = _plugin(tmp_path / 'both', files={'setup.py': '', 'requirements.txt': 'x\n'})
+    assert not installer.is_package(str(both))
+
+
+def test_install_dependencies_in_one_pip_run(tmp_path, pip_runs):
+    package = _plugin(tmp_path / 'package', files={'pyproject.toml': ''})
+    required = _plugin(tmp_path / 'required', files={'requirements.txt': 'x\n'})
+    plain = _plugin(tmp_path / 'plain')
+    installer.install_dependencies([str(plain)])
+    assert pip_runs == []
+    installer.install_dependencies([str(package), str(required), str(plain)], store=str(tmp_path), offline=True)
+    assert pip_runs == [['install', '--disable-pip-version-check', '--find-links', str(tmp_path), '--no-index',
+                         str(package), '-r', str(required / 'requirements.txt')]]
+
+
+def test_find_source(tmp_path):
+    store = tmp_path / 'store'
+    _plugin(store / 'devbuddy-plugin-dir')
+    (store / 'zipped.zip').write_bytes(b'')
+    assert installer.find_source('dir', store=str(store)) == PluginSource(
+        'dir', 'directory', str(store / 'devbuddy-plugin-dir'))
+    assert installer.find_source('zipped', store=str(store)).kind == 'archive'
+    assert installer.find_source('other', store=str(store)) == PluginSource(
+        'other', 'git', installer.DEFAULT_URL.format(name='other'))
+    assert installer.find_source('x', url='https://example.com/x.git').location == 'https://example.com/x.git'
+    with pytest.raises(PluginInstallError, match='not in the plugin store'):
+        installer.find_source('other', store=str(store), offline=True)
+    with pytest.raises(PluginInstallError, match='not available offline'):
+        installer.find_source('x', url='https://example.com/x.git', offline=True)
+    with pytest.raises(PluginInstallError, match='needs a plugin store'):
+        installer.find_source('x', offline=True)
+
+
+def test_fetch_directory_replaces_installed_copy(tmp_path):
+    plugin_dir = tmp_path / 'plugins'
+    plugin_dir.mkdir()
+    _plugin(plugin_dir / 'demo', files={'stale.txt': 'old\n'})
+    source = _plugin(tmp_path / 'src', version='2')
+    (source / '__pycache__').mkdir()
+    target = installer.fetch_plugin(PluginSource('demo', 'directory', str(source)), str(plugin_dir))
+    assert sorted(os.listdir(target)) == ['__init__.py']
+    assert (plugin_dir / 'demo' / '__init__.py').read_text() == 'VERSION = 2\n'
+    assert os.listdir(plugin_dir) == ['demo']
+
+
+def test_fetch_rejects_non_plugins_and_keeps_the_installed_copy(tmp_path):
+    plugin_dir = tmp_path / 'plugins'
+    _plugin(plugin_dir / 'demo')
+    (tmp_path / 'empty').mkdir()
+    with pytest.raises(PluginInstallError, match='has no __init__.py'):
+        installer.fetch_plugin(PluginSource('demo', 'directory', str(tmp_path / 'empty')), str(plugin_dir))
+    assert os.listdir(plugin_dir) == ['demo']
+    assert (plugin_dir / 'demo' / '__init__.py').exists()
+
+
+def test_fetch_archive_with_top_level_directory(tmp_path):
+    archive = tmp_path / 'demo.zip'
+    with zipfile.ZipFile(archive, 'w') as f:
+        f.writestr('demo-main/__init__.py', 'VERSION = 3\n')
+        f.writestr('demo-main/plugin.json', '{}')
+    plugin_dir = tmp_path / 'plugins'
+    plugin_dir.mkdir()
+    target = installer.fetch_plugin(PluginSource('demo', 'archive', str(archive)), str(plugin_dir))
+    assert sorted(os.listdir(target)) == ['__init__.py', 'plugin.json']
+
+
+@needs_git
+def test_fetch_git_shallow_and_update_from_new_location(tmp_path):
+    first, second = _plugin(tmp_path / 'first', version='1'), _plugin(tmp_path / 'second', version='2')
+    for repo in (first, second):
+        _git(repo, 'init', '-q')
+        _git(repo, 'add', '.')
+        _git(repo, 'commit', '-q', '-m', 'one')
+    (first / '__init__.py').write_text('VERSION = 1.1\n')
+    _git(first, 'commit', '-q', '-am', 'two')
+    plugin_dir = tmp_path / 'plugins'
+    plugin_dir.mkdir()
+
+    target = installer.fetch_plugin(PluginSource('demo', 'git', 'file://' + str(first)), str(plugin_dir))
+    log = subprocess.run(['git', 'log', '--oneline'], cwd=target, capture_output=True, text=True).stdout
+    assert len(log.splitlines()) == 1 and (plugin_dir / 'demo' / '__init__.py').read_text() == 'VERSION = 1.1\n'
+
+    installer.fetch_plugin(PluginSource('demo', 'git', 'file://' + str(second)), str(plugin_dir))
+    assert (plugin_dir / 'demo' / '__init__.py').read_text() == 'VERSION = 2\n'
+    origin = subprocess.run(['git', 'remote', 'get-url', 'origin'], cwd=target, capture_output=True, text=True)
+    assert origin.stdout.strip() == 'file://' + str(second)
+
+
+def test_install_plugins_reports_each_plugin(tmp_path, pip_runs):
+    plugin_dir = tmp_path / 'plugins'
+    plugin_dir.mkdir()
+    good = _plugin(tmp_path / 'good', files={'requirements.txt': 'x\n'})
+    (tmp_path / 'bad').mkdir()
+    sources = [PluginSource('good', 'directory', str(good)), PluginSource('bad', 'directory', str(tmp_path / 'bad'))]
+    results = dict(installer.install_plugins(sources, plugin_dir=str(plugin_dir)))
+    assert results['good'] is None and 'has no __init__.py' in results['bad']
+    assert pip_runs == [['install', '--disable-pip-version-check', '-r',
+                         str(plugin_dir / 'good' / 'requirements.txt')]]
+
+
+@pytest.mark.parametrize('files, uninstalled', [
+    ({'pyproject.toml': ''}, True),
+    ({'setup.py': '', 'requirements.txt': 'x\n'}, False),
+    ({}, False),
+])
+def test_remove_uninstalls_packages_by_the_install_rule(tmp_path, monkeypatch, pip_runs, files, uninstalled):
+    monkeypatch.setattr(plugin_commands, 'PLUGIN_DIR', str(tmp_path))
+    _plugin(tmp_path / 'demo', files=files)
+    result = CliRunner().invoke(plugin_commands.plugin, ['remove', 'demo'])
+    assert result.exit_code == 0 and 'Plugin demo removed successfully!' in result.output
+    assert pip_runs == ([['uninstall', '-y', 'demo']] if uninstalled else [])
+    assert not (tmp_path / 'demo').exists()
@@ -0,0 +1,94 @@
+import sys
+import textwrap
+
+import pytest
+
+from devbuddy import languages
+from devbuddy.languages import (LANGUAGES, PYTHON, Gofmt, Rustfmt, _argv_chunks, extension_map, group_by_language,
+                                parse_languages)
+
+
+@pytest.mark.parametrize('spec, expected', [
+    ('python', ['python']),
+    ('Go, rust,go', ['go', 'rust']),
+    ('go,all', list(LANGUAGES)),
+    (['python', ' dotnet '], ['python', 'dotnet']),
+])
+def test_parse_languages(spec, expected):
+    assert parse_languages(spec) == expected
+
+
+def test_group_by_language():
+    extensions = extension_map(['python', 'go', 'javascript'])
+    assert extensions['.py'] == PYTHON and extensions['.tsx'] == 'javascript'
+    assert '.rs' not in extensions
+    groups = group_by_language(['a.py', 'b.go', 'c.rs', 'd.ts', 'e.go', 'Makefile'], extensions)
+    assert groups == {'python': ['a.py'], 'go': ['b.go', 'e.go'], 'javascript': ['d.ts']}
+
+
+def test_argv_chunks():
+    paths = ['a' * 10, 'b' * 10, 'c' * 10, 'd']
+    chunks = list(_argv_chunks(paths, limit=25))
+    assert chunks == [['a' * 10, 'b' * 10], ['c' * 10, 'd']]
+    assert list(_argv_chunks(['x' * 50], limit=25)) == [['x' * 50]]
+
+
+def test_rust_edition(tmp_path):
+    crate = tmp_path / 'crate'
+    (crate / 'src' / 'bin').mkdir(parents=True)
+    (crate / 'Cargo.toml').write_text('[package]\nname = "x"\nedition = "2021"\n')
+    old = tmp_path / 'old'
+    old.mkdir()
+    (old / 'Cargo.toml').write_text('[package]\nname = "y"\n')
+    rustfmt = Rustfmt()
+    assert rustfmt.edition(str(crate / 'src' / 'bin')) == '2021'
+    assert rustfmt.edition(str(old)) == '2015'
+    assert rustfmt.edition(str(tmp_path)) == '2015'
+
+
+def test_missing_tool(monkeypatch):
+    monkeypatch.setattr(languages.shutil, 'which', lambda name: None)
+    changed, errors, output = Gofmt().run(['a.go', 'b.go'])
+    assert changed == {} and output == ''
+    assert errors == {'a.go': 'gofmt is not installed', 'b.go': 'gofmt is not installed'}
+
+
+# A stand-in for gofmt: lists files containing 'ugly' and reports files containing 'broken' as parse errors.
+FAKE_GOFMT = textwrap.dedent("""\
+    import sys
+    status = 0
+    for path in [a for a in sys.argv[1:] if not a.startswith('-')]:
+        text = open(path).read()
+        if 'broken' in text:
+            print(f"{path}:1:1: expected 'package'", file=sys.stderr)
+            status = 2
+        elif 'ugly' in text:
+            print(path)
+            if '-w' in sys.argv:
+                open(path, 'w').write(text.replace('ugly', 'pretty'))
+    sys.exit(status)
+""")
+
+
+@pytest.fixture
+def gofmt(tmp_path, monkeypatch):
+    script = tmp_path / 'gofmt.py'
+    script.write_text(FAKE_GOFMT)
+    formatter = Gofmt()
+    monkeypatch.setattr(formatter, 'executable', lambda: [sys.executable, str(script)])
+    return formatter
+
+
+def test_gofmt_results(gofmt, tmp_path):
+    paths = []
+    for name, text in [('a.go', 'ugly'), ('b.go', 'fine'), ('c.go', 'broken')]:
+        (tmp_path / name).write_text(text)
+        paths.append(str(tmp_path / name))
+    changed, errors, _ = gofmt.run(paths, check=True)
+    assert changed == {paths[0]: True, paths[1]: False, paths[2]: False}
+    assert errors == {paths[2]: "expected 'package'"}
+    assert (tmp_path / 'a.go').read_text() == 'ugly'
+
+    changed, _, _ = gofmt.run(paths)
+    assert changed[paths[0]] is True
+    assert (tmp_path / 'a.go').read_text() == 'pretty'
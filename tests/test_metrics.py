@@ -0,0 +1,98 @@
+import io
+import os
+import textwrap
+
+import pytest
+
+from devbuddy import metrics
+from devbuddy.metrics import (BLANK, CODE, COMMENT, FILES, FUNCTIONS, LINES, TEXT, collect_metrics, count_lines,
+                              language_for, measure_file, new_counter, python_complexity)
+
+
+def _count(source, extension):
+    counter = new_counter()
+    assert count_lines(io.BytesIO(source.encode()), language_for('x' + extension), counter)
+    return counter[CODE], counter[COMMENT], counter[BLANK]
+
+
+def test_python_lines():
+    source = textwrap.dedent('''\
+        """Module docstring
+        over two lines."""
+        # comment
+
+        x = 1  # trailing comment
+        y = """a string
+        that is code"""
+    ''')
+    assert _count(source, '.py') == (3, 3, 1)
+
+
+def test_c_block_comments():
+    source = textwrap.dedent('''\
+        /* header
+         * more */
+        int x; /* opens
+        still comment */
+        // line
+        int y; // trailing
+    ''')
+    assert _count(source, '.c') == (2, 4, 0)
+
+
+def test_unknown_extensions_count_as_text(tmp_path):
+    assert language_for('Makefile') is TEXT
+    assert language_for('notes.TXT') is TEXT
+    assert language_for('a.PY').name == 'python'
+    path = tmp_path / 'Makefile'
+    path.write_text('# build\nall:\n\techo hi\n')
+    counter, functions = measure_file(str(path))
+    assert (counter[CODE], counter[COMMENT], counter[FILES]) == (2, 1, 1)
+    assert functions == []
+
+
+def test_binary_files_are_skipped(tmp_path):
+    path = tmp_path / 'data.bin'
+    path.write_bytes(b'\x89PNG\0\0\x01')
+    assert measure_file(str(path)) is None
+
+
+def test_lines_longer_than_the_buffer(monkeypatch):
+    monkeypatch.setattr(metrics, 'BUFFER_SIZE', 8)
+    counter = new_counter()
+    count_lines(io.BytesIO(b'x = "a very long line"\n# c\n\nend'), metrics.LANGUAGE_BY_EXTENSION['.py'], counter)
+    assert (counter[LINES], counter[CODE], counter[COMMENT], counter[BLANK]) == (4, 2, 1, 1)
+
+
+def test_python_complexity():
+    source = textwrap.dedent('''\
+        def simple():
+            return 1
+
+        class A:
+            def method(self, x):
+                if x and x > 1 or x < -1:
+                    return [i for i in range(x) if i]
+                for _ in range(3):
+                    pass
+                return 0
+    ''')
+    assert python_complexity(source) == [(1, 1, 'simple'), (7, 5, 'A.method')]
+
+
+def test_collect_metrics(tmp_path):
+    (tmp_path / 'pkg').mkdir()
+    (tmp_path / 'pkg' / 'a.py').write_text('def f(x):\n    if x:\n        return 1\n')
+    (tmp_path / 'main.go').write_text('// main\npackage main\n')
+    (tmp_path / 'blob.png').write_bytes(b'\0')
+    result = collect_metrics(str(tmp_path), jobs=1)
+    data = result.to_dict(depth=1)
+    assert data['total']['files'] == 2
+    assert data['languages']['python']['code'] == 3
+    assert data['languages']['go'] == dict(data['languages']['go'], code=1, comment=1)
+    assert sorted(data['directories']) == ['.', 'pkg']
+    assert data['most_complex'] == [{'path': str(tmp_path / 'pkg' / 'a.py'), 'line': 1, 'name': 'f',
+                                     'complexity': 2}]
+    assert result.total()[FUNCTIONS] == 1
+    table = metrics.format_table(result)
+    assert 'python' in table and 'Most complex Python functions:' in table
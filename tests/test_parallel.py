@@ -0,0 +1,65 @@
+from devbuddy.parallel import balanced_chunks, iter_balanced_chunks, map_chunks
+
+
+def _files(tmp_path, sizes):
+    paths = []
+    for i, size in enumerate(sizes):
+        path = tmp_path / f"f{i}.py"
+        path.write_bytes(b'x' * size)
+        paths.append(str(path))
+    return paths
+
+
+def test_every_file_lands_in_exactly_one_chunk(tmp_path):
+    paths = _files(tmp_path, [10 * i for i in range(100)])
+    chunks = balanced_chunks(paths, jobs=4)
+    assert sorted(p for chunk in chunks for p in chunk) == sorted(paths)
+    assert all(chunks)
+
+
+def test_chunks_are_balanced_by_size(tmp_path):
+    paths = _files(tmp_path, [200000] * 4 + [1000] * 60)
+    chunks = balanced_chunks(paths, jobs=2, chunks_per_job=2)
+    assert len(chunks) == 4
+    # Each big file goes to a different chunk, with the small ones spread around them.
+    assert sorted(sum(1 for p in chunk if p in paths[:4]) for chunk in chunks) == [1, 1, 1, 1]
+
+
+def test_small_inputs_stay_in_one_chunk(tmp_path):
+    paths = _files(tmp_path, [100] * 5)
+    assert len(balanced_chunks(paths, jobs=8)) == 1
+    assert balanced_chunks([], jobs=8) == []
+
+
+def test_chunks_respect_the_file_limit(tmp_path):
+    paths = _files(tmp_path, [1] * 50)
+    chunks = balanced_chunks(paths, jobs=1, max_chunk_files=8)
+    assert max(len(chunk) for chunk in chunks) <= 8
+    assert sum(len(chunk) for chunk in chunks) == 50
+
+
+def test_missing_files_still_get_a_chunk(tmp_path):
+    assert balanced_chunks([str(tmp_path / 'missing.py')], jobs=2) == [[str(tmp_path / 'missing.py')]]
+
+
+def test_iter_balanced_chunks_reads_in_windows(tmp_path):
+    paths = _files(tmp_path, [1] * 30)
+    chunks = list(iter_balanced_chunks(iter(paths), jobs=1, window=10))
+    assert sorted(p for chunk in chunks for p in chunk) == sorted(paths)
+    assert all(set(chunk) <= set(paths[:10]) or set(chunk) <= set(paths[10:20]) or set(chunk) <= set(paths[20:])
+               for chunk in chunks)
+
+
+def _double(chunk, factor):
+    if 'boom' in chunk:
+        raise ValueError('boom')
+    return [x * factor for x in chunk]
+
+
+def test_map_chunks_reports_results_and_errors():
+    results = {tuple(chunk): (result, error) for chunk, result, error in
+               map_chunks(_double, [[1, 2], ['boom'], [3]], 2, 2, threads=True)}
+    assert results[(1, 2)] == ([2, 4], None)
+    assert results[(3,)] == ([6], None)
+    assert results[('boom',)][0] is None
+    assert isinstance(results[('boom',)][1], ValueError)
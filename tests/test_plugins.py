@@ -0,0 +1,121 @@
+import json
+import sys
+import textwrap
+
+import click
+import pytest
+from click.testing import CliRunner
+
+from devbuddy import plugins
+from devbuddy.commands import LazyGroup
+from devbuddy.plugins.hooks import HookRegistry
+
+PLUGIN_SOURCE = """\
+import click
+
+
+def register_commands(group):
+    @group.command('shout')
+    @click.argument('word')
+    def shout(word):
+        '''Shout WORD.'''
+        click.echo(word.upper())
+
+    @group.command('whisper')
+    def whisper():
+        '''Whisper.'''
+        click.echo('psst')
+
+
+def register_hooks(hooks):
+    @hooks.on('post_test')
+    def seen(path, status):
+        print(f"seen {path} {status}")
+"""
+
+
+@pytest.fixture
+def plugin_dir(tmp_path, monkeypatch):
+    """Install plugins into an empty plugin directory, with a fresh hook registry."""
+    monkeypatch.setattr(plugins, 'PLUGIN_DIR', str(tmp_path))
+    monkeypatch.setattr(plugins, '__path__', [str(tmp_path)])
+    monkeypatch.setattr(plugins, 'hook_registry', HookRegistry(str(tmp_path / 'cache')))
+    names = []
+
+    def add(name, source=PLUGIN_SOURCE, manifest=None):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / '__init__.py').write_text(textwrap.dedent(source))
+        if manifest is not None:
+            text = manifest if isinstance(manifest, str) else json.dumps(manifest)
+            (tmp_path / name / plugins.MANIFEST_NAME).write_text(text)
+        names.append(f"devbuddy.plugins.{name}")
+    yield add
+    plugins.hook_registry.save_stats()  # not at exit, when tmp_path is gone
+    for name in names:
+        sys.modules.pop(name, None)
+
+
+def _group():
+    @click.group(cls=LazyGroup)
+    def group():
+        pass
+    plugins.register_plugin_commands(group)
+    return group
+
+
+def test_read_manifest(plugin_dir, capsys):
+    plugin_dir('full', manifest={'commands': {'shout': 'Shout WORD.'}, 'hooks': ['post_test']})
+    plugin_dir('listed', manifest={'commands': ['shout']})
+    plugin_dir('broken', manifest='{"commands":')
+    plugin_dir('wrong', manifest={'commands': 'shout'})
+    plugin_dir('bare')
+    assert plugins.read_manifest('full') == ({'shout': 'Shout WORD.'}, ['post_test'])
+    assert plugins.read_manifest('listed') == ({'shout': ''}, [])
+    assert plugins.read_manifest('bare') is None
+    assert plugins.read_manifest('broken') is None
+    assert plugins.read_manifest('wrong') is None
+    err = capsys.readouterr().err
+    assert 'manifest of plugin broken' in err and "'commands' must be an object" in err
+
+
+def test_manifest_commands_load_on_first_use(plugin_dir):
+    plugin_dir('loud', manifest={'commands': {'shout': 'Shout WORD.', 'whisper': 'Whisper.'}})
+    group = _group()
+    assert 'devbuddy.plugins.loud' not in sys.modules
+    assert sorted(group.lazy_commands) == ['shout', 'whisper']
+
+    result = CliRunner().invoke(group, ['--help'])
+    assert result.exit_code == 0 and 'Shout WORD.' in result.output
+    assert 'devbuddy.plugins.loud' not in sys.modules
+
+    result = CliRunner().invoke(group, ['shout', 'hi'])
+    assert result.exit_code == 0 and result.output == 'HI\n'
+    assert 'devbuddy.plugins.loud' in sys.modules
+    # Importing the plugin registered both of its commands.
+    assert group.lazy_commands == {} and sorted(group.commands) == ['shout', 'whisper']
+
+
+def test_manifest_command_the_plugin_does_not_register(plugin_dir):
+    plugin_dir('liar', manifest={'commands': {'sing': 'Sing.'}})
+    result = CliRunner().invoke(_group(), ['sing'])
+    assert result.exit_code != 0
+    assert 'Plugin liar lists sing in its manifest but does not register it.' in result.output
+
+
+def test_plugin_without_manifest_loads_at_startup(plugin_dir):
+    plugin_dir('eager')
+    group = _group()
+    assert 'devbuddy.plugins.eager' in sys.modules
+    assert sorted(group.commands) == ['shout', 'whisper'] and group.lazy_commands == {}
+    assert 'eager' in plugins.hook_registry.loaded
+
+
+def test_manifest_hooks_load_the_plugin_when_they_fire(plugin_dir, capsys):
+    plugin_dir('watcher', manifest={'commands': {}, 'hooks': ['post_test']})
+    _group()
+    registry = plugins.hook_registry
+    registry.call('pre_test', path='.', tests=[])
+    assert 'devbuddy.plugins.watcher' not in sys.modules
+    registry.call('post_test', path='.', status=0)
+    assert 'devbuddy.plugins.watcher' in sys.modules
+    assert capsys.readouterr().out == 'seen . 0\n'
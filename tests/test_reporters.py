@@ -0,0 +1,117 @@
+import io
+import json
+import os
+
+import pytest
+
+from devbuddy.analyzer import AnalysisResult, Message
+from devbuddy.formatter import FormatResult
+from devbuddy.reporters import JsonLinesReporter, SarifReporter, format_status, reporting
+
+
+def _messages(path):
+    return [
+        Message(path, 3, 4, 'DB001', 'unused-import', "'os' imported but unused", 'warning'),
+        Message(path, 10, 0, 'E0602', 'undefined-variable', "Undefined variable 'x'", 'error'),
+    ]
+
+
+@pytest.mark.parametrize('result, check, expected', [
+    (FormatResult('a.py', True, None), False, 'reformatted'),
+    (FormatResult('a.py', True, None), True, 'would-reformat'),
+    (FormatResult('a.py', False, None), False, 'unchanged'),
+    (FormatResult('a.py', None, None), False, 'formatted'),
+    (FormatResult('a.py', False, 'boom'), True, 'error'),
+])
+def test_format_status(result, check, expected):
+    assert format_status(result, check) == expected
+
+
+def test_jsonl_analysis():
+    stream = io.StringIO()
+    reporter = JsonLinesReporter(stream)
+    reporter.start('pylint')
+    reporter.analysis_result(AnalysisResult('a.py', _messages('a.py'), None), 'pylint')
+    reporter.analysis_result(AnalysisResult('b.py', [], 'Syntax error'), 'pylint')
+    reporter.close()
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert records[0] == {'type': 'finding', 'tool': 'pylint', 'path': 'a.py', 'line': 3, 'column': 4,
+                          'code': 'DB001', 'symbol': 'unused-import', 'severity': 'warning',
+                          'message': "'os' imported but unused"}
+    assert records[1]['severity'] == 'error'
+    assert records[2] == {'type': 'error', 'tool': 'pylint', 'path': 'b.py', 'message': 'Syntax error'}
+    assert records[3] == {'type': 'summary', 'files': 2, 'counts': {'warning': 1, 'error': 2}}
+
+
+def test_jsonl_format():
+    stream = io.StringIO()
+    reporter = JsonLinesReporter(stream)
+    reporter.format_result(FormatResult('a.py', True, None, diff='--- a\n+++ b\n'), 'black', check=True)
+    reporter.format_result(FormatResult('b.py', False, None, cached=True), 'black', check=True)
+    reporter.close()
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert records == [
+        {'type': 'file', 'tool': 'black', 'path': 'a.py', 'status': 'would-reformat', 'diff': '--- a\n+++ b\n'},
+        {'type': 'file', 'tool': 'black', 'path': 'b.py', 'status': 'unchanged', 'cached': True},
+        {'type': 'summary', 'files': 2, 'counts': {'would-reformat': 1, 'unchanged': 1}},
+    ]
+
+
+def test_sarif_analysis(tmp_path):
+    stream = io.StringIO()
+    inside = str(tmp_path / 'pkg' / 'a.py')
+    reporter = SarifReporter(stream, root=str(tmp_path))
+    reporter.start('pylint', '3.0')
+    reporter.analysis_result(AnalysisResult(inside, _messages(inside), None), 'pylint')
+    reporter.analysis_result(AnalysisResult(os.path.join(os.sep, 'elsewhere', 'b.py'), [], 'Unreadable'), 'pylint')
+    reporter.close()
+    log = json.loads(stream.getvalue())
+    assert log['version'] == '2.1.0'
+    run, = log['runs']
+    assert run['tool']['driver']['name'] == 'pylint'
+    assert run['tool']['driver']['version'] == '3.0'
+    assert [r['id'] for r in run['tool']['driver']['rules']] == ['DB001', 'E0602']
+    first, second = run['results']
+    assert first['ruleId'] == 'DB001' and first['level'] == 'warning'
+    location = first['locations'][0]['physicalLocation']
+    assert location['artifactLocation'] == {'uri': 'pkg/a.py', 'uriBaseId': 'SRCROOT'}
+    assert location['region'] == {'startLine': 3, 'startColumn': 5}
+    assert second['level'] == 'error'
+    invocation, = run['invocations']
+    assert invocation['executionSuccessful'] is False
+    notification, = invocation['toolExecutionNotifications']
+    uri = notification['locations'][0]['physicalLocation']['artifactLocation']['uri']
+    assert uri.startswith('file://') and uri.endswith('/elsewhere/b.py')
+    assert run['originalUriBaseIds']['SRCROOT']['uri'].endswith('/')
+
+
+def test_sarif_format(tmp_path):
+    stream = io.StringIO()
+    reporter = SarifReporter(stream, root=str(tmp_path))
+    reporter.start('isort,black')
+    reporter.format_result(FormatResult(str(tmp_path / 'a.py'), True, None), 'isort,black', check=True)
+    reporter.format_result(FormatResult(str(tmp_path / 'b.py'), False, None), 'isort,black', check=True)
+    reporter.close()
+    run, = json.loads(stream.getvalue())['runs']
+    result, = run['results']
+    assert result['ruleId'] == 'format/isort-black'
+    assert result['level'] == 'warning'
+    assert run['invocations'][0]['executionSuccessful'] is True
+
+
+def test_sarif_without_results_is_valid():
+    stream = io.StringIO()
+    SarifReporter(stream).close()
+    run, = json.loads(stream.getvalue())['runs']
+    assert run['results'] == [] and run['tool']['driver']['name'] == 'devbuddy'
+
+
+def test_reporting_redirects_stdout():
+    stream, log = io.StringIO(), io.StringIO()
+    with reporting('jsonl', stream, log) as reporter:
+        print('progress')
+        reporter.format_result(FormatResult('a.py', False, None), 'black')
+    assert log.getvalue() == 'progress\n'
+    assert [json.loads(line)['type'] for line in stream.getvalue().splitlines()] == ['file', 'summary']
+    with reporting('text') as reporter:
+        assert reporter is None
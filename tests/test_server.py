@@ -0,0 +1,105 @@
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+from devbuddy import __version__, server
+
+pytestmark = pytest.mark.skipif(not server.is_supported(), reason='Unix domain sockets are not supported')
+
+
+def _exchange(request):
+    """Serve one request with server._handle over a socket pair; return (keep running, reply messages)."""
+    client, conn = socket.socketpair()
+    with client, conn:
+        client.sendall(json.dumps(request).encode('utf-8') + b'\n')
+        keep_running = server._handle(conn)
+        conn.shutdown(socket.SHUT_WR)
+        with client.makefile('rb') as rfile:
+            return keep_running, [json.loads(line) for line in rfile]
+
+
+def test_ping_reports_version():
+    keep_running, [reply] = _exchange({'command': 'ping'})
+    assert keep_running
+    assert reply['status'] == 0 and reply['version'] == __version__ and reply['pid'] == os.getpid()
+
+
+def test_stale_client_shuts_the_server_down():
+    keep_running, [reply] = _exchange({'command': 'format', 'version': '0.0.0', 'options': {}})
+    assert not keep_running
+    assert reply['stale'] and reply['version'] == __version__
+
+
+def test_unknown_command():
+    keep_running, [reply] = _exchange({'command': 'dance', 'version': __version__})
+    assert keep_running and reply['status'] == 2 and 'dance' in reply['error']
+
+
+def test_bad_request_fails_only_that_request(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    keep_running, messages = _exchange({'command': 'format', 'version': __version__, 'cwd': str(tmp_path),
+                                        'options': {'no_such_option': True}})
+    assert keep_running
+    assert messages[-1]['status'] == 1 and messages[-1]['error'].startswith('TypeError')
+
+
+def test_subprocess_output_reaches_the_client(monkeypatch, tmp_path):
+    if shutil.which('black') is None:
+        pytest.skip('black is not installed')
+    monkeypatch.chdir(tmp_path)
+    target = tmp_path / 'ugly.py'
+    target.write_text("x = {  'a':37}\n")
+    options = {'path': str(target), 'tool': 'black', 'use_subprocess': True, 'check': True, 'jobs': 1}
+    _, messages = _exchange({'command': 'format', 'version': __version__, 'cwd': str(tmp_path), 'options': options})
+    errors = ''.join(m['data'] for m in messages if m['type'] == 'error')
+    assert 'would reformat' in errors
+    assert messages[-1] == {'type': 'result', 'status': 1}
+
+
+@pytest.fixture
+def running_server(tmp_path, monkeypatch):
+    path = os.path.join(str(tmp_path), 's.sock')
+    monkeypatch.setenv(server.SOCKET_ENV, path)
+    monkeypatch.delenv(server.NO_SERVER_ENV, raising=False)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get('PYTHONPATH')])))
+    process = subprocess.Popen([sys.executable, '-m', 'devbuddy.cli', 'serve', '--idle-timeout', '60'], env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = time.monotonic() + 20
+        while not server.ping(path):
+            if process.poll() is not None or time.monotonic() > deadline:
+                pytest.fail('the server did not start')
+            time.sleep(0.05)
+        yield path
+    finally:
+        server.stop(path)
+        try:
+            process.wait(10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def test_request_format(running_server, tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'ugly.py').write_text("x = {  'a':37}\n")
+    assert server.server_version(running_server) == __version__
+    capsys.readouterr()
+    status = server.request_format({'path': str(tmp_path), 'tool': 'black', 'check': True, 'jobs': 1,
+                                    'use_cache': False})
+    assert status == 1
+    assert 'would reformat' in capsys.readouterr().out
+    assert server.stop(running_server)
+    assert not server.ping(running_server)
+
+
+def test_request_format_without_server(tmp_path, monkeypatch):
+    monkeypatch.setenv(server.SOCKET_ENV, os.path.join(str(tmp_path), 'none.sock'))
+    assert server.request_format({'path': str(tmp_path)}) is None
+    assert server.server_version() is None
@@ -0,0 +1,107 @@
+import os
+import textwrap
+
+import pytest
+from click.testing import CliRunner
+
+from devbuddy.commands.symbols import find_symbol, refs
+from devbuddy.symbols import SymbolIndex, extract_symbols, module_name
+
+
+@pytest.mark.parametrize('rel_path, expected', [
+    ('a.py', 'a'), (os.path.join('pkg', 'mod.py'), 'pkg.mod'), (os.path.join('pkg', '__init__.py'), 'pkg'),
+])
+def test_module_name(rel_path, expected):
+    assert module_name(rel_path) == expected
+
+
+def _write(root, files):
+    for name, source in files.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(textwrap.dedent(source))
+
+
+PROJECT = {
+    'pkg/__init__.py': '',
+    'pkg/core.py': """\
+        LIMIT = 3
+
+        class Cache:
+            def get(self, key):
+                return helper(key)
+
+        def helper(value):
+            return value
+    """,
+    'pkg/use.py': """\
+        from pkg.core import Cache, helper
+
+        def run():
+            return helper(Cache().get(1))
+    """,
+}
+
+
+@pytest.fixture
+def index(tmp_path):
+    root = tmp_path / 'project'
+    root.mkdir()
+    _write(root, PROJECT)
+    index = SymbolIndex(str(root), str(tmp_path / 'index.sqlite'))
+    stats = index.update(jobs=1)
+    assert (stats.files, stats.parsed, stats.removed, stats.errors) == (3, 3, 0, [])
+    yield index
+    index.close()
+
+
+def _found(definitions):
+    return [(d.module, d.qualname, d.kind) for d in definitions]
+
+
+def test_extract_symbols_survives_syntax_errors():
+    with pytest.raises(SyntaxError):
+        extract_symbols('def f(:\n')
+
+
+def test_find_symbol(index):
+    assert _found(index.find_symbol('Cache.get')) == [('pkg.core', 'Cache.get', 'method')]
+    assert _found(index.find_symbol('pkg.core.helper')) == [('pkg.core', 'helper', 'function')]
+    assert _found(index.find_symbol('pkg.core.*', 'class')) == [('pkg.core', 'Cache', 'class')]
+    assert _found(index.find_symbol('LIMIT')) == [('pkg.core', 'LIMIT', 'variable')]
+    assert index.find_symbol('missing') == []
+
+
+def test_find_references(index):
+    found = [(os.path.basename(r.path), r.line, r.kind) for r in index.find_references('helper')]
+    assert found == [('core.py', 5, 'name'), ('use.py', 1, 'import'), ('use.py', 4, 'name')]
+
+
+def test_update_is_incremental(index):
+    root = index.root
+    assert index.update(jobs=1).parsed == 0
+    with open(os.path.join(root, 'pkg', 'core.py'), 'a') as f:
+        f.write('\ndef extra():\n    pass\n')
+    os.unlink(os.path.join(root, 'pkg', 'use.py'))
+    stats = index.update(jobs=1)
+    assert (stats.files, stats.parsed, stats.removed) == (2, 1, 1)
+    assert _found(index.find_symbol('extra')) == [('pkg.core', 'extra', 'function')]
+    assert index.find_references('run') == [] and index.find_symbol('run') == []
+
+
+def test_cli_updates_the_index_by_default(tmp_path, monkeypatch):
+    monkeypatch.setenv('DEVBUDDY_CACHE_DIR', str(tmp_path / 'cache'))
+    root = tmp_path / 'project'
+    root.mkdir()
+    _write(root, PROJECT)
+    monkeypatch.chdir(root)
+    runner = CliRunner()
+    result = runner.invoke(find_symbol, ['helper'])
+    assert result.exit_code == 0 and 'pkg/core.py:7: function pkg.core.helper' in result.output
+
+    _write(root, {'pkg/late.py': 'def late():\n    pass\n'})
+    assert runner.invoke(find_symbol, ['late', '--no-update']).exit_code == 1
+    result = runner.invoke(find_symbol, ['late'])
+    assert result.exit_code == 0 and 'pkg.late.late' in result.output
+    result = runner.invoke(refs, ['Cache'])
+    assert result.exit_code == 0 and 'pkg/use.py:1:' in result.output
@@ -0,0 +1,185 @@
+import json
+import os
+import textwrap
+from xml.etree import ElementTree
+
+import pytest
+
+from devbuddy import testrunner
+from devbuddy.gitutils import ChangedFile
+from devbuddy.importgraph import ImportGraph
+
+
+@pytest.mark.parametrize('path, expected', [
+    ('tests/test_x.py', True), ('x_test.py', True), ('test_x.txt', False), ('conftest.py', False),
+])
+def test_is_test_file(path, expected):
+    assert testrunner.is_test_file(path) is expected
+
+
+@pytest.fixture
+def project(tmp_path):
+    files = {
+        'pkg/__init__.py': '',
+        'pkg/core.py': 'VALUE = 1\n',
+        'pkg/api.py': 'from .core import VALUE\n',
+        'pkg/other.py': '',
+        'tests/conftest.py': '',
+        'tests/test_api.py': 'from pkg.api import VALUE\n',
+        'tests/test_other.py': 'import pkg.other\n',
+        'tests/data/sample.txt': 'data\n',
+        'tests/unit/test_core.py': 'from pkg import core\n',
+    }
+    for name, source in files.items():
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(textwrap.dedent(source))
+    graph = ImportGraph()
+    graph.build(sorted(str(p) for p in tmp_path.rglob('*.py')), jobs=1)
+    return graph, str(tmp_path)
+
+
+def _select(project, *changes):
+    graph, root = project
+    changes = [ChangedFile(os.path.join(root, path), status, old and os.path.join(root, old))
+               for path, status, old in changes]
+    tests, reason = testrunner.select_tests(graph, changes, root)
+    return [os.path.relpath(t, root).replace(os.sep, '/') for t in tests], reason
+
+
+def test_select_tests_through_imports(project):
+    assert _select(project, ('pkg/core.py', 'M', None)) == (['tests/test_api.py', 'tests/unit/test_core.py'], None)
+    assert _select(project, ('pkg/other.py', 'M', None)) == (['tests/test_other.py'], None)
+
+
+def test_select_changed_test_itself(project):
+    assert _select(project, ('tests/test_other.py', 'M', None)) == (['tests/test_other.py'], None)
+
+
+def test_select_conftest_and_data_by_directory(project):
+    everything = ['tests/test_api.py', 'tests/test_other.py', 'tests/unit/test_core.py']
+    assert _select(project, ('tests/conftest.py', 'M', None)) == (everything, None)
+    assert _select(project, ('tests/data/sample.txt', 'M', None)) == (everything, None)
+    assert _select(project, ('README.md', 'M', None)) == ([], None)
+
+
+def test_select_suite_files_run_everything(project):
+    assert _select(project, ('pyproject.toml', 'M', None)) == ([], 'pyproject.toml changed')
+    assert _select(project, ('requirements-dev.txt', 'M', None)) == ([], 'requirements-dev.txt changed')
+
+
+def test_select_removed_module_selects_package_importers(project):
+    tests, reason = _select(project, ('pkg/gone.py', 'D', None))
+    assert reason is None
+    assert tests == ['tests/test_api.py', 'tests/test_other.py', 'tests/unit/test_core.py']
+
+
+def test_split_tests_by_duration():
+    durations = {'a.py': 10.0, 'b.py': 6.0, 'c.py': 5.0, 'd.py': 4.0, 'e.py': 1.0}
+    shards = testrunner.split_tests(list(durations), durations, 2)
+    assert shards == [['a.py', 'd.py'], ['b.py', 'c.py', 'e.py']]
+    assert sorted(t for shard in shards for t in shard) == sorted(durations)
+
+
+def test_split_tests_is_deterministic():
+    tests = [f"test_{i}.py" for i in range(20)]
+    durations = {t: float(i % 4) for i, t in enumerate(tests)}
+    shards = testrunner.split_tests(tests, durations, 3)
+    assert shards == testrunner.split_tests(list(reversed(tests)), durations, 3)
+    totals = [sum(durations[t] for t in shard) for shard in shards]
+    assert max(totals) - min(totals) <= max(durations.values())
+
+
+def test_split_tests_unknown_durations_use_the_average():
+    durations = {'a.py': 4.0, 'b.py': 2.0, 'c.py': None, 'd.py': None}
+    shards = testrunner.split_tests(list(durations), durations, 2)
+    # c.py and d.py count as 3 seconds each, so they share a shard and balance a.py and b.py.
+    assert shards == [['a.py', 'b.py'], ['c.py', 'd.py']]
+
+
+def test_split_tests_by_size_before_any_run(tmp_path):
+    sizes = {'big.py': 3000, 'medium.py': 2000, 'small.py': 1000}
+    tests = []
+    for name, size in sizes.items():
+        path = tmp_path / name
+        path.write_text('#' * size)
+        tests.append(str(path))
+    shards = testrunner.split_tests(tests, {t: None for t in tests}, 2)
+    assert shards == [[tests[0]], sorted(tests[1:])]
+
+
+def test_split_tests_more_shards_than_tests():
+    assert testrunner.split_tests(['a.py'], {'a.py': 1.0}, 3) == [['a.py'], [], []]
+
+
+@pytest.mark.parametrize('value, expected', [('1/1', (1, 1)), ('2/4', (2, 4)), (' 3 / 3 ', (3, 3))])
+def test_parse_shard(value, expected):
+    assert testrunner.parse_shard(value) == expected
+
+
+@pytest.mark.parametrize('value', ['', '2', '0/4', '5/4', 'a/b', '-1/2', '1/'])
+def test_parse_shard_invalid(value):
+    with pytest.raises(ValueError):
+        testrunner.parse_shard(value)
+
+
+def _record(nodeid, when, outcome, duration=0.1, path='tests/test_a.py'):
+    return {'nodeid': nodeid, 'when': when, 'outcome': outcome, 'duration': duration, 'path': path}
+
+
+def test_outcomes_worst_phase_wins():
+    records = [
+        _record('t::ok', 'setup', 'passed'), _record('t::ok', 'call', 'passed'),
+        _record('t::fail', 'call', 'failed'), _record('t::fail', 'teardown', 'failed'),
+        _record('t::setup_error', 'setup', 'failed'),
+        _record('t::skip', 'setup', 'skipped'),
+        _record('t::teardown_only', 'call', 'passed'), _record('t::teardown_only', 'teardown', 'failed'),
+    ]
+    assert testrunner.test_outcomes(records) == {
+        't::ok': 'passed', 't::fail': 'failed', 't::setup_error': 'error',
+        't::skip': 'skipped', 't::teardown_only': 'error',
+    }
+
+
+def test_merge_junit(tmp_path):
+    first, second, broken = tmp_path / 'a.xml', tmp_path / 'b.xml', tmp_path / 'c.xml'
+    first.write_text('<testsuites><testsuite name="a" tests="2" failures="1" errors="0" skipped="0" time="1.5">'
+                     '<testcase name="x"/><testcase name="y"/></testsuite></testsuites>')
+    second.write_text('<testsuite name="b" tests="3" failures="0" errors="1" skipped="1" time="0.25">'
+                      '<testcase name="z"/></testsuite>')
+    broken.write_text('<testsuite')
+    target = tmp_path / 'merged.xml'
+    testrunner.merge_junit([str(first), str(second), str(broken), str(tmp_path / 'missing.xml')], str(target))
+    root = ElementTree.parse(target).getroot()
+    assert [suite.get('name') for suite in root] == ['a', 'b']
+    assert {name: root.get(name) for name in ('tests', 'failures', 'errors', 'skipped', 'time')} == {
+        'tests': '5', 'failures': '1', 'errors': '1', 'skipped': '1', 'time': '1.750'}
+
+
+def test_timing_cache_records_durations_per_file(tmp_path):
+    durations_file = tmp_path / 'durations.json'
+    timings = testrunner.TimingCache(tmp_path, str(durations_file))
+    timings.record([
+        _record('tests/test_a.py::t', 'setup', 'passed', 0.5, str(tmp_path / 'tests/test_a.py')),
+        _record('tests/test_a.py::t', 'call', 'passed', 1.0, str(tmp_path / 'tests/test_a.py')),
+        _record('tests/test_a.py', 'collect', 'passed', 9.0, str(tmp_path / 'tests/test_a.py')),
+    ])
+    timings.close()
+    assert json.loads(durations_file.read_text()) == {'tests/test_a.py': {'tests/test_a.py::t': 1.5}}
+    reopened = testrunner.TimingCache(tmp_path, str(durations_file))
+    assert reopened.file_duration(str(tmp_path / 'tests/test_a.py')) == 1.5
+    assert reopened.file_duration(str(tmp_path / 'tests/test_b.py')) is None
+
+
+def test_timing_cache_in_result_cache(tmp_path):
+    timings = testrunner.TimingCache(tmp_path / 'project', cache_dir=str(tmp_path / 'cache'))
+    timings.set(str(tmp_path / 'project/test_a.py'), {'test_a.py::t': 2.0})
+    timings.close()
+    reopened = testrunner.TimingCache(tmp_path / 'project', cache_dir=str(tmp_path / 'cache'))
+    other = testrunner.TimingCache(tmp_path / 'other', cache_dir=str(tmp_path / 'cache'))
+    try:
+        assert reopened.get(str(tmp_path / 'project/test_a.py')) == {'test_a.py::t': 2.0}
+        assert other.get(str(tmp_path / 'other/test_a.py')) is None
+    finally:
+        reopened.close()
+        other.close()
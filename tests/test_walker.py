@@ -0,0 +1,90 @@
+import os
+
+import pytest
+
+from devbuddy.walker import is_ignored, iter_files, parse_ignore_line
+
+
+def _ignored(pattern, rel_path, is_dir=False, base='/repo'):
+    rule = parse_ignore_line(pattern, base)
+    return is_ignored(os.path.join(base, *rel_path.split('/')), is_dir, [rule])
+
+
+@pytest.mark.parametrize('pattern, path, is_dir, expected', [
+    ('*.log', 'a.log', False, True),
+    ('*.log', 'deep/dir/a.log', False, True),  # no slash: matches at any depth
+    ('*.log', 'a.logx', False, False),
+    ('/build', 'build', True, True),  # leading slash: anchored to the ignore file
+    ('/build', 'src/build', True, False),
+    ('docs/*.md', 'docs/a.md', False, True),
+    ('docs/*.md', 'docs/sub/a.md', False, False),  # * does not cross directories
+    ('docs/**/*.md', 'docs/sub/deeper/a.md', False, True),
+    ('**/cache', 'x/y/cache', True, True),
+    ('out/', 'out', True, True),  # trailing slash: directories only
+    ('out/', 'out', False, False),
+    ('file?.txt', 'file1.txt', False, True),
+    ('file?.txt', 'file10.txt', False, False),
+    ('[ab].py', 'a.py', False, True),
+    ('[!ab].py', 'a.py', False, False),
+    ('[!ab].py', 'c.py', False, True),
+    ('\\#hash', '#hash', False, True),
+    ('trailing\\ ', 'trailing ', False, True),
+])
+def test_patterns(pattern, path, is_dir, expected):
+    assert _ignored(pattern, path, is_dir) is expected
+
+
+@pytest.mark.parametrize('line', ['', '   ', '# comment', '/', '!'])
+def test_lines_without_rules(line):
+    assert parse_ignore_line(line, '/repo') is None
+
+
+def test_last_matching_rule_wins():
+    rules = [parse_ignore_line('*.py', '/repo'), parse_ignore_line('!keep.py', '/repo')]
+    assert is_ignored('/repo/drop.py', False, rules)
+    assert not is_ignored('/repo/keep.py', False, rules)
+
+
+def test_rules_only_apply_below_their_directory():
+    rule = parse_ignore_line('*.py', '/repo/sub')
+    assert is_ignored('/repo/sub/a.py', False, [rule])
+    assert not is_ignored('/repo/a.py', False, [rule])
+
+
+def _touch(root, *paths):
+    for path in paths:
+        full = root / path
+        full.parent.mkdir(parents=True, exist_ok=True)
+        full.write_text('')
+
+
+def _relative(root, paths):
+    return sorted(os.path.relpath(p, root).replace(os.sep, '/') for p in paths)
+
+
+def test_iter_files_honours_ignore_files_and_excludes(tmp_path):
+    (tmp_path / '.git').mkdir()
+    _touch(tmp_path, 'a.py', 'b.txt', 'gen/x.py', 'pkg/c.py', 'pkg/skip.py', 'pkg/keep.py',
+           'node_modules/m.py', '__pycache__/p.py')
+    (tmp_path / '.gitignore').write_text('gen/\n')
+    (tmp_path / 'pkg' / '.gitignore').write_text('skip.py\n')
+    assert _relative(tmp_path, iter_files(str(tmp_path))) == ['a.py', 'pkg/c.py', 'pkg/keep.py']
+
+
+def test_iter_files_inherits_rules_from_parent_directories(tmp_path):
+    (tmp_path / '.git').mkdir()
+    (tmp_path / '.gitignore').write_text('*_pb2.py\n')
+    _touch(tmp_path, 'src/a.py', 'src/a_pb2.py')
+    assert _relative(tmp_path, iter_files(str(tmp_path / 'src'))) == ['src/a.py']
+
+
+def test_iter_files_skips_only_real_virtualenvs(tmp_path):
+    _touch(tmp_path, 'env/settings.py', 'build/steps.py', 'venv/pyvenv.cfg', 'venv/lib/site.py')
+    assert _relative(tmp_path, iter_files(str(tmp_path))) == ['build/steps.py', 'env/settings.py']
+
+
+def test_iter_files_options(tmp_path):
+    _touch(tmp_path, 'a.py', 'b.md', 'sub/c.py')
+    assert _relative(tmp_path, iter_files(str(tmp_path), recursive=False)) == ['a.py']
+    assert _relative(tmp_path, iter_files(str(tmp_path), extensions=None)) == ['a.py', 'b.md', 'sub/c.py']
+    assert list(iter_files(str(tmp_path / 'b.md'))) == [str(tmp_path / 'b.md')]
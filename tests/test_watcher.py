@@ -0,0 +1,100 @@
+import os
+import sys
+import time
+
+import pytest
+
+from devbuddy.watcher import InotifyWatcher, PollingWatcher, create_watcher, watch_changes
+
+
+def _inotify(root, **kwargs):
+    try:
+        return InotifyWatcher(str(root), **kwargs)
+    except OSError:
+        pytest.skip('inotify is not available')
+
+
+def _poll_until(watcher, expected, timeout=5):
+    found = set()
+    deadline = time.monotonic() + timeout
+    while not expected <= found and time.monotonic() < deadline:
+        found |= watcher.poll(0.1) or set()
+    return found
+
+
+def test_inotify_reports_written_files(tmp_path):
+    (tmp_path / '.gitignore').write_text('ignored.py\n')
+    watcher = _inotify(tmp_path)
+    try:
+        (tmp_path / 'a.py').write_text('x = 1\n')
+        (tmp_path / 'notes.txt').write_text('not python\n')
+        (tmp_path / 'ignored.py').write_text('x = 1\n')
+        found = _poll_until(watcher, {str(tmp_path / 'a.py')})
+        assert found == {str(tmp_path / 'a.py')}
+    finally:
+        watcher.close()
+
+
+def test_inotify_watches_new_directories(tmp_path):
+    watcher = _inotify(tmp_path)
+    try:
+        sub = tmp_path / 'pkg'
+        sub.mkdir()
+        # The file may be written before the new directory is watched; it is reported either way.
+        (sub / 'mod.py').write_text('x = 1\n')
+        assert str(sub / 'mod.py') in _poll_until(watcher, {str(sub / 'mod.py')})
+        (sub / 'other.py').write_text('y = 2\n')
+        assert str(sub / 'other.py') in _poll_until(watcher, {str(sub / 'other.py')})
+    finally:
+        watcher.close()
+
+
+def test_inotify_skips_excluded_directories(tmp_path):
+    watcher = _inotify(tmp_path)
+    try:
+        (tmp_path / 'node_modules').mkdir()
+        (tmp_path / 'node_modules' / 'x.py').write_text('')
+        (tmp_path / 'a.py').write_text('')
+        assert _poll_until(watcher, {str(tmp_path / 'a.py')}) == {str(tmp_path / 'a.py')}
+    finally:
+        watcher.close()
+
+
+def test_polling_watcher(tmp_path):
+    (tmp_path / 'a.py').write_text('x = 1\n')
+    watcher = PollingWatcher(str(tmp_path), interval=0.01)
+    assert watcher.poll(0.01) == set()
+    (tmp_path / 'a.py').write_text('x = 22\n')
+    (tmp_path / 'b.py').write_text('')
+    assert watcher.poll(0.01) == {str(tmp_path / 'a.py'), str(tmp_path / 'b.py')}
+    assert watcher.poll(0.01) == set()
+
+
+def test_create_watcher_falls_back_to_polling(tmp_path, monkeypatch):
+    monkeypatch.setattr(sys, 'platform', 'darwin')
+    assert isinstance(create_watcher(str(tmp_path)), PollingWatcher)
+
+
+class FakeWatcher:
+    wait_timeout = None
+
+    def __init__(self, events):
+        self.events = list(events)
+        self.timeouts = []
+
+    def poll(self, timeout):
+        self.timeouts.append(timeout)
+        return self.events.pop(0)
+
+
+def test_watch_changes_debounces_bursts():
+    watcher = FakeWatcher([set(), {'a'}, {'b'}, set(), {'c'}, None, set()])
+    batches = watch_changes(watcher, debounce=0.01)
+    assert next(batches) == {'a', 'b'}
+    assert next(batches) is None  # events were lost during the burst
+    assert watcher.timeouts == [None, None, 0.01, 0.01, None, 0.01]
+
+
+def test_watch_changes_reports_overflow():
+    batches = watch_changes(FakeWatcher([None]))
+    assert next(batches) is None